@@ -42,13 +42,17 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "core",
     "rest_framework",
     "drf_spectacular",
 ]
 
 MIDDLEWARE = [
+    "core.middleware.PerformanceMiddleware",
+    "core.querybudget.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.replica_stickiness_middleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -81,16 +85,151 @@ WSGI_APPLICATION = "app.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds and checked before
+# reuse. With DB_POOL=1 they are borrowed from an in-process pool of up to
+# DB_POOL_MAX_SIZE connections instead, checked when borrowed and returned
+# after every request.
+
+DB_POOL = bool(int(os.environ.get("DB_POOL", 0)))
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": (
+            "core.db.backends.postgresql_pool"
+            if DB_POOL
+            else "django.db.backends.postgresql"
+        ),
         "HOST": os.environ.get("DB_HOST"),
         "NAME": os.environ.get("DB_NAME"),
         "USER": os.environ.get("DB_USER"),
         "PASSWORD": os.environ.get("DB_PASS"),
+        "CONN_MAX_AGE": 0 if DB_POOL else int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": bool(int(os.environ.get("DB_CONN_HEALTH_CHECKS", 1))),
+        "POOL": {
+            "MIN_SIZE": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+            "MAX_SIZE": int(os.environ.get("DB_POOL_MAX_SIZE", 20)),
+            "TIMEOUT": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        },
     }
 }
 
+# Read replicas: comma separated hosts serving copies of the primary
+# database, added as the "replica1", "replica2", ... aliases. Reads are
+# routed to them by core.db.router, and clients that wrote keep reading
+# from the primary for DB_REPLICA_STICKY_SECONDS.
+
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+    filter(None, os.environ.get("DB_REPLICA_HOSTS", "").split(",")), start=1
+):
+    alias = f"replica{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "OPTIONS": {"connect_timeout": 2},
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["core.db.router.ReplicaRouter"]
+DB_REPLICA_CHECK_INTERVAL = float(os.environ.get("DB_REPLICA_CHECK_INTERVAL", 5))
+DB_REPLICA_STICKY_SECONDS = int(os.environ.get("DB_REPLICA_STICKY_SECONDS", 5))
+DB_PRIMARY_COOKIE = "db_primary"
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Local memory (LRU, per process) by default; point CACHE_BACKEND and
+# CACHE_LOCATION at e.g. redis or memcached to share entries between workers.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "api"),
+        "TIMEOUT": int(os.environ.get("CACHE_TIMEOUT", 300)),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", 10000)),
+        },
+    }
+}
+
+# Cache alias and switch for cached list/retrieve API responses
+API_CACHE_ALIAS = "default"
+API_CACHE_ENABLED = bool(int(os.environ.get("API_CACHE_ENABLED", 1)))
+
+# Serve list endpoints from values() rows encoded with orjson (if installed)
+API_FAST_JSON = bool(int(os.environ.get("API_FAST_JSON", 1)))
+
+# Per-request timings in Server-Timing headers and /api/metrics histograms
+API_METRICS_ENABLED = bool(int(os.environ.get("API_METRICS_ENABLED", 1)))
+
+# In-process autocomplete indexes (core.autocomplete): keys kept per model,
+# and seconds before an index is rebuilt to pick up other processes' writes.
+AUTOCOMPLETE_MAX_ENTRIES = int(os.environ.get("AUTOCOMPLETE_MAX_ENTRIES", 500000))
+AUTOCOMPLETE_MAX_AGE = int(os.environ.get("AUTOCOMPLETE_MAX_AGE", 300))
+
+# Background provider deletion (core.deletion): articles deleted per
+# transaction, and seconds to pause between batches.
+PROVIDER_DELETE_BATCH_SIZE = int(os.environ.get("PROVIDER_DELETE_BATCH_SIZE", 5000))
+PROVIDER_DELETE_BATCH_PAUSE = float(os.environ.get("PROVIDER_DELETE_BATCH_PAUSE", 0))
+
+# Background jobs (core.jobs): default seconds per attempt and attempts per
+# job, seconds before the first retry (doubled on every retry), and seconds
+# idle workers wait before looking for jobs again.
+JOB_TIMEOUT = int(os.environ.get("JOB_TIMEOUT", 600))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+JOB_RETRY_DELAY = int(os.environ.get("JOB_RETRY_DELAY", 10))
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 1.0))
+
+# Change feed (/api/changes): default and maximum changes per page, longest
+# long poll in seconds, and seconds between checks for new changes meanwhile.
+CHANGES_PAGE_SIZE = int(os.environ.get("CHANGES_PAGE_SIZE", 100))
+CHANGES_MAX_PAGE_SIZE = int(os.environ.get("CHANGES_MAX_PAGE_SIZE", 1000))
+CHANGES_MAX_WAIT = float(os.environ.get("CHANGES_MAX_WAIT", 30))
+CHANGES_POLL_INTERVAL = float(os.environ.get("CHANGES_POLL_INTERVAL", 0.5))
+
+# Query budgets (core.querybudget), checked per request when
+# QUERY_BUDGET_MODE is "log" or "raise"; meant for tests and staging.
+QUERY_BUDGET_MODE = os.environ.get("QUERY_BUDGET_MODE", "off")
+QUERY_BUDGET_MAX_REPEATS = int(os.environ.get("QUERY_BUDGET_MAX_REPEATS", 5))
+
+# Maximum queries per URL name and method. Counts include the savepoint
+# statements atomic blocks run inside tests and around bulk inserts, and
+# the locks provider stats refreshes and the change log take on PostgreSQL;
+# bulk budgets cover one chunk.
+QUERY_BUDGETS = {
+    "article:article-list": {"GET": 2, "POST": 8},
+    "article:article-detail": {"GET": 2, "PUT": 11, "PATCH": 11, "DELETE": 8},
+    "article:article-bulk": {"POST": 11, "PUT": 12, "DELETE": 10},
+    "article:article-export": {"GET": 1},
+    "article:article-export-job": {"POST": 1},
+    "article:article-prices": {"GET": 3},
+    "article:article-search": {"GET": 2},
+    "article:article-async-list": {"GET": 1},
+    "article:article-async-detail": {"GET": 1},
+    "article:price-filter-list": {"GET": 2},
+    "article:provider-filter-list": {"GET": 2},
+    "provider:provider-list": {"GET": 2, "POST": 5},
+    "provider:provider-detail": {"GET": 2, "PUT": 6, "PATCH": 6, "DELETE": 10},
+    "provider:provider-async-list": {"GET": 1},
+    "provider:provider-async-detail": {"GET": 1},
+    "provider:provider-stats": {"GET": 2},
+    "provider:provider-search": {"GET": 2},
+    "provider:provider-deletion": {"GET": 1},
+    "autocomplete": {"GET": 0},
+    "changes": {"GET": 3},
+    "job-list": {"GET": 1},
+    "job-detail": {"GET": 1},
+    "health-check": {"GET": 0},
+    "cache-stats": {"GET": 0},
+    "db-pool-stats": {"GET": 0},
+    "metrics": {"GET": 0},
+    "api-schema": {"GET": 0},
+    "api-docs": {"GET": 0},
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -136,3 +275,15 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
+
+# Default number of items per page on paginated list endpoints
+API_PAGE_SIZE = int(os.environ.get("API_PAGE_SIZE", 100))
+
+# Bulk article writes
+ARTICLE_BULK_CHUNK_SIZE = int(os.environ.get("ARTICLE_BULK_CHUNK_SIZE", 1000))
+ARTICLE_BULK_MAX_CHUNK_SIZE = 10000
+
+# Rows fetched per server-side cursor round trip when exporting articles
+ARTICLE_EXPORT_CHUNK_SIZE = int(os.environ.get("ARTICLE_EXPORT_CHUNK_SIZE", 2000))
+# Directory the export_articles task writes its files to
+ARTICLE_EXPORT_DIR = Path(os.environ.get("ARTICLE_EXPORT_DIR", BASE_DIR / "exports"))
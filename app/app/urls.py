@@ -22,11 +22,19 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from core import async_views as core_async_views
 from core import views as core_views
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/health-check", core_views.health_check, name="health-check"),
+    path("api/cache-stats", core_views.cache_stats, name="cache-stats"),
+    path("api/db-pool-stats", core_views.db_pool_stats, name="db-pool-stats"),
+    path("api/metrics", core_views.metrics, name="metrics"),
+    path("api/autocomplete", core_views.autocomplete, name="autocomplete"),
+    path("api/changes", core_async_views.ChangeFeedView.as_view(), name="changes"),
+    path("api/jobs", core_views.job_list, name="job-list"),
+    path("api/jobs/<int:job_id>", core_views.job_detail, name="job-detail"),
     path("api/schema", SpectacularAPIView.as_view(), name="api-schema"),
     path(
         "api/docs",
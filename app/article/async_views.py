@@ -0,0 +1,37 @@
+"""
+Async read views for the article API.
+"""
+from core.async_views import AsyncReadView
+from core.models import Article
+from article.fieldsets import Fieldset
+from article.filters import ArticleFilter
+from article.pagination import ArticleCursorPagination
+from article.serializers import ArticleSerializer
+
+
+class ArticleReadView(AsyncReadView):
+    """
+    Async list and detail of articles, with the article list filters and
+    fieldsets.
+    """
+
+    queryset = Article.objects.all()
+    fields = ArticleSerializer.Meta.fields
+    filter_backends = [ArticleFilter]
+
+    def get_columns(self, request, queryset):
+        return Fieldset.from_request(request).columns(queryset.query.order_by)
+
+    def get_data(self, request, rows):
+        return Fieldset.from_request(request).shape(rows)
+
+    async def alist(self, request):
+        queryset = self.get_queryset()
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(request, queryset, self)
+
+        paginator = ArticleCursorPagination()
+        page = await paginator.apaginate_queryset(
+            queryset.values(*self.get_columns(request, queryset)), request, self
+        )
+        return paginator.get_paginated_response(self.get_data(request, page)).data
@@ -0,0 +1,274 @@
+"""
+Bulk write helpers for article APIs.
+
+Rows are validated field by field, then handled in chunks: every chunk
+costs one query to resolve providers, one query to find existing
+duplicates and one batched write, instead of several round trips per row.
+The provider stats (`core.stats`) are updated once per request, or per
+chunk for deletes.
+"""
+import time
+
+from django.db import IntegrityError, transaction
+from rest_framework import serializers as drf_serializers
+
+from core import autocomplete, changes
+from core.cache import bump_versions
+from core.models import Article, Change, Provider
+from core.stats import add_articles, change_articles
+from article.serializers import DUPLICATE_MESSAGE, ArticleBulkSerializer
+
+
+def _chunks(items, size):
+    """Yield successive slices of `items` holding at most `size` entries."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _key(row):
+    """Return the natural key of an article row."""
+    return (row["article_name"], row["price"], row["provider_no"])
+
+
+class BulkResult:
+    """Collects counters and per-row errors of a bulk request."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.created = 0
+        self.updated = 0
+        self.deleted = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    def error(self, index, detail):
+        self.errors.append({"index": index, "errors": detail})
+
+    @property
+    def written(self):
+        return self.created + self.updated + self.deleted
+
+    def as_dict(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "deleted": self.deleted,
+            "errors": sorted(self.errors, key=lambda item: item["index"]),
+            "rows": self.rows,
+            "elapsed": round(elapsed, 6),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+def _validate(rows, result, require_pk=False):
+    """Return the (index, data) pairs of rows passing field validation."""
+    serializer = ArticleBulkSerializer()
+    valid = []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            result.error(index, {"non_field_errors": ["Expected an object."]})
+            continue
+        try:
+            data = serializer.run_validation(row)
+        except drf_serializers.ValidationError as exc:
+            result.error(index, exc.detail)
+            continue
+        if require_pk and "article_no" not in data:
+            result.error(index, {"article_no": ["This field is required."]})
+            continue
+        valid.append((index, data))
+    return valid
+
+
+def _check_providers(chunk, result, known_providers):
+    """
+    Drop rows of `chunk` referencing an unknown provider.
+
+    `known_providers` collects the ids found by earlier chunks, so each
+    provider is looked up once per request.
+    """
+    unchecked = {data["provider_no"] for _, data in chunk} - known_providers
+    if unchecked:
+        known_providers.update(
+            Provider.objects.active()
+            .filter(provider_no__in=unchecked)
+            .values_list("provider_no", flat=True)
+        )
+    accepted = []
+    for index, data in chunk:
+        if data["provider_no"] not in known_providers:
+            message = f"Invalid pk \"{data['provider_no']}\" - object does not exist."
+            result.error(index, {"provider_no": [message]})
+            continue
+        accepted.append((index, data))
+    return accepted
+
+
+def _check_chunk(chunk, result, known_providers, exclude_self=False):
+    """
+    Drop rows of `chunk` with an unknown provider or a duplicate key.
+
+    Duplicates are looked up with one query covering the whole chunk, and
+    rows repeating a key already seen earlier in the chunk are rejected too.
+    """
+    chunk = _check_providers(chunk, result, known_providers)
+    existing = {
+        (name, price, provider): article_no
+        for article_no, name, price, provider in Article.objects.filter(
+            article_name__in={data["article_name"] for _, data in chunk},
+            provider_no__in={data["provider_no"] for _, data in chunk},
+        ).values_list("article_no", "article_name", "price", "provider_no")
+    }
+
+    accepted = []
+    seen = set()
+    for index, data in chunk:
+        key = _key(data)
+        owner = existing.get(key)
+        taken = owner is not None and not (
+            exclude_self and owner == data.get("article_no")
+        )
+        if taken or key in seen:
+            result.error(index, {"non_field_errors": [DUPLICATE_MESSAGE]})
+            continue
+        seen.add(key)
+        accepted.append((index, data))
+    return accepted
+
+
+def _build(data, article_no=None):
+    """Return an unsaved article built from a validated row."""
+    return Article(
+        article_no=article_no,
+        article_name=data["article_name"],
+        price=data["price"],
+        provider_no_id=data["provider_no"],
+    )
+
+
+def _insert(accepted, result, chunk_size):
+    """
+    Insert the accepted rows of a chunk and return their (data, article)
+    pairs.
+
+    A duplicate written concurrently since the lookup fails the whole
+    batch; the chunk is then inserted row by row to report it.
+    """
+    try:
+        with transaction.atomic():
+            articles = Article.objects.bulk_create(
+                [_build(data) for _, data in accepted], batch_size=chunk_size
+            )
+    except IntegrityError:
+        pass
+    else:
+        return [(data, article) for (_, data), article in zip(accepted, articles)]
+
+    inserted = []
+    for index, data in accepted:
+        try:
+            with transaction.atomic():
+                (article,) = Article.objects.bulk_create([_build(data)])
+        except IntegrityError:
+            result.error(index, {"non_field_errors": [DUPLICATE_MESSAGE]})
+            continue
+        inserted.append((data, article))
+    return inserted
+
+
+def bulk_create(rows, chunk_size, upsert=False):
+    """
+    Validate `rows` and insert the valid ones with `bulk_create`.
+
+    With `upsert`, the duplicate lookup is skipped and rows are written
+    with `INSERT ... ON CONFLICT DO NOTHING`, so existing articles are
+    left untouched instead of being reported as errors.
+    """
+    result = BulkResult(len(rows))
+    valid = _validate(rows, result)
+    known_providers = set()
+    added, created = [], []
+    with transaction.atomic():
+        for chunk in _chunks(valid, chunk_size):
+            if upsert:
+                accepted = _check_providers(chunk, result, known_providers)
+                inserted = Article.objects.bulk_upsert(
+                    [_build(data) for _, data in accepted],
+                    fields=("article_no", "provider_no", "price"),
+                )
+                result.created += len(inserted)
+                created.extend(pk for pk, _, _ in inserted)
+                added.extend((provider_no, price) for _, provider_no, price in inserted)
+                continue
+            accepted = _check_chunk(chunk, result, known_providers)
+            inserted = _insert(accepted, result, chunk_size)
+            created.extend(article.pk for _, article in inserted)
+            result.created += len(inserted)
+            added.extend((data["provider_no"], data["price"]) for data, _ in inserted)
+        if result.created:
+            bump_versions(Article)
+            autocomplete.invalidate(Article)
+            add_articles(added)
+            changes.record(Article, Change.CREATE, created)
+    return result
+
+
+def bulk_update(rows, chunk_size):
+    """Validate `rows` and update the matching articles with `bulk_update`."""
+    result = BulkResult(len(rows))
+    valid = _validate(rows, result, require_pk=True)
+    known_providers = set()
+    # Stats rows (provider_no, price) of the updated articles, before and after.
+    old_rows, new_rows = {}, {}
+    renamed = []
+    with transaction.atomic():
+        for chunk in _chunks(valid, chunk_size):
+            found = {
+                article_no: (provider_no, price)
+                for article_no, provider_no, price in Article.objects.filter(
+                    article_no__in=[data["article_no"] for _, data in chunk]
+                ).values_list("article_no", "provider_no", "price")
+            }
+            present = []
+            for index, data in chunk:
+                if data["article_no"] in found:
+                    present.append((index, data))
+                else:
+                    result.error(index, {"article_no": ["Not found."]})
+            accepted = _check_chunk(
+                present, result, known_providers, exclude_self=True
+            )
+            result.updated += Article.objects.bulk_update(
+                [_build(data, data["article_no"]) for _, data in accepted],
+                ["article_name", "price", "provider_no"],
+                batch_size=chunk_size,
+            )
+            for _, data in accepted:
+                old_rows.setdefault(data["article_no"], found[data["article_no"]])
+                new_rows[data["article_no"]] = (data["provider_no"], data["price"])
+                renamed.append((data["article_no"], data["article_name"]))
+        if result.updated:
+            bump_versions(Article)
+            autocomplete.names_saved(Article, renamed)
+            change_articles(old_rows.values(), new_rows.values())
+            changes.record(Article, Change.UPDATE, [pk for pk, _ in renamed])
+    return result
+
+
+def bulk_delete(rows, chunk_size):
+    """Delete the articles whose ids (or `article_no` keys) are in `rows`."""
+    result = BulkResult(len(rows))
+    ids = []
+    for index, row in enumerate(rows):
+        pk = row.get("article_no") if isinstance(row, dict) else row
+        if isinstance(pk, bool) or not isinstance(pk, int):
+            result.error(index, {"article_no": ["A valid integer is required."]})
+            continue
+        ids.append(pk)
+    with transaction.atomic():
+        for chunk in _chunks(ids, chunk_size):
+            # Derived data is updated from the articles_deleted signal.
+            deleted, _ = Article.objects.filter(article_no__in=chunk).delete()
+            result.deleted += deleted
+    return result
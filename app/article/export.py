@@ -0,0 +1,84 @@
+"""
+Streaming export of articles.
+
+Rows are read from a server-side cursor as plain tuples and encoded in
+batches, so memory use stays flat no matter how many rows are exported.
+Small exports are streamed in the response, large ones are written to a
+file by the `export_articles` task.
+"""
+import csv
+import io
+import json
+import os
+
+EXPORT_FIELDS = ("article_no", "article_name", "price", "provider_no")
+
+
+def export_rows(queryset, chunk_size):
+    """Yield the export columns of `queryset` as tuples."""
+    return queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def _batched(rows, size):
+    """Yield lists of at most `size` rows."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_ndjson(rows, batch_size):
+    """Yield NDJSON encoded chunks of `rows`."""
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    for batch in _batched(rows, batch_size):
+        yield "".join(
+            encode(dict(zip(EXPORT_FIELDS, row))) + "\n" for row in batch
+        )
+
+
+def stream_csv(rows, batch_size):
+    """Yield CSV encoded chunks of `rows`, starting with a header row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for batch in _batched(rows, batch_size):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+STREAMS = {
+    "ndjson": stream_ndjson,
+    "csv": stream_csv,
+}
+
+
+def write_export(queryset, format, path, chunk_size):
+    """Write `queryset` to the file `path` and return the number of rows.
+
+    The rows go to a temporary file renamed into place once complete, so a
+    reader never sees a partial export.
+    """
+    count = 0
+
+    def counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    rows = counted(export_rows(queryset, chunk_size))
+    partial = f"{path}.part"
+    os.makedirs(os.path.dirname(partial) or ".", exist_ok=True)
+    with open(partial, "w", encoding="utf-8", newline="") as file:
+        for chunk in STREAMS[format](rows, chunk_size):
+            file.write(chunk)
+    os.replace(partial, path)
+    return count
@@ -0,0 +1,111 @@
+"""
+Sparse fieldsets and expansions for article APIs.
+
+`?fields=article_no,price` narrows the response to the named fields and
+the SELECT to their columns. `?expand=provider` inlines the provider of
+every article, read through a join by the same query instead of one
+`/api/provider/{id}` request per provider.
+"""
+from rest_framework.exceptions import ValidationError
+
+from article.serializers import ArticleSerializer
+from provider.serializers import ProviderSerializer
+
+FIELDS = ArticleSerializer.Meta.fields
+EXPANSIONS = ["provider"]
+
+# values() column of every provider field, under its response name
+PROVIDER_COLUMNS = {
+    name: f"provider_no__{name}" if name != "provider_no" else "provider_no"
+    for name in ProviderSerializer.Meta.fields
+}
+
+
+def parse_names(query_params, param, choices):
+    """Return the names given repeated and/or comma separated in `param`."""
+    names = []
+    for value in query_params.getlist(param):
+        for name in value.split(","):
+            name = name.strip()
+            if name and name not in names:
+                names.append(name)
+    unknown = [name for name in names if name not in choices]
+    if unknown:
+        raise ValidationError(
+            {
+                param: [
+                    f"Unknown {param}: {', '.join(unknown)}. "
+                    f"Use any of: {', '.join(choices)}."
+                ]
+            }
+        )
+    return names
+
+
+class Fieldset:
+    """The response fields and expansions asked for by a request."""
+
+    def __init__(self, fields=None, expand=()):
+        self.fields = list(fields or FIELDS)
+        self.expand = list(expand)
+
+    @classmethod
+    def from_request(cls, request):
+        """Return the fieldset of `request`, validated once per request."""
+        fieldset = getattr(request, "_article_fieldset", None)
+        if fieldset is None:
+            fieldset = request._article_fieldset = cls(
+                parse_names(request.query_params, "fields", FIELDS),
+                parse_names(request.query_params, "expand", EXPANSIONS),
+            )
+        return fieldset
+
+    @property
+    def is_default(self):
+        return self.fields == FIELDS and not self.expand
+
+    @property
+    def serializer_kwargs(self):
+        """Return the `ArticleSerializer` arguments rendering this fieldset."""
+        if self.is_default:
+            return {}
+        return {"fields": self.fields, "expand": self.expand}
+
+    def columns(self, ordering=()):
+        """
+        Return the columns to read: the fields, the `ordering` columns the
+        paginator positions on, and the expanded provider columns.
+        """
+        columns = list(self.fields)
+        for order in ordering:
+            name = order.lstrip("-")
+            if name not in columns:
+                columns.append(name)
+        if "provider" in self.expand:
+            for column in PROVIDER_COLUMNS.values():
+                if column not in columns:
+                    columns.append(column)
+        return columns
+
+    def only(self, queryset):
+        """Restrict a model queryset to the columns of this fieldset."""
+        if self.is_default:
+            return queryset
+        if "provider" in self.expand:
+            queryset = queryset.select_related("provider_no")
+        columns = self.columns(queryset.query.order_by)
+        return queryset.only(*columns)
+
+    def shape(self, rows):
+        """Turn `values()` rows read with `columns()` into response items."""
+        if self.is_default:
+            return rows
+        items = []
+        for row in rows:
+            item = {name: row[name] for name in self.fields}
+            if "provider" in self.expand:
+                item["provider"] = {
+                    name: row[column] for name, column in PROVIDER_COLUMNS.items()
+                }
+            items.append(item)
+        return items
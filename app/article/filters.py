@@ -0,0 +1,161 @@
+"""
+Query filters for article APIs.
+
+`ArticleFilter` combines price range, provider(s) and name prefix
+filters with an ordering, and only emits query shapes the article
+indexes can serve:
+
+* provider filter: `provider_no` equality, ordered by `article_no`;
+* name prefix: a range on `article_name` compared bytewise (see
+  `core.db.lookups.Bytewise`), ordered the same way, served by the unique
+  (article_name, price, provider_no) index on SQLite and by
+  `article_name_c_idx`, its `COLLATE "C"` copy, on PostgreSQL;
+* price range: a range on `price`, ordered by `price`.
+
+When several filters are given, the first of that list drives the index
+and ordering, the others are applied as residual conditions. Orderings
+always end with a unique key, so keyset pagination needs no offsets.
+"""
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+ORDERINGS = {
+    "-article_no": ("-article_no",),
+    "article_no": ("article_no",),
+    "price": ("price", "article_no"),
+    "-price": ("-price", "-article_no"),
+    "article_name": ("article_name__bytewise", "price", "provider_no"),
+    "-article_name": ("-article_name__bytewise", "-price", "-provider_no"),
+}
+
+PROVIDER_ORDERINGS = ["-article_no", "article_no"]
+NAME_ORDERINGS = ["article_name", "-article_name"]
+PRICE_ORDERINGS = ["price", "-price"]
+
+MAX_PROVIDERS = 100
+
+
+class ProviderListField(serializers.Field):
+    """Provider ids given as repeated and/or comma separated values."""
+
+    default_error_messages = {
+        "invalid": "A list of integers is required.",
+        "max_length": f"At most {MAX_PROVIDERS} providers are allowed.",
+    }
+
+    def get_value(self, dictionary):
+        if self.field_name not in dictionary:
+            return serializers.empty
+        return dictionary.getlist(self.field_name)
+
+    def to_internal_value(self, data):
+        try:
+            values = [
+                int(value)
+                for item in data
+                for value in str(item).split(",")
+                if value.strip()
+            ]
+        except ValueError:
+            self.fail("invalid")
+        if not values:
+            self.fail("invalid")
+        if len(values) > MAX_PROVIDERS:
+            self.fail("max_length")
+        return sorted(set(values))
+
+
+class ArticleFilterSerializer(serializers.Serializer):
+    """Serializer validating the article filter query parameters."""
+
+    min = serializers.IntegerField(required=False)
+    max = serializers.IntegerField(required=False)
+    pid = ProviderListField(required=False)
+    name = serializers.CharField(required=False, max_length=255, trim_whitespace=False)
+    ordering = serializers.ChoiceField(required=False, choices=list(ORDERINGS))
+
+    def validate(self, data):
+        if "min" in data and "max" in data and data["min"] > data["max"]:
+            raise serializers.ValidationError({"min": ["Must not exceed max."]})
+
+        allowed = allowed_orderings(data)
+        ordering = data.setdefault("ordering", allowed[0])
+        if ordering not in allowed:
+            raise serializers.ValidationError(
+                {
+                    "ordering": [
+                        f"Ordering by {ordering} is not supported with these "
+                        f"filters, use one of: {', '.join(allowed)}."
+                    ]
+                }
+            )
+        return data
+
+
+def allowed_orderings(params):
+    """Return the orderings an index can serve for the given filters."""
+    if "pid" in params:
+        return PROVIDER_ORDERINGS
+    if "name" in params:
+        return NAME_ORDERINGS
+    if "min" in params or "max" in params:
+        return PRICE_ORDERINGS
+    return list(ORDERINGS)
+
+
+def prefix_upper_bound(prefix):
+    """Return the smallest string greater than every string starting with `prefix`."""
+    while prefix and ord(prefix[-1]) == 0x10FFFF:
+        prefix = prefix[:-1]
+    if not prefix:
+        return None
+    following = ord(prefix[-1]) + 1
+    if 0xD800 <= following <= 0xDFFF:
+        # Surrogates cannot be encoded; no character sorts between them.
+        following = 0xE000
+    return prefix[:-1] + chr(following)
+
+
+class ArticleFilter(BaseFilterBackend):
+    """Filter backend for article lists, see the module docstring."""
+
+    def get_params(self, request):
+        """Return the validated filter parameters of `request`."""
+        params = getattr(request, "_article_filter_params", None)
+        if params is None:
+            serializer = ArticleFilterSerializer(data=request.query_params)
+            serializer.is_valid(raise_exception=True)
+            params = request._article_filter_params = serializer.validated_data
+        return params
+
+    def filter_queryset(self, request, queryset, view):
+        queryset = self.apply_filters(queryset, self.get_params(request))
+        return queryset.order_by(*self.get_ordering(request, queryset, view))
+
+    def apply_filters(self, queryset, params):
+        """Return `queryset` restricted by the validated filter `params`."""
+        if "pid" in params:
+            if len(params["pid"]) == 1:
+                queryset = queryset.filter(provider_no=params["pid"][0])
+            else:
+                queryset = queryset.filter(provider_no__in=params["pid"])
+
+        if "name" in params:
+            # Compared bytewise, the names starting with the prefix are
+            # exactly those between it and its upper bound, in the order
+            # of the name orderings, so one index range serves the page.
+            prefix = params["name"]
+            queryset = queryset.filter(article_name__bytewise__gte=prefix)
+            upper = prefix_upper_bound(prefix)
+            if upper is not None:
+                queryset = queryset.filter(article_name__bytewise__lt=upper)
+
+        if "min" in params:
+            queryset = queryset.filter(price__gte=params["min"])
+        if "max" in params:
+            queryset = queryset.filter(price__lte=params["max"])
+        return queryset
+
+    def get_ordering(self, request, queryset, view):
+        """Return the ordering of the filtered list, used by the paginator."""
+        return ORDERINGS[self.get_params(request)["ordering"]]
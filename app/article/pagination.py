@@ -0,0 +1,141 @@
+"""
+Pagination for article APIs.
+"""
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+
+
+class ArticleCursorPagination(CursorPagination):
+    """
+    Keyset pagination over a unique ordering.
+
+    DRF's CursorPagination positions on the first ordering column only and
+    skips ties with an offset. Article orderings always end with a unique
+    key (see `article.filters.ORDERINGS`), so the cursor stores the values
+    of every ordering column of the boundary row and the next page is
+    fetched with `WHERE (columns) > (position) ORDER BY columns LIMIT n`.
+    A column may apply a transform to a field, e.g. `article_name__bytewise`;
+    the cursor then stores the value of the field.
+    Every page costs the same no matter how deep the client is, and no
+    `COUNT(*)` is ever issued.
+    """
+
+    ordering = "-article_no"
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    # Fields of ordering columns that are annotations, not model fields.
+    position_fields = {}
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async version of `paginate_queryset`."""
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([row async for row in queryset.aiterator()])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """Return the query fetching the requested page and one extra row."""
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        self.reverse = self.cursor is not None and self.cursor.reverse
+        ordering = _reverse_ordering(self.ordering) if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            position = self.decode_position(queryset.model, self.cursor.position)
+            queryset = queryset.filter(self.after(ordering, position))
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results):
+        """Keep the page out of the rows fetched by `get_page_queryset`."""
+        self.page = results[: self.page_size]
+        has_more = len(results) > self.page_size
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        return self.page
+
+    @staticmethod
+    def after(ordering, position):
+        """Return the condition selecting rows past `position` in `ordering`."""
+        condition = Q()
+        equal = {}
+        for order, value in zip(ordering, position):
+            name = order.lstrip("-")
+            lookup = "lt" if order.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        first = ordering[0].lstrip("-")
+        bound = "lte" if ordering[0].startswith("-") else "gte"
+        # The redundant bound on the leading column lets the index seek.
+        return Q(**{f"{first}__{bound}": position[0]}) & condition
+
+    def get_position_field(self, model, name):
+        """Return the field of the ordering column `name`."""
+        return self.position_fields.get(name) or model._meta.get_field(
+            name.split(LOOKUP_SEP)[0]
+        )
+
+    def decode_position(self, model, position):
+        """Return the typed ordering values stored in a cursor position."""
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                self.get_position_field(model, order.lstrip("-")).to_python(value)
+                for order, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is not None and cursor.position is None:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            name = order.lstrip("-").split(LOOKUP_SEP)[0]
+            if isinstance(instance, dict):
+                value = instance[name]
+            else:
+                field = instance._meta.get_field(name)
+                value = getattr(instance, field.attname)
+            values.append(value)
+        return json.dumps(values, separators=(",", ":"))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
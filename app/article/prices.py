@@ -0,0 +1,240 @@
+"""
+Price distribution of articles.
+
+On PostgreSQL the database computes everything: one query returns the
+count, min, max, mean and `percentile_cont` percentiles, a second one
+groups prices into equal width `width_bucket` buckets. Both read only the
+price column, from an index covering it. Other databases stream the
+prices with `values_list` and compute the same figures in Python, with
+NumPy when it is installed.
+
+Percentiles interpolate linearly between the closest ranks, like
+`percentile_cont`. Buckets split [min, max] in `buckets` equal ranges,
+the last one including max, like `LEAST(width_bucket(...), buckets)`.
+"""
+import bisect
+
+from django.db import connections
+from rest_framework import serializers
+
+from article.filters import ProviderListField
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - NumPy is optional
+    numpy = None
+
+DEFAULT_BUCKETS = 10
+MAX_BUCKETS = 1000
+DEFAULT_PERCENTILES = [25, 50, 75, 90, 99]
+MAX_PERCENTILES = 20
+
+SUMMARY_SQL = """
+SELECT count(*), min(price), max(price), avg(price),
+    percentile_cont(%s::float8[]) WITHIN GROUP (ORDER BY price)
+FROM ({prices}) AS prices
+"""
+
+HISTOGRAM_SQL = """
+SELECT LEAST(width_bucket(price::numeric, %s, %s, %s), %s) AS bucket, count(*)
+FROM ({prices}) AS prices
+GROUP BY bucket
+"""
+
+STREAM_CHUNK_SIZE = 10000
+
+
+class PercentileListField(serializers.Field):
+    """Percentiles between 0 and 100, given comma separated."""
+
+    default_error_messages = {
+        "invalid": "A comma separated list of numbers between 0 and 100 is required.",
+        "max_length": f"At most {MAX_PERCENTILES} percentiles are allowed.",
+    }
+
+    def to_internal_value(self, data):
+        try:
+            values = {float(value) for value in str(data).split(",") if value.strip()}
+        except ValueError:
+            self.fail("invalid")
+        if not values or not all(0 <= value <= 100 for value in values):
+            self.fail("invalid")
+        if len(values) > MAX_PERCENTILES:
+            self.fail("max_length")
+        return sorted(values)
+
+
+class PriceStatsParamsSerializer(serializers.Serializer):
+    """Serializer validating the price distribution query parameters."""
+
+    pid = ProviderListField(required=False)
+    buckets = serializers.IntegerField(
+        min_value=1, max_value=MAX_BUCKETS, default=DEFAULT_BUCKETS
+    )
+    percentiles = PercentileListField(default=DEFAULT_PERCENTILES)
+
+
+class PercentileSerializer(serializers.Serializer):
+    percentile = serializers.FloatField()
+    value = serializers.FloatField()
+
+
+class BucketSerializer(serializers.Serializer):
+    lower = serializers.FloatField()
+    upper = serializers.FloatField()
+    count = serializers.IntegerField()
+
+
+class PriceStatsSerializer(serializers.Serializer):
+    """Serializer for the price distribution of articles."""
+
+    count = serializers.IntegerField()
+    min = serializers.IntegerField(allow_null=True)
+    max = serializers.IntegerField(allow_null=True)
+    mean = serializers.FloatField(allow_null=True)
+    percentiles = PercentileSerializer(many=True)
+    histogram = BucketSerializer(many=True)
+
+
+def bucket_edges(low, high, buckets):
+    """Return the (lower, upper) bounds of every bucket."""
+    if low == high:
+        return [(low, high)]
+    width = (high - low) / buckets
+    return [
+        (low + width * i, high if i == buckets - 1 else low + width * (i + 1))
+        for i in range(buckets)
+    ]
+
+
+def build_stats(count, low, high, mean, percentiles, values, counts):
+    """Return the response data of the computed figures."""
+    if not count:
+        return {
+            "count": 0,
+            "min": None,
+            "max": None,
+            "mean": None,
+            "percentiles": [],
+            "histogram": [],
+        }
+    return {
+        "count": count,
+        "min": low,
+        "max": high,
+        "mean": round(mean, 4),
+        "percentiles": [
+            {"percentile": pct, "value": round(value, 4)}
+            for pct, value in zip(percentiles, values)
+        ],
+        "histogram": [
+            {"lower": lower, "upper": upper, "count": bucket_count}
+            for (lower, upper), bucket_count in zip(
+                bucket_edges(low, high, len(counts)), counts
+            )
+        ],
+    }
+
+
+def price_stats(
+    queryset, buckets=DEFAULT_BUCKETS, percentiles=DEFAULT_PERCENTILES
+):
+    """Return the price distribution of the articles of `queryset`."""
+    prices = queryset.order_by().values_list("price", flat=True)
+    if connections[queryset.db].vendor == "postgresql":
+        return database_stats(prices, buckets, percentiles)
+    return python_stats(prices, buckets, percentiles)
+
+
+def database_stats(prices, buckets, percentiles):
+    """Compute the distribution with PostgreSQL aggregates."""
+    sql, params = prices.query.sql_with_params()
+    with connections[prices.db].cursor() as cursor:
+        cursor.execute(
+            SUMMARY_SQL.format(prices=sql),
+            [[pct / 100 for pct in percentiles], *params],
+        )
+        count, low, high, mean, values = cursor.fetchone()
+        if not count:
+            return build_stats(0, None, None, None, percentiles, [], [])
+
+        counts = [0] * (buckets if high > low else 1)
+        if high > low:
+            cursor.execute(
+                HISTOGRAM_SQL.format(prices=sql),
+                [low, high, buckets, buckets, *params],
+            )
+            for bucket, bucket_count in cursor.fetchall():
+                counts[bucket - 1] = bucket_count
+        else:
+            counts[0] = count
+    return build_stats(count, low, high, float(mean), percentiles, values, counts)
+
+
+def python_stats(prices, buckets, percentiles):
+    """Compute the distribution from streamed prices."""
+    stream = prices.iterator(chunk_size=STREAM_CHUNK_SIZE)
+    if numpy is not None:
+        return numpy_stats(stream, buckets, percentiles)
+
+    values = sorted(stream)
+    count = len(values)
+    if not count:
+        return build_stats(0, None, None, None, percentiles, [], [])
+    low, high = values[0], values[-1]
+    if high == low:
+        counts = [count]
+    else:
+        # Bucket i holds the prices below the first price of bucket i + 1.
+        bounds = [low + -(-(high - low) * i // buckets) for i in range(1, buckets)]
+        positions = [bisect.bisect_left(values, bound) for bound in bounds]
+        counts = [
+            end - start for start, end in zip([0, *positions], [*positions, count])
+        ]
+    return build_stats(
+        count,
+        low,
+        high,
+        sum(values) / count,
+        percentiles,
+        [interpolate(values, pct) for pct in percentiles],
+        counts,
+    )
+
+
+def numpy_stats(stream, buckets, percentiles):
+    """Compute the distribution with vectorized NumPy operations."""
+    values = numpy.fromiter(stream, dtype=numpy.int64)
+    count = len(values)
+    if not count:
+        return build_stats(0, None, None, None, percentiles, [], [])
+    low, high = int(values.min()), int(values.max())
+    if high == low:
+        counts = [count]
+    else:
+        index = numpy.minimum((values - low) * buckets // (high - low), buckets - 1)
+        counts = numpy.bincount(index, minlength=buckets).tolist()
+    return build_stats(
+        count,
+        low,
+        high,
+        float(values.mean()),
+        percentiles,
+        numpy.percentile(values, percentiles).tolist(),
+        counts,
+    )
+
+
+def interpolate(values, pct):
+    """Return the `pct` percentile of sorted `values`, like percentile_cont."""
+    rank = (len(values) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+    return float(values[lower] + (values[upper] - values[lower]) * (rank - lower))
+
+
+def price_stats_params(request):
+    """Return the validated price distribution parameters of `request`."""
+    serializer = PriceStatsParamsSerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
@@ -0,0 +1,50 @@
+"""
+Renderers for article exports.
+
+The export endpoint streams its body itself; these renderers let DRF
+negotiate the format (`?format=ndjson` / `?format=csv` or `Accept`) and
+render the small error payloads that may be returned instead.
+"""
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+def _as_rows(data):
+    """Return `data` as a list of flat objects."""
+    if data is None:
+        return []
+    if isinstance(data, dict):
+        return [data]
+    return list(data)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Render newline delimited JSON."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        lines = [json.dumps(row, ensure_ascii=False) for row in _as_rows(data)]
+        return "".join(line + "\n" for line in lines).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """Render comma separated values with a header row."""
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = _as_rows(data)
+        buffer = io.StringIO()
+        if rows:
+            writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        return buffer.getvalue().encode(self.charset)
@@ -0,0 +1,58 @@
+"""
+Article name search, combined with the article list filters.
+
+Matching and ranking are done by `core.search`; the price range and
+provider filters of `article.filters` apply on top. Results are ordered
+by rank and paged with the article keyset paginator, the rank being part
+of the cursor position.
+"""
+from django.db.models import FloatField
+from rest_framework import serializers
+
+from core.search import search
+from article.filters import ArticleFilter, ArticleFilterSerializer
+from article.pagination import ArticleCursorPagination
+
+SEARCH_ORDERING = ("-rank", "-article_no")
+
+# Name of the generated tsvector column of article_name.
+SEARCH_VECTOR_COLUMN = "search_vector"
+
+
+class ArticleSearchSerializer(ArticleFilterSerializer):
+    """Serializer validating the article search query parameters."""
+
+    q = serializers.CharField(max_length=255)
+    ordering = None
+
+
+class ArticleSearchFilter(ArticleFilter):
+    """Filter backend ranking the articles whose name matches `q`."""
+
+    def get_params(self, request):
+        params = getattr(request, "_article_search_params", None)
+        if params is None:
+            serializer = ArticleSearchSerializer(data=request.query_params)
+            serializer.is_valid(raise_exception=True)
+            params = request._article_search_params = serializer.validated_data
+        return params
+
+    def filter_queryset(self, request, queryset, view):
+        params = self.get_params(request)
+        queryset = search(
+            self.apply_filters(queryset, params),
+            params["q"],
+            "article_name",
+            SEARCH_VECTOR_COLUMN,
+        )
+        return queryset.order_by(*SEARCH_ORDERING)
+
+    def get_ordering(self, request, queryset, view):
+        return SEARCH_ORDERING
+
+
+class ArticleSearchPagination(ArticleCursorPagination):
+    """Keyset pagination over the search rank."""
+
+    ordering = SEARCH_ORDERING
+    position_fields = {"rank": FloatField()}
@@ -1,8 +1,13 @@
 """
 Serializers for article APIs.
 """
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from core.models import Article
+from core.models import Article, Provider
+from article.export import STREAMS
+from provider.serializers import ProviderSerializer
+
+DUPLICATE_MESSAGE = "Article with the same name, price, and provider already exists."
 
 
 class ArticleSerializer(serializers.ModelSerializer):
@@ -17,16 +22,68 @@ class ArticleSerializer(serializers.ModelSerializer):
             "provider_no",
         ]
         read_only_fields = ["article_no"]
+        # Providers being deleted take no new articles.
+        extra_kwargs = {"provider_no": {"queryset": Provider.objects.active()}}
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        """Output only `fields`, plus the nested objects named in `expand`."""
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        if "provider" in expand:
+            self.fields["provider"] = ProviderSerializer(
+                source="provider_no", read_only=True
+            )
+
+    def create(self, validated_data):
+        return self._save_unique(super().create, validated_data)
+
+    def update(self, instance, validated_data):
+        return self._save_unique(super().update, instance, validated_data)
+
+    def _save_unique(self, save, *args):
+        """Turn a unique constraint violation into a validation error."""
+        try:
+            with transaction.atomic():
+                return save(*args)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {"non_field_errors": [DUPLICATE_MESSAGE]}
+            )
+
+
+class ArticleSearchResultSerializer(ArticleSerializer):
+    """Serializer for an article found by a search."""
+
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(ArticleSerializer.Meta):
+        fields = ArticleSerializer.Meta.fields + ["rank"]
+
+
+class ArticleBulkSerializer(serializers.Serializer):
+    """Serializer for validating a single row of a bulk article request."""
+
+    article_no = serializers.IntegerField(required=False)
+    article_name = serializers.CharField(max_length=255)
+    price = serializers.IntegerField()
+    provider_no = serializers.IntegerField()
+
+
+class ArticleBulkResultSerializer(serializers.Serializer):
+    """Serializer for the outcome of a bulk article request."""
+
+    created = serializers.IntegerField()
+    updated = serializers.IntegerField()
+    deleted = serializers.IntegerField()
+    errors = serializers.ListField(child=serializers.DictField())
+    rows = serializers.IntegerField()
+    elapsed = serializers.FloatField()
+    rows_per_second = serializers.FloatField()
+
+
+class ArticleExportJobSerializer(serializers.Serializer):
+    """Serializer for the options of a background article export."""
 
-    def validate(self, data):
-        if "article_name" in data and "price" in data and "provider_no" in data:
-            # Ensure the combination of article_name, price, and provider_no is unique
-            if Article.objects.filter(
-                article_name=data["article_name"],
-                price=data["price"],
-                provider_no=data["provider_no"],
-            ).exists():
-                raise serializers.ValidationError(
-                    "Article with the same name, price, and provider already exists."
-                )
-        return data
+    format = serializers.ChoiceField(choices=list(STREAMS), default="ndjson")
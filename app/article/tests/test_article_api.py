@@ -1,14 +1,17 @@
 """
 Test for article apis.
 """
+from unittest import mock
 
+from django.db import IntegrityError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Article, Provider
+from core.models import Article, ArticleQuerySet, Provider
 
 from article.serializers import ArticleSerializer
 
@@ -52,7 +55,7 @@ class ArticleApiTests(TestCase):
         article = Article.objects.all().order_by("-article_no")
         serializer = ArticleSerializer(article, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_retrieve_article_detail(self):
         """Test retrieving a article detail"""
@@ -90,6 +93,77 @@ class ArticleApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_unique_constraint(self):
+        """Test the database rejects duplicate articles"""
+        Article.objects.create(
+            article_name="Article1", price=1234, provider_no=self.provider
+        )
+
+        with self.assertRaises(IntegrityError):
+            Article.objects.create(
+                article_name="Article1", price=1234, provider_no=self.provider
+            )
+
+    def test_create_article_upsert(self):
+        """Test upsert mode returns the existing article on duplicates"""
+        payload = {
+            "article_name": "Article1",
+            "price": 1234,
+            "provider_no": self.provider.provider_no,
+        }
+        res = self.client.post(f"{ARTICLE_URL}?upsert=true", payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        dup = self.client.post(f"{ARTICLE_URL}?upsert=true", payload)
+
+        self.assertEqual(dup.status_code, status.HTTP_200_OK)
+        self.assertEqual(dup.data["article_no"], res.data["article_no"])
+        self.assertEqual(Article.objects.count(), 1)
+
+    def test_create_article_upsert_concurrent_delete(self):
+        """Test upsert inserts again when the conflicting row was deleted"""
+        payload = {
+            "article_name": "Article1",
+            "price": 1234,
+            "provider_no": self.provider.provider_no,
+        }
+        conflicting = Article.objects.create(
+            article_name="Article1", price=1234, provider_no=self.provider
+        )
+        bulk_upsert = ArticleQuerySet.bulk_upsert
+
+        def delete_after_conflict(queryset, articles):
+            inserted = bulk_upsert(queryset, articles)
+            Article.objects.filter(pk=conflicting.pk).delete()
+            return inserted
+
+        with mock.patch.object(
+            ArticleQuerySet,
+            "bulk_upsert",
+            autospec=True,
+            side_effect=delete_after_conflict,
+        ):
+            res = self.client.post(f"{ARTICLE_URL}?upsert=true", payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(res.data["article_no"], conflicting.article_no)
+        self.assertEqual(Article.objects.count(), 1)
+
+    def test_update_article_duplicate(self):
+        """Test updating an article into a duplicate fails"""
+        Article.objects.create(
+            article_name="Article1", price=1234, provider_no=self.provider
+        )
+        article = Article.objects.create(
+            article_name="Article2", price=1234, provider_no=self.provider
+        )
+        url = detail_url(article.article_no)
+        res = self.client.patch(url, {"article_name": "Article1"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        article.refresh_from_db()
+        self.assertEqual(article.article_name, "Article2")
+
     def test_create_article_invalid(self):
         """Test creating article with invalid payload"""
         payload = {}
@@ -200,7 +274,7 @@ class ArticleApiTests(TestCase):
         res = self.client.get(PRICE_FILTER_URL, {"min": 200, "max": 450})
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 3)
+        self.assertEqual(len(res.data["results"]), 3)
 
     def test_filtering_by_min_price_only(self):
         """Test filtering articles by min price only"""
@@ -209,7 +283,7 @@ class ArticleApiTests(TestCase):
         res = self.client.get(PRICE_FILTER_URL, {"min": 200})
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 4)
+        self.assertEqual(len(res.data["results"]), 4)
 
     def test_filtering_by_max_price_only(self):
         """Test filtering articles by max price only"""
@@ -218,7 +292,7 @@ class ArticleApiTests(TestCase):
         res = self.client.get(PRICE_FILTER_URL, {"max": 250})
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 2)
+        self.assertEqual(len(res.data["results"]), 2)
 
     def test_filtering_by_provider(self):
         """Test filtering articles by provider"""
@@ -229,7 +303,7 @@ class ArticleApiTests(TestCase):
         res = self.client.get(PROVIDER_FILTER_URL, {"pid": provider2.provider_no})
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 5)
+        self.assertEqual(len(res.data["results"]), 5)
 
     def test_filtering_by_invalid_provider(self):
         """Test filtering articles by invalid provider"""
@@ -238,4 +312,68 @@ class ArticleApiTests(TestCase):
         res = self.client.get(PROVIDER_FILTER_URL, {"pid": 9999})
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 0)
+        self.assertEqual(len(res.data["results"]), 0)
+
+    def test_article_list_paginated(self):
+        """Test the article list is split into cursor pages"""
+        create_many_articles(self.provider, 5)
+
+        res = self.client.get(ARTICLE_URL, {"page_size": 2})
+
+        article = Article.objects.all().order_by("-article_no")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNone(res.data["previous"])
+        self.assertIsNotNone(res.data["next"])
+        self.assertEqual(
+            res.data["results"], ArticleSerializer(article[:2], many=True).data
+        )
+
+    def test_article_list_follow_cursor(self):
+        """Test following next cursors walks every article once"""
+        create_many_articles(self.provider, 5)
+
+        seen = []
+        url = f"{ARTICLE_URL}?page_size=2"
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen.extend(item["article_no"] for item in res.data["results"])
+            url = res.data["next"]
+
+        expected = list(
+            Article.objects.order_by("-article_no").values_list(
+                "article_no", flat=True
+            )
+        )
+        self.assertEqual(seen, expected)
+
+    def test_article_list_no_count_query(self):
+        """Test a page is served by a single query, without COUNT(*)"""
+        create_many_articles(self.provider, 5)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ARTICLE_URL, {"page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        article_queries = [
+            query["sql"] for query in queries if 'FROM "core_article"' in query["sql"]
+        ]
+        self.assertEqual(len(article_queries), 1)
+        self.assertNotIn("COUNT(", article_queries[0].upper())
+
+    def test_article_list_invalid_cursor(self):
+        """Test an invalid cursor is rejected"""
+        res = self.client.get(ARTICLE_URL, {"cursor": "not-a-cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_filter_list_paginated(self):
+        """Test the filter endpoints are paginated"""
+        create_many_articles(self.provider, 5)
+
+        res = self.client.get(PRICE_FILTER_URL, {"min": 100, "page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNotNone(res.data["next"])
@@ -0,0 +1,87 @@
+"""
+Test for the async article read views.
+"""
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Article, Provider
+
+
+ARTICLE_URL = reverse("article:article-list")
+ASYNC_ARTICLE_URL = reverse("article:article-async-list")
+
+
+def async_detail_url(article_id):
+    """Return async article detail URL"""
+    return reverse("article:article-async-detail", args=[article_id])
+
+
+class ArticleAsyncApiTests(TestCase):
+    """Test the async article views"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.provider = Provider.objects.create(provider_name="Provider1")
+        for i in range(5):
+            Article.objects.create(
+                article_name=f"Article{i}", price=100 * i, provider_no=self.provider
+            )
+
+    async def test_list_matches_sync_view(self):
+        """Test the async list returns the body of the sync list"""
+        for params in [{}, {"page_size": 2}, {"min": 100, "ordering": "-price"}]:
+            with self.subTest(params=params):
+                res = await self.async_client.get(ASYNC_ARTICLE_URL, params)
+                expected = await self.async_client.get(ARTICLE_URL, params)
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(res.json()["results"], expected.json()["results"])
+
+    async def test_follow_cursor(self):
+        """Test the next link of the async list leads to the next page"""
+        res = await self.async_client.get(ASYNC_ARTICLE_URL, {"page_size": 3})
+        res = await self.async_client.get(res.json()["next"])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()["results"]), 2)
+        self.assertIsNone(res.json()["next"])
+
+    async def test_invalid_filter(self):
+        """Test invalid filters are rejected like on the sync list"""
+        res = await self.async_client.get(ASYNC_ARTICLE_URL, {"min": "abc"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("min", res.json())
+
+    async def test_retrieve(self):
+        """Test retrieving an article asynchronously"""
+        article = await Article.objects.afirst()
+
+        res = await self.async_client.get(async_detail_url(article.article_no))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.json(),
+            {
+                "article_no": article.article_no,
+                "article_name": article.article_name,
+                "price": article.price,
+                "provider_no": self.provider.provider_no,
+            },
+        )
+
+    async def test_retrieve_missing(self):
+        """Test retrieving a missing article returns 404"""
+        res = await self.async_client.get(async_detail_url(999999))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIn("detail", res.json())
+
+    def test_write_not_allowed(self):
+        """Test the async views are read-only"""
+        res = self.client.post(ASYNC_ARTICLE_URL, {})
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -0,0 +1,209 @@
+"""
+Test for the bulk article api.
+"""
+import json
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Article, Provider
+from article import bulk
+
+
+BULK_URL = reverse("article:article-bulk")
+
+
+def create_provider(name="Provider1"):
+    """Create and return a sample provider"""
+    return Provider.objects.create(provider_name=name)
+
+
+class ArticleBulkApiTests(TestCase):
+    """Test the bulk article API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.provider = create_provider()
+
+    def rows(self, number):
+        return [
+            {
+                "article_name": f"Article{i}",
+                "price": 100 * (i + 1),
+                "provider_no": self.provider.provider_no,
+            }
+            for i in range(number)
+        ]
+
+    def test_bulk_create(self):
+        """Test creating many articles in chunks"""
+        res = self.client.post(
+            f"{BULK_URL}?chunk_size=2", self.rows(5), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 5)
+        self.assertEqual(res.data["errors"], [])
+        self.assertEqual(res.data["rows"], 5)
+        self.assertIn("rows_per_second", res.data)
+        self.assertEqual(Article.objects.count(), 5)
+
+    def test_bulk_create_ndjson(self):
+        """Test creating many articles from an NDJSON body"""
+        body = "\n".join(json.dumps(row) for row in self.rows(3))
+
+        res = self.client.post(
+            BULK_URL, body, content_type="application/x-ndjson"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(Article.objects.count(), 3)
+
+    def test_bulk_create_invalid_ndjson(self):
+        """Test a malformed NDJSON body is rejected"""
+        res = self.client.post(
+            BULK_URL, '{"price": 1}\n{oops', content_type="application/x-ndjson"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_reports_row_errors(self):
+        """Test invalid and duplicate rows are reported per row"""
+        Article.objects.create(
+            article_name="Article0", price=100, provider_no=self.provider
+        )
+        rows = self.rows(3)
+        rows.append({"article_name": "Bad", "price": "x", "provider_no": 1})
+        rows.append(dict(rows[1]))
+        rows.append({"article_name": "Orphan", "price": 1, "provider_no": 9999})
+
+        res = self.client.post(BULK_URL, rows, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual([e["index"] for e in res.data["errors"]], [0, 3, 4, 5])
+        self.assertIn("price", res.data["errors"][1]["errors"])
+        self.assertIn("provider_no", res.data["errors"][3]["errors"])
+        self.assertEqual(Article.objects.count(), 3)
+
+    def test_bulk_create_duplicate_check_is_set_based(self):
+        """Test a chunk costs a fixed number of queries"""
+        # Including the savepoint guarding the insert against duplicates.
+        with self.assertNumQueries(10):
+            self.client.post(BULK_URL, self.rows(50), format="json")
+
+    def test_bulk_create_concurrent_duplicate(self):
+        """Test a duplicate inserted after the lookup is reported per row"""
+        rows = self.rows(3)
+        Article.objects.create(
+            article_name="Article1", price=200, provider_no=self.provider
+        )
+
+        # As if the duplicate was committed between the lookup and the insert.
+        def check_chunk(chunk, result, known_providers, **kwargs):
+            return bulk._check_providers(chunk, result, known_providers)
+
+        with mock.patch.object(bulk, "_check_chunk", check_chunk):
+            res = self.client.post(BULK_URL, rows, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual([e["index"] for e in res.data["errors"]], [1])
+        self.assertEqual(Article.objects.count(), 3)
+
+    def test_bulk_create_upsert(self):
+        """Test upsert mode skips existing articles without errors"""
+        Article.objects.create(
+            article_name="Article0", price=100, provider_no=self.provider
+        )
+        rows = self.rows(3) + self.rows(2)
+
+        res = self.client.post(f"{BULK_URL}?upsert=1", rows, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual(res.data["errors"], [])
+        self.assertEqual(Article.objects.count(), 3)
+
+    def test_bulk_create_all_invalid(self):
+        """Test a request where no row is valid fails"""
+        res = self.client.post(BULK_URL, [{"price": 1}], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["created"], 0)
+
+    def test_bulk_requires_list(self):
+        """Test a non list body is rejected"""
+        res = self.client.post(BULK_URL, self.rows(1)[0], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_invalid_chunk_size(self):
+        """Test an invalid chunk size is rejected"""
+        res = self.client.post(
+            f"{BULK_URL}?chunk_size=0", self.rows(1), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update(self):
+        """Test updating many articles"""
+        first = Article.objects.create(
+            article_name="Article1", price=100, provider_no=self.provider
+        )
+        second = Article.objects.create(
+            article_name="Article2", price=200, provider_no=self.provider
+        )
+        rows = [
+            {
+                "article_no": first.article_no,
+                "article_name": "Renamed",
+                "price": 150,
+                "provider_no": self.provider.provider_no,
+            },
+            {
+                "article_no": second.article_no,
+                "article_name": "Renamed",
+                "price": 150,
+                "provider_no": self.provider.provider_no,
+            },
+            {
+                "article_no": 9999,
+                "article_name": "Missing",
+                "price": 1,
+                "provider_no": self.provider.provider_no,
+            },
+            {"article_name": "NoPk", "price": 1, "provider_no": 1},
+        ]
+
+        res = self.client.put(BULK_URL, rows, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["updated"], 1)
+        self.assertEqual([e["index"] for e in res.data["errors"]], [1, 2, 3])
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.article_name, "Renamed")
+        self.assertEqual(first.price, 150)
+        self.assertEqual(second.article_name, "Article2")
+
+    def test_bulk_delete(self):
+        """Test deleting many articles by id"""
+        articles = [
+            Article.objects.create(
+                article_name=f"Article{i}", price=i, provider_no=self.provider
+            )
+            for i in range(4)
+        ]
+        rows = [articles[0].article_no, {"article_no": articles[1].article_no}, "x"]
+
+        res = self.client.delete(BULK_URL, rows, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["deleted"], 2)
+        self.assertEqual([e["index"] for e in res.data["errors"]], [2])
+        self.assertEqual(Article.objects.count(), 2)
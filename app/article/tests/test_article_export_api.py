@@ -0,0 +1,173 @@
+"""
+Test for the article export api.
+"""
+import csv
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import jobs
+from core.models import Article, Job, Provider
+
+
+EXPORT_URL = reverse("article:article-export")
+EXPORT_JOB_URL = reverse("article:article-export-job")
+
+
+def create_many_articles(provider, number):
+    """Create a {number} of sample articles"""
+    for i in range(number):
+        Article.objects.create(
+            article_name=f"Article{i}", price=100 * (i + 1), provider_no=provider
+        )
+
+
+def read_body(res):
+    """Return the decoded body of a streaming response"""
+    return b"".join(res.streaming_content).decode()
+
+
+class ArticleExportApiTests(TestCase):
+    """Test the article export API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.provider = Provider.objects.create(provider_name="Provider1")
+
+    def test_export_ndjson(self):
+        """Test exporting articles as NDJSON by default"""
+        create_many_articles(self.provider, 3)
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertTrue(res["Content-Type"].startswith("application/x-ndjson"))
+        rows = [json.loads(line) for line in read_body(res).splitlines()]
+        expected = list(
+            Article.objects.order_by("-article_no").values(
+                "article_no", "article_name", "price", "provider_no"
+            )
+        )
+        self.assertEqual(rows, expected)
+
+    def test_export_csv(self):
+        """Test exporting articles as CSV"""
+        create_many_articles(self.provider, 3)
+
+        res = self.client.get(EXPORT_URL, {"format": "csv"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/csv"))
+        self.assertIn("articles.csv", res["Content-Disposition"])
+        rows = list(csv.reader(io.StringIO(read_body(res))))
+        self.assertEqual(
+            rows[0], ["article_no", "article_name", "price", "provider_no"]
+        )
+        self.assertEqual(len(rows), 4)
+
+    def test_export_csv_empty(self):
+        """Test exporting no articles still sends the CSV header"""
+        res = self.client.get(EXPORT_URL, {"format": "csv"})
+
+        self.assertEqual(
+            read_body(res).splitlines(), ["article_no,article_name,price,provider_no"]
+        )
+
+    def test_export_filters(self):
+        """Test the export honours the price and provider filters"""
+        provider2 = Provider.objects.create(provider_name="Provider2")
+        create_many_articles(self.provider, 5)
+        create_many_articles(provider2, 5)
+
+        res = self.client.get(
+            EXPORT_URL, {"min": 200, "max": 400, "pid": provider2.provider_no}
+        )
+
+        rows = [json.loads(line) for line in read_body(res).splitlines()]
+        self.assertEqual(len(rows), 3)
+        for row in rows:
+            self.assertEqual(row["provider_no"], provider2.provider_no)
+            self.assertTrue(200 <= row["price"] <= 400)
+
+    def test_export_unknown_format(self):
+        """Test an unsupported format is rejected"""
+        res = self.client.get(EXPORT_URL, {"format": "xml"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ArticleExportJobApiTests(TestCase):
+    """Test exporting articles in the background"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.provider = Provider.objects.create(provider_name="Provider1")
+        export_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(export_dir.cleanup)
+        self.export_dir = Path(export_dir.name)
+        settings = override_settings(ARTICLE_EXPORT_DIR=self.export_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_export_job(self):
+        """Test an export job writes the matching articles to a file"""
+        provider2 = Provider.objects.create(provider_name="Provider2")
+        create_many_articles(self.provider, 3)
+        create_many_articles(provider2, 2)
+
+        res = self.client.post(
+            f"{EXPORT_JOB_URL}?pid={self.provider.provider_no}",
+            {"format": "csv"},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data["name"], "export_articles")
+        self.assertTrue(res["Location"].endswith(f"/api/jobs/{res.data['id']}"))
+        self.assertEqual(jobs.work(once=True), 1)
+
+        job = Job.objects.get(pk=res.data["id"])
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.result["rows"], 3)
+        path = Path(job.result["path"])
+        self.assertEqual(path, self.export_dir / f"articles-{job.pk}.csv")
+        rows = list(csv.reader(io.StringIO(path.read_text())))
+        self.assertEqual(
+            rows[0], ["article_no", "article_name", "price", "provider_no"]
+        )
+        expected = Article.objects.filter(provider_no=self.provider).order_by(
+            "-article_no"
+        )
+        self.assertEqual(
+            [int(row[0]) for row in rows[1:]],
+            [article.article_no for article in expected],
+        )
+        self.assertEqual(list(self.export_dir.glob("*.part")), [])
+
+    def test_export_job_ndjson(self):
+        """Test export jobs write NDJSON by default"""
+        create_many_articles(self.provider, 2)
+
+        res = self.client.post(EXPORT_JOB_URL)
+        jobs.work(once=True)
+
+        job = Job.objects.get(pk=res.data["id"])
+        lines = Path(job.result["path"]).read_text().splitlines()
+        self.assertEqual([json.loads(line)["price"] for line in lines], [200, 100])
+
+    def test_export_job_invalid(self):
+        """Test invalid filters and formats are rejected before queuing"""
+        res = self.client.post(f"{EXPORT_JOB_URL}?min=5&max=1")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(EXPORT_JOB_URL, {"format": "xml"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Job.objects.exists())
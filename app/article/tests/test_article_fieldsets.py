@@ -0,0 +1,182 @@
+"""
+Test for article sparse fieldsets and provider expansion.
+"""
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Article, Provider
+
+
+ARTICLE_URL = reverse("article:article-list")
+ASYNC_ARTICLE_URL = reverse("article:article-async-list")
+
+
+def detail_url(article_id):
+    """Return article detail URL"""
+    return reverse("article:article-detail", args=[article_id])
+
+
+def async_detail_url(article_id):
+    """Return async article detail URL"""
+    return reverse("article:article-async-detail", args=[article_id])
+
+
+class ArticleFieldsetTests(TestCase):
+    """Test the fields and expand parameters of the article endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.provider1 = Provider.objects.create(provider_name="Provider1")
+        self.provider2 = Provider.objects.create(provider_name="Provider2")
+        for i in range(6):
+            Article.objects.create(
+                article_name=f"Article{i}",
+                price=100 * (i % 3),
+                provider_no=self.provider1 if i % 2 else self.provider2,
+            )
+        self.article = Article.objects.first()
+
+    def test_expand_provider_list(self):
+        """Test expand=provider inlines providers without extra queries"""
+        with self.assertNumQueries(2):
+            res = self.client.get(ARTICLE_URL, {"expand": "provider"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 6)
+        for article in res.data["results"]:
+            provider = Provider.objects.get(pk=article["provider_no"])
+            self.assertEqual(
+                article["provider"],
+                {
+                    "provider_no": provider.provider_no,
+                    "provider_name": provider.provider_name,
+                },
+            )
+
+    def test_expand_provider_detail(self):
+        """Test expand=provider on the article detail"""
+        with self.assertNumQueries(2):
+            res = self.client.get(
+                detail_url(self.article.article_no), {"expand": "provider"}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["provider"]["provider_name"],
+            self.article.provider_no.provider_name,
+        )
+
+    def test_sparse_fields(self):
+        """Test fields narrows the response and the selected columns"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ARTICLE_URL, {"fields": "article_no,price"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for article in res.data["results"]:
+            self.assertEqual(list(article), ["article_no", "price"])
+        self.assertNotIn("article_name", queries[-1]["sql"])
+
+        res = self.client.get(
+            detail_url(self.article.article_no), {"fields": "article_name"}
+        )
+
+        self.assertEqual(res.data, {"article_name": self.article.article_name})
+
+    def test_sparse_fields_paging(self):
+        """Test pages follow an ordering on fields left out of the response"""
+        seen = []
+        params = {"fields": "article_name", "min": 0, "page_size": 2}
+        res = self.client.get(ARTICLE_URL, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen += [article["article_name"] for article in res.data["results"]]
+            if not res.data["next"]:
+                break
+            res = self.client.get(res.data["next"])
+
+        expected = Article.objects.order_by("price", "article_no").values_list(
+            "article_name", flat=True
+        )
+        self.assertEqual(seen, list(expected))
+
+    def test_fields_and_expand(self):
+        """Test the provider expansion with a sparse fieldset"""
+        res = self.client.get(ARTICLE_URL, {"fields": "price", "expand": "provider"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for article in res.data["results"]:
+            self.assertEqual(list(article), ["price", "provider"])
+
+    def test_serializer_path_matches_fast_path(self):
+        """Test model instances render like the values() fast path"""
+        for params in [
+            {"expand": "provider"},
+            {"fields": "price,article_no"},
+            {"fields": "article_name", "expand": "provider", "ordering": "price"},
+        ]:
+            with self.subTest(params=params):
+                expected = self.client.get(ARTICLE_URL, params).json()
+                with override_settings(API_FAST_JSON=False, API_CACHE_ENABLED=False):
+                    with self.assertNumQueries(2):
+                        res = self.client.get(ARTICLE_URL, params)
+
+                self.assertEqual(res.json(), expected)
+
+    def test_invalid_parameters(self):
+        """Test unknown fields and expansions are rejected"""
+        for params in [{"fields": "article_no,secret"}, {"expand": "article"}]:
+            with self.subTest(params=params):
+                res = self.client.get(ARTICLE_URL, params)
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(list(params)[0], res.data)
+
+    def test_expanded_cache_tracks_providers(self):
+        """Test renaming a provider refreshes cached expanded responses"""
+        url = detail_url(self.article.article_no)
+        self.client.get(url, {"expand": "provider"})
+        provider = self.article.provider_no
+        provider.provider_name = "Renamed"
+        provider.save()
+
+        res = self.client.get(url, {"expand": "provider"})
+
+        self.assertEqual(res.data["provider"]["provider_name"], "Renamed")
+
+    def test_writes_ignore_fieldset(self):
+        """Test write responses keep every field"""
+        payload = {
+            "article_name": "New",
+            "price": 1,
+            "provider_no": self.provider1.provider_no,
+        }
+        res = self.client.post(
+            f"{ARTICLE_URL}?fields=price&expand=provider", payload, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            set(res.data), {"article_no", "article_name", "price", "provider_no"}
+        )
+
+    async def test_async_views(self):
+        """Test the async views answer like the sync ones"""
+        params = {"fields": "article_no,price", "expand": "provider"}
+        for url, sync_url in [
+            (ASYNC_ARTICLE_URL, ARTICLE_URL),
+            (
+                async_detail_url(self.article.article_no),
+                detail_url(self.article.article_no),
+            ),
+        ]:
+            with self.subTest(url=url):
+                res = await self.async_client.get(url, params)
+                expected = await self.async_client.get(sync_url, params)
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(res.json(), expected.json())
@@ -0,0 +1,303 @@
+"""
+Test for the article filter engine.
+"""
+from unittest.mock import patch
+
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.pagination import Cursor
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.models import Article, Provider
+
+from article.filters import ArticleFilter, prefix_upper_bound
+from article.pagination import ArticleCursorPagination
+
+
+ARTICLE_URL = reverse("article:article-list")
+PRICE_FILTER_URL = reverse("article:price-filter-list")
+PROVIDER_FILTER_URL = reverse("article:provider-filter-list")
+EXPORT_URL = reverse("article:article-export")
+
+
+def article_numbers(res):
+    """Return the article numbers of a list response"""
+    return [article["article_no"] for article in res.data["results"]]
+
+
+def planned_query(params, position=None):
+    """Return the page query the article list runs for `params`"""
+    request = Request(APIRequestFactory().get(ARTICLE_URL, params))
+    backend = ArticleFilter()
+    queryset = backend.filter_queryset(request, Article.objects.all(), None)
+    if position is not None:
+        ordering = backend.get_ordering(request, queryset, None)
+        queryset = queryset.filter(ArticleCursorPagination.after(ordering, position))
+    return queryset.values("article_no", "article_name", "price", "provider_no")[:101]
+
+
+def explain(queryset):
+    """Return the query plan of `queryset`, preferring indexes on PostgreSQL"""
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+
+class ArticleFilterTests(TestCase):
+    """Test filtering the article list"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.provider1 = Provider.objects.create(provider_name="Provider1")
+        self.provider2 = Provider.objects.create(provider_name="Provider2")
+        self.provider3 = Provider.objects.create(provider_name="Provider3")
+        for name, price, provider in [
+            ("Apple", 0, self.provider1),
+            ("Apricot", 100, self.provider1),
+            ("Banana", 100, self.provider2),
+            ("apple", 200, self.provider2),
+            ("Cherry", 300, self.provider3),
+        ]:
+            Article.objects.create(article_name=name, price=price, provider_no=provider)
+
+    def test_min_price_zero(self):
+        """Test min=0 is applied rather than ignored"""
+        Article.objects.filter(article_name="Apple").update(price=-5)
+
+        res = self.client.get(ARTICLE_URL, {"min": 0})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 4)
+
+    def test_max_price_zero(self):
+        """Test max=0 is applied rather than ignored"""
+        res = self.client.get(ARTICLE_URL, {"max": 0})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_price_range_ordered_by_price(self):
+        """Test a price range defaults to price order with article_no ties"""
+        res = self.client.get(ARTICLE_URL, {"min": 100, "max": 300})
+
+        expected = Article.objects.filter(price__gte=100, price__lte=300).order_by(
+            "price", "article_no"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            article_numbers(res), [article.article_no for article in expected]
+        )
+
+    def test_several_providers(self):
+        """Test filtering by repeated and comma separated provider ids"""
+        ids = [self.provider1.provider_no, self.provider3.provider_no]
+
+        repeated = self.client.get(ARTICLE_URL, {"pid": ids})
+        separated = self.client.get(ARTICLE_URL, {"pid": ",".join(map(str, ids))})
+
+        expected = Article.objects.filter(provider_no__in=ids).order_by("-article_no")
+        self.assertEqual(repeated.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            article_numbers(repeated), [article.article_no for article in expected]
+        )
+        self.assertEqual(article_numbers(separated), article_numbers(repeated))
+
+    def test_name_prefix(self):
+        """Test the name prefix is case sensitive and ordered by name"""
+        res = self.client.get(ARTICLE_URL, {"name": "Ap"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [article["article_name"] for article in res.data["results"]],
+            ["Apple", "Apricot"],
+        )
+
+    def test_name_prefix_punctuation(self):
+        """Test the name prefix keeps matches sorted apart by locale rules"""
+        for name in ["a-c", "a.b", "ab", "A-d"]:
+            Article.objects.create(
+                article_name=name, price=1, provider_no=self.provider1
+            )
+
+        res = self.client.get(ARTICLE_URL, {"name": "a-"})
+
+        self.assertEqual(
+            [article["article_name"] for article in res.data["results"]], ["a-c"]
+        )
+
+    def test_combined_filters(self):
+        """Test provider, price and name filters are combined"""
+        res = self.client.get(
+            ARTICLE_URL,
+            {"pid": self.provider1.provider_no, "min": 50, "name": "A"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [article["article_name"] for article in res.data["results"]], ["Apricot"]
+        )
+
+    def test_invalid_parameters(self):
+        """Test malformed filters are rejected instead of ignored"""
+        for params in [
+            {"min": "abc"},
+            {"max": "1.5"},
+            {"min": 300, "max": 100},
+            {"pid": "1,x"},
+            {"pid": ","},
+            {"name": "A" * 256},
+            {"ordering": "provider_no"},
+        ]:
+            with self.subTest(params=params):
+                res = self.client.get(ARTICLE_URL, params)
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ordering_not_served_by_index(self):
+        """Test orderings the filters' index cannot serve are rejected"""
+        res = self.client.get(ARTICLE_URL, {"min": 100, "ordering": "-article_no"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("ordering", res.data)
+
+    def test_price_ordering_pages_with_ties(self):
+        """Test walking price ordered pages visits every article once"""
+        for i in range(7):
+            Article.objects.create(
+                article_name=f"Tie{i}", price=100, provider_no=self.provider3
+            )
+
+        pages = [self.client.get(ARTICLE_URL, {"ordering": "-price", "page_size": 2})]
+        while pages[-1].data["next"]:
+            pages.append(self.client.get(pages[-1].data["next"]))
+        seen = [number for page in pages for number in article_numbers(page)]
+
+        expected = Article.objects.order_by("-price", "-article_no")
+        self.assertEqual(seen, [article.article_no for article in expected])
+
+        previous = self.client.get(pages[2].data["previous"])
+        self.assertEqual(article_numbers(previous), article_numbers(pages[1]))
+
+    def test_tampered_cursor_position(self):
+        """Test a cursor with a malformed position returns 404"""
+        paginator = ArticleCursorPagination()
+        paginator.base_url = "http://testserver" + ARTICLE_URL + "?ordering=price"
+        url = paginator.encode_cursor(
+            Cursor(offset=0, reverse=False, position='["x",1]')
+        )
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_no_distinct(self):
+        """Test filtered lists are not de-duplicated with DISTINCT"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(ARTICLE_URL, {"pid": self.provider1.provider_no})
+
+        self.assertFalse(
+            any("DISTINCT" in query["sql"].upper() for query in queries.captured_queries)
+        )
+
+    def test_deprecated_aliases(self):
+        """Test the old filter routes answer like the article list"""
+        params = {"min": 100, "pid": self.provider2.provider_no}
+
+        expected = self.client.get(ARTICLE_URL, params)
+        for url in [PRICE_FILTER_URL, PROVIDER_FILTER_URL]:
+            with self.subTest(url=url):
+                res = self.client.get(url, params)
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(res.data["results"], expected.data["results"])
+
+    def test_export_filtered(self):
+        """Test the export applies the same filters and ordering"""
+        res = self.client.get(EXPORT_URL, {"name": "A"}, HTTP_ACCEPT="text/csv")
+
+        content = b"".join(res.streaming_content).decode()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [line.split(",")[1] for line in content.splitlines()[1:]],
+            ["Apple", "Apricot"],
+        )
+
+    def test_prefix_upper_bound(self):
+        """Test the exclusive upper bound of name prefixes"""
+        self.assertEqual(prefix_upper_bound("Ap"), "Aq")
+        self.assertEqual(prefix_upper_bound("a\U0010ffff"), "b")
+        self.assertIsNone(prefix_upper_bound("\U0010ffff"))
+        self.assertEqual(prefix_upper_bound("a\ud7ff"), "a\ue000")
+
+    def test_name_compared_bytewise(self):
+        """Test name prefixes and orderings compare names bytewise"""
+        collation = {"postgresql": '"C"', "sqlite": '"BINARY"'}[connection.vendor]
+
+        sql = str(planned_query({"name": "a-", "ordering": "-article_name"}).query)
+
+        self.assertEqual(sql.count(f"COLLATE {collation}"), 3)
+        self.assertNotIn("LIKE", sql)
+
+    def test_name_ordering_pages(self):
+        """Test name ordered pages follow each other with the bytewise cursor"""
+        for name in ["apple", "Banana", "apricot", "Zucchini"]:
+            Article.objects.create(
+                article_name=name, price=1, provider_no=self.provider1
+            )
+        expected = sorted(Article.objects.values_list("article_name", flat=True))
+
+        names, url = [], ARTICLE_URL
+        params = {"ordering": "article_name", "page_size": 2}
+        while url:
+            res = self.client.get(url, params)
+            names.extend(article["article_name"] for article in res.data["results"])
+            url, params = res.data["next"], None
+
+        self.assertEqual(names, expected)
+
+
+class ArticleFilterPlanTests(TestCase):
+    """Test the filter engine only emits queries served by indexes"""
+
+    SHAPES = [
+        {},
+        {"ordering": "price"},
+        {"ordering": "-article_name"},
+        {"pid": 1},
+        {"pid": 1, "ordering": "article_no"},
+        {"min": 10, "max": 20},
+        {"min": 10, "ordering": "-price"},
+        {"name": "Art"},
+        {"name": "Art", "min": 10},
+        {"pid": 1, "min": 10, "name": "Art"},
+    ]
+
+    def assert_served_by_index(self, params, position=None):
+        """Assert the page query for `params` needs no sort or table scan"""
+        plan = explain(planned_query(params, position))
+        if connection.vendor == "postgresql":
+            self.assertNotIn("Seq Scan", plan)
+            self.assertNotIn("Sort", plan)
+        elif connection.vendor == "sqlite":
+            self.assertNotIn("TEMP B-TREE", plan)
+            if set(params) - {"ordering"}:
+                self.assertIn("SEARCH", plan)
+
+    def test_query_plans(self):
+        """Test every supported filter and ordering shape uses an index"""
+        for params in self.SHAPES:
+            with self.subTest(params=params):
+                self.assert_served_by_index(params)
+
+    def test_query_plans_past_cursor(self):
+        """Test the keyset condition of later pages keeps using the index"""
+        self.assert_served_by_index({"ordering": "price"}, position=[10, 5])
+        self.assert_served_by_index({"pid": 1}, position=[5])
+        self.assert_served_by_index({"name": "Art"}, position=["Art1", 10, 1])
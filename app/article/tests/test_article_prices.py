@@ -0,0 +1,177 @@
+"""
+Test for the article price distribution endpoint.
+"""
+import random
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Article, Provider
+
+from article import prices
+
+
+PRICES_URL = reverse("article:article-prices")
+
+
+def create_articles(provider, values):
+    """Create one article per price in `values`"""
+    Article.objects.bulk_create(
+        Article(article_name=f"Article{i}", price=price, provider_no=provider)
+        for i, price in enumerate(values)
+    )
+
+
+class PriceDistributionTests(TestCase):
+    """Test the price histogram and percentiles"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.provider1 = Provider.objects.create(provider_name="Provider1")
+        self.provider2 = Provider.objects.create(provider_name="Provider2")
+        create_articles(self.provider1, range(1, 101))
+        create_articles(self.provider2, [1000, 1000, 2000])
+
+    def test_distribution(self):
+        """Test the figures of one provider"""
+        res = self.client.get(
+            PRICES_URL,
+            {"pid": self.provider1.provider_no, "buckets": 4, "percentiles": "50,90"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 100)
+        self.assertEqual(res.data["min"], 1)
+        self.assertEqual(res.data["max"], 100)
+        self.assertEqual(res.data["mean"], 50.5)
+        self.assertEqual(
+            res.data["percentiles"],
+            [{"percentile": 50, "value": 50.5}, {"percentile": 90, "value": 90.1}],
+        )
+        self.assertEqual(
+            res.data["histogram"],
+            [
+                {"lower": 1, "upper": 25.75, "count": 25},
+                {"lower": 25.75, "upper": 50.5, "count": 25},
+                {"lower": 50.5, "upper": 75.25, "count": 25},
+                {"lower": 75.25, "upper": 100, "count": 25},
+            ],
+        )
+
+    def test_all_providers(self):
+        """Test every article is counted without a provider filter"""
+        res = self.client.get(PRICES_URL, {"buckets": 2})
+
+        self.assertEqual(res.data["count"], 103)
+        self.assertEqual(res.data["max"], 2000)
+        self.assertEqual([b["count"] for b in res.data["histogram"]], [102, 1])
+
+    def test_single_price(self):
+        """Test a single distinct price makes a single bucket"""
+        provider = Provider.objects.create(provider_name="Provider3")
+        create_articles(provider, [7, 7])
+
+        res = self.client.get(PRICES_URL, {"pid": provider.provider_no})
+
+        self.assertEqual(
+            res.data["histogram"], [{"lower": 7, "upper": 7, "count": 2}]
+        )
+        self.assertEqual({p["value"] for p in res.data["percentiles"]}, {7.0})
+
+    def test_no_articles(self):
+        """Test the distribution of providers without articles"""
+        res = self.client.get(PRICES_URL, {"pid": 9999})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 0)
+        self.assertIsNone(res.data["min"])
+        self.assertEqual(res.data["histogram"], [])
+
+    def test_invalid_parameters(self):
+        """Test invalid parameters are rejected"""
+        for params in [
+            {"buckets": 0},
+            {"buckets": prices.MAX_BUCKETS + 1},
+            {"percentiles": "50,101"},
+            {"percentiles": "x"},
+            {"pid": "a"},
+        ]:
+            with self.subTest(params=params):
+                res = self.client.get(PRICES_URL, params)
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cached_on_table_version(self):
+        """Test the distribution is cached until articles change"""
+        self.client.get(PRICES_URL)
+        with self.assertNumQueries(1):
+            self.client.get(PRICES_URL)
+
+        Article.objects.create(
+            article_name="New", price=3000, provider_no=self.provider2
+        )
+        res = self.client.get(PRICES_URL)
+
+        self.assertEqual(res.data["count"], 104)
+
+
+class PriceComputationTests(TestCase):
+    """Test the implementations of the price distribution agree"""
+
+    buckets = 13
+    percentiles = [0, 12.5, 50, 99, 100]
+
+    def setUp(self):
+        provider = Provider.objects.create(provider_name="Random")
+        rng = random.Random(7)
+        create_articles(provider, [rng.randint(-50, 5000) for _ in range(997)])
+        self.prices = Article.objects.values_list("price", flat=True)
+
+    def compute(self, compute):
+        return compute(self.prices, self.buckets, self.percentiles)
+
+    def assertSameStats(self, result, expected):
+        self.assertEqual(result["count"], expected["count"])
+        self.assertEqual(result["histogram"], expected["histogram"])
+        self.assertAlmostEqual(result["mean"], expected["mean"])
+        for got, want in zip(result["percentiles"], expected["percentiles"]):
+            self.assertEqual(got["percentile"], want["percentile"])
+            self.assertAlmostEqual(got["value"], want["value"])
+
+    def test_python(self):
+        """Test the pure Python computation against a row by row one"""
+        values = sorted(self.prices)
+        low, high = values[0], values[-1]
+        counts = [0] * self.buckets
+        for value in values:
+            index = (value - low) * self.buckets // (high - low)
+            counts[min(index, self.buckets - 1)] += 1
+
+        with mock.patch.object(prices, "numpy", None):
+            result = self.compute(prices.python_stats)
+
+        self.assertEqual([b["count"] for b in result["histogram"]], counts)
+        self.assertEqual(result["percentiles"][0]["value"], low)
+        self.assertEqual(result["percentiles"][2]["value"], values[498])
+        self.assertEqual(result["percentiles"][-1]["value"], high)
+
+    @skipUnless(prices.numpy, "NumPy is not installed")
+    def test_numpy(self):
+        """Test the NumPy computation matches the pure Python one"""
+        with mock.patch.object(prices, "numpy", None):
+            expected = self.compute(prices.python_stats)
+
+        self.assertSameStats(self.compute(prices.python_stats), expected)
+
+    @skipUnless(connection.vendor == "postgresql", "Needs PostgreSQL")
+    def test_database(self):
+        """Test the PostgreSQL computation matches the Python one"""
+        with mock.patch.object(prices, "numpy", None):
+            expected = self.compute(prices.python_stats)
+
+        self.assertSameStats(self.compute(prices.database_stats), expected)
@@ -0,0 +1,143 @@
+"""
+Test for the article search endpoint.
+"""
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.models import Article, Provider
+
+from article.search import ArticleSearchFilter
+
+
+SEARCH_URL = reverse("article:article-search")
+
+
+def names(res):
+    """Return the article names of a search response"""
+    return [article["article_name"] for article in res.json()["results"]]
+
+
+class ArticleSearchTests(TestCase):
+    """Test searching articles by name"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.provider1 = Provider.objects.create(provider_name="Provider1")
+        self.provider2 = Provider.objects.create(provider_name="Provider2")
+        for name, price, provider in [
+            ("Red apple", 10, self.provider1),
+            ("Green apple juice", 20, self.provider1),
+            ("Pineapple", 30, self.provider2),
+            ("Apple red", 40, self.provider2),
+            ("Banana", 50, self.provider2),
+        ]:
+            Article.objects.create(article_name=name, price=price, provider_no=provider)
+
+    def test_search(self):
+        """Test names with a word starting with every word of q match"""
+        res = self.client.get(SEARCH_URL, {"q": "APP red"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(names(res)), {"Red apple", "Apple red"})
+        self.assertEqual(
+            set(res.json()["results"][0]),
+            {"article_no", "article_name", "price", "provider_no", "rank"},
+        )
+
+    def test_ranking(self):
+        """Test word prefix matches rank first"""
+        res = self.client.get(SEARCH_URL, {"q": "apple"})
+
+        ranks = [article["rank"] for article in res.json()["results"]]
+        self.assertEqual(
+            set(names(res)[:3]), {"Red apple", "Green apple juice", "Apple red"}
+        )
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+
+    def test_filters(self):
+        """Test the price range and provider filters apply to the search"""
+        res = self.client.get(
+            SEARCH_URL, {"q": "apple", "pid": self.provider2.provider_no, "min": 35}
+        )
+
+        self.assertEqual(names(res), ["Apple red"])
+
+    def test_pages(self):
+        """Test paging through matches of equal rank"""
+        Article.objects.bulk_create(
+            Article(article_name=f"Pear {i}", price=i, provider_no=self.provider1)
+            for i in range(7)
+        )
+
+        res = self.client.get(SEARCH_URL, {"q": "pear", "page_size": 3})
+        pages = [res.json()]
+        while pages[-1]["next"]:
+            pages.append(self.client.get(pages[-1]["next"]).json())
+
+        self.assertEqual(len(pages), 3)
+        article_nos = [a["article_no"] for page in pages for a in page["results"]]
+        self.assertEqual(article_nos, sorted(article_nos, reverse=True))
+        self.assertEqual(len(set(article_nos)), 7)
+
+    def test_no_match(self):
+        """Test a query without a matching word matches nothing"""
+        for q in ["zucchini", "!?"]:
+            with self.subTest(q=q):
+                res = self.client.get(SEARCH_URL, {"q": q})
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(res.json()["results"], [])
+
+    def test_invalid_query(self):
+        """Test a missing, blank or too long q is rejected"""
+        for params in [
+            {},
+            {"q": "  "},
+            {"q": "a" * 256},
+            {"q": "apple", "min": "x"},
+        ]:
+            with self.subTest(params=params):
+                res = self.client.get(SEARCH_URL, params)
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cached_on_table_version(self):
+        """Test results are cached until articles change"""
+        self.client.get(SEARCH_URL, {"q": "banana"})
+        with self.assertNumQueries(1):
+            self.client.get(SEARCH_URL, {"q": "banana"})
+
+        Article.objects.create(
+            article_name="Banana split", price=60, provider_no=self.provider1
+        )
+        res = self.client.get(SEARCH_URL, {"q": "banana"})
+
+        self.assertEqual(len(names(res)), 2)
+
+    @skipUnless(connection.vendor == "postgresql", "Needs PostgreSQL")
+    def test_typo(self):
+        """Test trigram similarity matches names with a typo"""
+        res = self.client.get(SEARCH_URL, {"q": "bananna"})
+
+        self.assertEqual(names(res), ["Banana"])
+
+    @skipUnless(connection.vendor == "postgresql", "Needs PostgreSQL")
+    def test_index_scan(self):
+        """Test the search is served by the name indexes"""
+        request = Request(APIRequestFactory().get(SEARCH_URL, {"q": "apple"}))
+        queryset = ArticleSearchFilter().filter_queryset(
+            request, Article.objects.all(), None
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = queryset.explain()
+
+        self.assertIn("article_search_idx", plan)
+        self.assertIn("article_name_trgm_idx", plan)
@@ -4,7 +4,7 @@ URL mappings for the article app.
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from article import views
+from article import async_views, views
 
 router = DefaultRouter()
 router.register("", views.ArticleViewSet)
@@ -14,5 +14,11 @@ router.register("articles/provider", views.ProviderFilterViewSet, basename="prov
 app_name = "article"
 
 urlpatterns = [
+    path("async/", async_views.ArticleReadView.as_view(), name="article-async-list"),
+    path(
+        "async/<int:pk>/",
+        async_views.ArticleReadView.as_view(),
+        name="article-async-detail",
+    ),
     path("", include(router.urls)),
 ]
@@ -3,96 +3,380 @@ views for the article API.
 """
 from drf_spectacular.utils import (
     extend_schema,
+    extend_schema_view,
     OpenApiParameter,
     OpenApiTypes,
 )
-from rest_framework import viewsets, mixins
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
 
-from core.models import Article
-from article import serializers
+from core import jobs
+from core.cache import CachedListMixin, CachedResponseMixin
+from core.mixins import FastListMixin
+from core.models import Article, Provider
+from core.renderers import FastJSONRenderer
+from core.views import JobSerializer
+from article import bulk, prices, serializers
+from article.fieldsets import EXPANSIONS, FIELDS, Fieldset
+from article.parsers import NDJSONParser
+from article.pagination import ArticleCursorPagination
+from article.filters import ORDERINGS, ArticleFilter
+from article.search import ArticleSearchFilter, ArticleSearchPagination
+from article.export import STREAMS, export_rows
+from article.renderers import CSVRenderer, NDJSONRenderer
+
+FILTER_PARAMETERS = [
+    OpenApiParameter(
+        "min",
+        OpenApiTypes.INT,
+        description="Minimum price of the article.",
+    ),
+    OpenApiParameter(
+        "max",
+        OpenApiTypes.INT,
+        description="Maximum price of the article.",
+    ),
+    OpenApiParameter(
+        "pid",
+        OpenApiTypes.INT,
+        many=True,
+        explode=True,
+        description=(
+            "id of the provider, repeat the parameter or separate ids with "
+            "commas to match several providers."
+        ),
+    ),
+    OpenApiParameter(
+        "name",
+        OpenApiTypes.STR,
+        description="Prefix of the article name (case sensitive).",
+    ),
+    OpenApiParameter(
+        "ordering",
+        OpenApiTypes.STR,
+        enum=list(ORDERINGS),
+        description=(
+            "Sort order. With a provider filter only article_no orderings are "
+            "allowed, with a name prefix only article_name orderings and with a "
+            "price range only price orderings. Defaults to the first of these, "
+            "or -article_no without filters."
+        ),
+    ),
+]
+
+FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        "fields",
+        OpenApiTypes.STR,
+        description=(
+            "Comma separated fields to return, all by default. One of: "
+            f"{', '.join(FIELDS)}."
+        ),
+    ),
+    OpenApiParameter(
+        "expand",
+        OpenApiTypes.STR,
+        enum=EXPANSIONS,
+        description="Inline the provider object of every article.",
+    ),
+]
+
+
+class FieldsetMixin:
+    """Serve `list` and `retrieve` in the fieldset of the request."""
+
+    fieldset_actions = ("list", "retrieve")
+
+    def get_fieldset(self):
+        """Return the fields and expansions of the response."""
+        if self.action not in self.fieldset_actions:
+            return Fieldset()
+        return Fieldset.from_request(self.request)
+
+    def get_cache_models(self):
+        if "provider" in self.get_fieldset().expand:
+            return (*self.cache_models, Provider)
+        return self.cache_models
+
+    def filter_queryset(self, queryset):
+        return self.get_fieldset().only(super().filter_queryset(queryset))
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self.get_fieldset().serializer_kwargs)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_fast_list_fields(self, queryset):
+        return self.get_fieldset().columns(queryset.query.order_by)
+
+    def get_fast_list_data(self, rows):
+        return self.get_fieldset().shape(rows)
 
 
 @extend_schema(tags=["article"])
-class ArticleViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(parameters=FILTER_PARAMETERS + FIELDSET_PARAMETERS),
+    retrieve=extend_schema(parameters=FIELDSET_PARAMETERS),
+)
+class ArticleViewSet(
+    FieldsetMixin, CachedResponseMixin, FastListMixin, viewsets.ModelViewSet
+):
     """View for managing article API."""
 
     serializer_class = serializers.ArticleSerializer
     queryset = Article.objects.all().order_by("-article_no")
+    pagination_class = ArticleCursorPagination
+    filter_backends = [ArticleFilter]
+    cache_models = (Article,)
+    fast_list_fields = serializers.ArticleSerializer.Meta.fields
 
+    def is_upsert(self):
+        """Return whether the client asked for upsert semantics."""
+        value = self.request.query_params.get("upsert", "")
+        return value.lower() in ("1", "true", "yes")
 
-@extend_schema(
-    tags=["article"],
-    parameters=[
-        OpenApiParameter(
-            "min",
-            OpenApiTypes.INT,
-            description="Minimum price of the article.",
-        ),
-        OpenApiParameter(
-            "max",
-            OpenApiTypes.INT,
-            description="Maximum price of the article.",
-        ),
-    ],
-)
-class PriceFilterViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
-    """View for managing price filter of article API."""
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "upsert",
+                OpenApiTypes.BOOL,
+                description=(
+                    "Insert with ON CONFLICT DO NOTHING and return the existing "
+                    "article (200) instead of failing on duplicates."
+                ),
+            ),
+        ],
+    )
+    def create(self, request, *args, **kwargs):
+        """Create an article, optionally with upsert semantics."""
+        if not self.is_upsert():
+            return super().create(request, *args, **kwargs)
 
-    serializer_class = serializers.ArticleSerializer
-    queryset = Article.objects.all()
-
-    def get_queryset(self):
-        """Return the articles that match the filter price."""
-        queryset = self.queryset
-        min_price = self.request.query_params.get("min")
-        max_price = self.request.query_params.get("max")
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        article, created = Article.objects.upsert(**serializer.validated_data)
+        return Response(
+            self.get_serializer(article).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
 
-        # Convert min_price and max_price to integers if they exist
+    def get_bulk_chunk_size(self):
+        """Return the chunk size requested by the client, within limits."""
+        chunk_size = self.request.query_params.get("chunk_size")
+        if chunk_size is None:
+            return settings.ARTICLE_BULK_CHUNK_SIZE
         try:
-            min_price = int(min_price) if min_price else None
-            max_price = int(max_price) if max_price else None
+            chunk_size = int(chunk_size)
         except ValueError:
-            min_price = None
-            max_price = None
-
-        # Apply price filter
-        if min_price and max_price:
-            queryset = queryset.filter(price__range=(min_price, max_price))
-        elif min_price:
-            queryset = queryset.filter(price__gte=min_price)
-        elif max_price:
-            queryset = queryset.filter(price__lte=max_price)
-
-        return queryset.order_by("-article_no").distinct()
-
-
-@extend_schema(
-    tags=["article"],
-    parameters=[
-        OpenApiParameter(
-            "pid",
-            OpenApiTypes.INT,
-            description="id of the article.",
-        ),
-    ],
-)
-class ProviderFilterViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
-    """View for managing article filter of article API."""
+            raise ValidationError({"chunk_size": ["A valid integer is required."]})
+        if chunk_size < 1:
+            raise ValidationError({"chunk_size": ["Must be a positive integer."]})
+        return min(chunk_size, settings.ARTICLE_BULK_MAX_CHUNK_SIZE)
+
+    @extend_schema(
+        request=serializers.ArticleBulkSerializer(many=True),
+        responses=serializers.ArticleBulkResultSerializer,
+        parameters=[
+            OpenApiParameter(
+                "chunk_size",
+                OpenApiTypes.INT,
+                description="Number of rows written per batch.",
+            ),
+            OpenApiParameter(
+                "upsert",
+                OpenApiTypes.BOOL,
+                description="Skip existing articles instead of reporting them (POST).",
+            ),
+        ],
+    )
+    @action(
+        detail=False,
+        methods=["post", "put", "delete"],
+        url_path="bulk",
+        url_name="bulk",
+        parser_classes=[JSONParser, NDJSONParser],
+    )
+    def bulk_write(self, request):
+        """Create (POST), update (PUT) or delete (DELETE) many articles."""
+        rows = request.data
+        if not isinstance(rows, list):
+            raise ValidationError({"non_field_errors": ["Expected a list of items."]})
+
+        chunk_size = self.get_bulk_chunk_size()
+        if request.method == "POST":
+            result = bulk.bulk_create(rows, chunk_size, upsert=self.is_upsert())
+        elif request.method == "PUT":
+            result = bulk.bulk_update(rows, chunk_size)
+        else:
+            result = bulk.bulk_delete(rows, chunk_size)
+
+        if result.errors and not result.written:
+            return Response(result.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+        return Response(result.as_dict(), status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=FILTER_PARAMETERS,
+        responses={
+            (200, NDJSONRenderer.media_type): OpenApiTypes.STR,
+            (200, CSVRenderer.media_type): OpenApiTypes.STR,
+        },
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        url_name="export",
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def export(self, request):
+        """Stream every matching article as NDJSON (default) or CSV."""
+        queryset = self.filter_queryset(Article.objects.all())
+        rows = export_rows(queryset, settings.ARTICLE_EXPORT_CHUNK_SIZE)
+
+        renderer = request.accepted_renderer
+        stream = STREAMS[renderer.format](rows, settings.ARTICLE_EXPORT_CHUNK_SIZE)
+        response = StreamingHttpResponse(
+            stream, content_type=f"{renderer.media_type}; charset={renderer.charset}"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="articles.{renderer.format}"'
+        )
+        return response
+
+    @extend_schema(
+        parameters=FILTER_PARAMETERS,
+        request=serializers.ArticleExportJobSerializer,
+        responses={202: JobSerializer},
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="export/jobs",
+        url_name="export-job",
+    )
+    def export_job(self, request):
+        """Export every matching article to a file in the background."""
+        ArticleFilter().get_params(request)
+        serializer = serializers.ArticleExportJobSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = jobs.enqueue(
+            "export_articles",
+            query=request.query_params.urlencode(),
+            format=serializer.validated_data["format"],
+        )
+        location = reverse("job-detail", kwargs={"job_id": job.pk}, request=request)
+        return Response(
+            JobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": location},
+        )
+
+    @extend_schema(
+        responses=prices.PriceStatsSerializer,
+        parameters=[
+            OpenApiParameter(
+                "pid",
+                OpenApiTypes.INT,
+                many=True,
+                explode=True,
+                description="Only count the articles of these providers.",
+            ),
+            OpenApiParameter(
+                "buckets",
+                OpenApiTypes.INT,
+                description=(
+                    f"Number of equal width histogram buckets between the min "
+                    f"and max price, {prices.DEFAULT_BUCKETS} by default."
+                ),
+            ),
+            OpenApiParameter(
+                "percentiles",
+                OpenApiTypes.STR,
+                description=(
+                    "Comma separated percentiles between 0 and 100, "
+                    f"{','.join(map(str, prices.DEFAULT_PERCENTILES))} by default."
+                ),
+            ),
+        ],
+    )
+    @action(detail=False, methods=["get"], url_path="prices", url_name="prices")
+    def price_distribution(self, request):
+        """Return the price histogram and percentiles of the articles."""
+        return self.cached_response(self.get_price_stats, request)
+
+    def get_price_stats(self, request):
+        """Compute the price distribution asked for by `request`."""
+        params = prices.price_stats_params(request)
+        queryset = Article.objects.all()
+        if "pid" in params:
+            queryset = queryset.filter(provider_no__in=params["pid"])
+        return Response(
+            prices.price_stats(queryset, params["buckets"], params["percentiles"])
+        )
+
+    @extend_schema(
+        responses=serializers.ArticleSearchResultSerializer(many=True),
+        parameters=[
+            OpenApiParameter(
+                "q",
+                OpenApiTypes.STR,
+                required=True,
+                description=(
+                    "Words to look for in article names. Names with a word "
+                    "starting with every word of q, or close to q, match."
+                ),
+            ),
+            *[param for param in FILTER_PARAMETERS if param.name != "ordering"],
+        ],
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="search",
+        url_name="search",
+        filter_backends=[ArticleSearchFilter],
+        pagination_class=ArticleSearchPagination,
+        renderer_classes=[FastJSONRenderer, BrowsableAPIRenderer],
+    )
+    def search(self, request):
+        """Return the articles whose name matches q, best matches first."""
+        return self.cached_response(self.get_search_response, request)
+
+    def get_search_response(self, request):
+        """Run the search asked for by `request`."""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset.values(*FIELDS, "rank"))
+        return self.get_paginated_response(page)
+
+
+class ArticleFilterViewSet(
+    FieldsetMixin,
+    CachedListMixin,
+    FastListMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Deprecated list-only alias of the article list and its filters."""
 
     serializer_class = serializers.ArticleSerializer
     queryset = Article.objects.all()
+    pagination_class = ArticleCursorPagination
+    filter_backends = [ArticleFilter]
+    cache_models = (Article,)
+    fast_list_fields = serializers.ArticleSerializer.Meta.fields
 
-    def get_queryset(self):
-        """Return the articles by a given provider."""
-        queryset = self.queryset
-        p_id = self.request.query_params.get("pid")
 
-        try:
-            p_id = int(p_id) if p_id else None
-        except ValueError:
-            p_id = None
+@extend_schema(tags=["article"], parameters=FILTER_PARAMETERS, deprecated=True)
+class PriceFilterViewSet(ArticleFilterViewSet):
+    """View for managing price filter of article API, use the article list."""
 
-        if p_id:
-            queryset = queryset.filter(provider_no=p_id)
 
-        return queryset.order_by("-article_no").distinct()
+@extend_schema(tags=["article"], parameters=FILTER_PARAMETERS, deprecated=True)
+class ProviderFilterViewSet(ArticleFilterViewSet):
+    """View for managing article filter of article API, use the article list."""
@@ -0,0 +1,189 @@
+"""
+Benchmark of the sync (WSGI) and async (ASGI) read paths.
+
+Drives the Django request handlers in process, without sockets, from a
+few hundred concurrent client coroutines that each send requests back to
+back, and reports throughput and latency percentiles per mode:
+
+* wsgi: the DRF views through `WSGIHandler`, on a pool of `--threads`
+  worker threads like a threaded WSGI server;
+* asgi-sync: the same DRF views through `ASGIHandler`, which runs them
+  in a thread per request;
+* asgi-async: the async views through `ASGIHandler`.
+
+Latency includes the time a request waits for a free worker. Response
+caching is disabled so every request reaches the database. Needs a
+migrated database with articles, e.g. loaded with `import_articles`.
+
+Run from the app directory:
+
+    python -m benchmarks.async_views --concurrency 300 --requests 6000
+"""
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+MODES = ("wsgi", "asgi-sync", "asgi-async")
+
+HOST = "localhost"
+
+
+def percentile(values, pct):
+    """Return the `pct` percentile of sorted `values`."""
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+def wsgi_call(application, path, query):
+    """Run one GET through a WSGI application and return its status code."""
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "SCRIPT_NAME": "",
+        "SERVER_NAME": HOST,
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": HOST,
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": io.StringIO(),
+        "wsgi.url_scheme": "http",
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+        "wsgi.version": (1, 0),
+    }
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split(" ", 1)[0]))
+
+    response = application(environ, start_response)
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return statuses[0]
+
+
+async def asgi_call(application, path, query):
+    """Run one GET through an ASGI application and return its status code."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"host", HOST.encode())],
+        "server": (HOST, 80),
+        "client": ("127.0.0.1", 0),
+    }
+    statuses = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    await application(scope, receive, send)
+    return statuses[0]
+
+
+async def run_mode(mode, args, wsgi_app, asgi_app):
+    """Send `args.requests` requests from `args.concurrency` clients."""
+    path = args.async_path if mode == "asgi-async" else args.path
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=args.threads)
+    remaining = args.requests
+    latencies = []
+    errors = 0
+
+    async def request():
+        if mode == "wsgi":
+            return await loop.run_in_executor(
+                pool, wsgi_call, wsgi_app, path, args.query
+            )
+        return await asgi_call(asgi_app, path, args.query)
+
+    async def client():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            status = await request()
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    pool.shutdown()
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "max": latencies[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=300)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument(
+        "--threads", type=int, default=8, help="Worker threads of the WSGI mode."
+    )
+    parser.add_argument("--path", default="/api/article/")
+    parser.add_argument("--async-path", default="/api/article/async/")
+    parser.add_argument("--query", default="page_size=20")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+    django.setup()
+
+    from django.conf import settings
+    from django.core.handlers.asgi import ASGIHandler
+    from django.core.handlers.wsgi import WSGIHandler
+
+    settings.ALLOWED_HOSTS = [HOST]
+    settings.API_CACHE_ENABLED = False
+    wsgi_app, asgi_app = WSGIHandler(), ASGIHandler()
+
+    print(
+        f"concurrency: {args.concurrency}, requests: {args.requests}, "
+        f"WSGI threads: {args.threads}, query: {args.query or '-'}"
+    )
+    print(
+        f"{'mode':<12} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} "
+        f"{'max ms':>9} {'errors':>7}"
+    )
+    for mode in args.modes:
+        result = asyncio.run(run_mode(mode, args, wsgi_app, asgi_app))
+        print(
+            f"{result['mode']:<12} {result['rps']:>9.0f} {result['p50']:>9.1f} "
+            f"{result['p99']:>9.1f} {result['max']:>9.1f} {result['errors']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+In-process HTTP load driver over every API route.
+
+Each scenario sends requests to one URL name of `app.urls` through
+`WSGIHandler`, from `concurrency` worker threads like a threaded WSGI
+server (or from the calling thread when `concurrency` is 1). Requests
+pick their ids and filters at random among the seeded rows, so responses
+are not all served from the same cache entry. Latency, status codes and
+the queries of every request are recorded per scenario. Like with
+`django.test.Client`, database connections are not closed between
+requests, so a run inside a transaction, e.g. in a test, keeps its
+connection.
+
+`check_coverage` fails when a named route has no scenario, so new
+endpoints get benchmarked as they are added.
+"""
+import io
+import itertools
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections, connections
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from benchmarks.report import summarize
+from core.catalog import ADJECTIVES, NOUNS
+from core.models import Article, Job, Provider, ProviderDeletion
+from core.querybudget import QueryLog, record_queries
+
+HOST = "localhost"
+
+
+class Context:
+    """The seeded rows requests pick their ids from."""
+
+    def __init__(self):
+        self.article_nos = list(Article.objects.values_list("article_no", flat=True))
+        self.provider_nos = list(
+            Provider.objects.values_list("provider_no", flat=True)
+        )
+        self.deletion_ids = None
+        self.job_ids = None
+        self.serial = itertools.count(1)
+        if not self.article_nos or not self.provider_nos:
+            raise ValueError("The database has no articles, seed a catalog first.")
+
+    def article(self, rng):
+        return rng.choice(self.article_nos)
+
+    def provider(self, rng):
+        return rng.choice(self.provider_nos)
+
+    def deletion(self, rng):
+        """Return a provider deletion id, 0 when there is none."""
+        if not self.deletion_ids:
+            self.deletion_ids = list(
+                ProviderDeletion.objects.values_list("pk", flat=True)
+            )
+        return rng.choice(self.deletion_ids) if self.deletion_ids else 0
+
+    def job(self, rng):
+        """Return a job id, 0 when there is none."""
+        if not self.job_ids:
+            self.job_ids = list(Job.objects.values_list("pk", flat=True))
+        return rng.choice(self.job_ids) if self.job_ids else 0
+
+    def new_provider(self, rng):
+        """Create a provider without articles, for delete requests."""
+        name = f"Load test provider {next(self.serial)}"
+        return Provider.objects.create(provider_name=name).pk
+
+    def new_article(self, rng):
+        return {
+            "article_name": f"Load test article {next(self.serial)}",
+            "price": rng.randint(1, 100000),
+            "provider_no": self.provider(rng),
+        }
+
+
+class Scenario:
+    """Requests to the URL named `route`."""
+
+    def __init__(
+        self,
+        route,
+        method="GET",
+        label="",
+        args=None,
+        params=None,
+        body=None,
+        max_requests=None,
+    ):
+        self.route = route
+        self.method = method
+        self.name = f"{method} {route}{f' ({label})' if label else ''}"
+        self.args = args
+        self.params = params
+        self.body = body
+        self.max_requests = max_requests
+        self.writes = method != "GET"
+
+    def request(self, context, rng):
+        """Return the method, path, query string and body of a request."""
+        args = self.args(context, rng) if self.args else ()
+        params = self.params(context, rng) if self.params else {}
+        body = json.dumps(self.body(context, rng)).encode() if self.body else b""
+        return self.method, reverse(self.route, args=args), urlencode(params), body
+
+
+def article_args(context, rng):
+    return [context.article(rng)]
+
+
+def provider_args(context, rng):
+    return [context.provider(rng)]
+
+
+def price_range(context, rng):
+    low = rng.randint(1, 5000)
+    return {"min": low, "max": low + rng.randint(100, 5000)}
+
+
+def search_words(context, rng):
+    return {"q": f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}"}
+
+
+SCENARIOS = [
+    Scenario("article:article-list"),
+    Scenario("article:article-list", label="price range", params=price_range),
+    Scenario(
+        "article:article-list",
+        label="provider",
+        params=lambda c, r: {"pid": c.provider(r)},
+    ),
+    Scenario(
+        "article:article-list",
+        label="name prefix",
+        params=lambda c, r: {"name": r.choice(ADJECTIVES)},
+    ),
+    Scenario(
+        "article:article-list",
+        label="expanded",
+        params=lambda c, r: {"expand": "provider", "page_size": 20},
+    ),
+    Scenario("article:article-detail", args=article_args),
+    Scenario(
+        "article:article-export",
+        params=lambda c, r: {"pid": c.provider(r)},
+        max_requests=50,
+    ),
+    Scenario(
+        "article:article-prices",
+        params=lambda c, r: {"pid": c.provider(r)},
+    ),
+    Scenario("article:article-search", params=search_words),
+    Scenario("article:article-async-list", params=price_range),
+    Scenario("article:article-async-detail", args=article_args),
+    Scenario("article:price-filter-list", params=price_range),
+    Scenario(
+        "article:provider-filter-list",
+        params=lambda c, r: {"pid": c.provider(r)},
+    ),
+    Scenario("provider:provider-list"),
+    Scenario("provider:provider-detail", args=provider_args),
+    Scenario("provider:provider-async-list"),
+    Scenario("provider:provider-async-detail", args=provider_args),
+    Scenario("provider:provider-stats"),
+    Scenario(
+        "provider:provider-search",
+        params=lambda c, r: {"q": r.choice(ADJECTIVES + NOUNS)},
+    ),
+    Scenario(
+        "autocomplete",
+        params=lambda c, r: {"q": r.choice(ADJECTIVES + NOUNS)[: r.randint(1, 4)]},
+    ),
+    Scenario("health-check"),
+    Scenario("cache-stats"),
+    Scenario("db-pool-stats"),
+    Scenario("metrics"),
+    Scenario("api-schema", max_requests=20),
+    Scenario("api-docs"),
+    Scenario("article:article-list", "POST", body=Context.new_article),
+    Scenario(
+        "article:article-detail",
+        "PATCH",
+        args=article_args,
+        body=lambda c, r: {"price": r.randint(1, 100000)},
+    ),
+    Scenario(
+        "article:article-bulk",
+        "POST",
+        body=lambda c, r: [c.new_article(r) for _ in range(10)],
+    ),
+    Scenario(
+        "article:article-export-job",
+        "POST",
+        params=lambda c, r: {"pid": c.provider(r)},
+        body=lambda c, r: {"format": "csv"},
+        max_requests=5,
+    ),
+    Scenario(
+        "provider:provider-list",
+        "POST",
+        body=lambda c, r: {"provider_name": f"Load test provider {next(c.serial)}"},
+    ),
+    Scenario(
+        "provider:provider-detail",
+        "PATCH",
+        args=provider_args,
+        body=lambda c, r: {"provider_name": f"Load test provider {next(c.serial)}"},
+    ),
+    Scenario(
+        "provider:provider-detail",
+        "DELETE",
+        label="async",
+        args=lambda c, r: [c.new_provider(r)],
+        params=lambda c, r: {"async": "true"},
+        max_requests=20,
+    ),
+    Scenario(
+        "provider:provider-deletion",
+        args=lambda c, r: [c.deletion(r)],
+    ),
+    Scenario("changes", params=lambda c, r: {"since": r.randint(0, 1000)}),
+    Scenario("job-list"),
+    Scenario("job-detail", args=lambda c, r: [c.job(r)]),
+]
+
+
+def route_names(patterns=None, namespace=None):
+    """Yield the names of the API URL patterns."""
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            inner = pattern.namespace or namespace
+            if pattern.namespace and namespace:
+                inner = f"{namespace}:{pattern.namespace}"
+            if inner != "admin":
+                yield from route_names(pattern.url_patterns, inner)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            name = f"{namespace}:{pattern.name}" if namespace else pattern.name
+            # The router root views are shadowed by the list routes.
+            if not name.endswith(":api-root"):
+                yield name
+
+
+def check_coverage(scenarios=SCENARIOS):
+    """Raise ValueError when a named API route has no scenario."""
+    missing = set(route_names()) - {scenario.route for scenario in scenarios}
+    if missing:
+        raise ValueError(f"No load scenario for: {', '.join(sorted(missing))}")
+
+
+@contextmanager
+def keep_connections():
+    """Keep database connections open across requests of the enclosed code."""
+    request_started.disconnect(close_old_connections)
+    request_finished.disconnect(close_old_connections)
+    try:
+        yield
+    finally:
+        request_started.connect(close_old_connections)
+        request_finished.connect(close_old_connections)
+
+
+def call(application, method, path, query="", body=b""):
+    """Run one request through a WSGI application and return its status."""
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "SCRIPT_NAME": "",
+        "SERVER_NAME": HOST,
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": HOST,
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": io.StringIO(),
+        "wsgi.url_scheme": "http",
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+        "wsgi.version": (1, 0),
+    }
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split(" ", 1)[0]))
+
+    response = application(environ, start_response)
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return statuses[0]
+
+
+def run_scenario(application, scenario, context, requests, concurrency, seed=0):
+    """Send `requests` requests of `scenario` and return its metrics."""
+    if scenario.max_requests:
+        requests = min(requests, scenario.max_requests)
+    remaining = itertools.islice(itertools.count(), requests)
+    lock = threading.Lock()
+
+    def worker(index):
+        rng = random.Random(f"{seed}:{scenario.name}:{index}")
+        samples = []
+        log = QueryLog()
+        with record_queries(log):
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        break
+                request = scenario.request(context, rng)
+                before = len(log.queries)
+                started = time.perf_counter()
+                status = call(application, *request)
+                samples.append(
+                    (time.perf_counter() - started, status, len(log.queries) - before)
+                )
+        return samples
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        samples = worker(0)
+    else:
+
+        def thread_worker(index):
+            try:
+                return worker(index)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = [
+                sample
+                for results in pool.map(thread_worker, range(concurrency))
+                for sample in results
+            ]
+    elapsed = time.perf_counter() - started
+    return summarize(
+        [latency for latency, _, _ in samples],
+        elapsed,
+        sum(1 for _, status, _ in samples if status >= 400),
+        [queries for _, _, queries in samples],
+    )
+
+
+def run(
+    requests=200, concurrency=8, writes=True, names=None, seed=0, stdout=None
+):
+    """Run the load scenarios and return their metrics by scenario name."""
+    check_coverage()
+    application = WSGIHandler()
+    context = Context()
+    results = {}
+    with keep_connections():
+        for scenario in SCENARIOS:
+            if scenario.writes and not writes:
+                continue
+            if names and not any(part in scenario.name for part in names):
+                continue
+            result = run_scenario(
+                application, scenario, context, requests, concurrency, seed
+            )
+            results[scenario.name] = result
+            if stdout is not None:
+                stdout.write(
+                    f"{scenario.name:<52} {result['rps']:>8.0f} "
+                    f"{result['p50']:>8.1f} {result['p95']:>8.1f} "
+                    f"{result['p99']:>8.1f} {result['queries']:>7.1f} "
+                    f"{result['errors']:>6}\n"
+                )
+    return results
@@ -0,0 +1,108 @@
+"""
+Microbenchmarks of the serializers and querysets behind the API.
+
+Every benchmark times one operation with `timeit`: the number of calls
+per repeat is picked so a repeat lasts at least 0.2 s, and the best
+repeat is kept. The queries of one call are counted separately. Needs a
+catalog in the database, see `core.catalog`.
+"""
+import random
+import timeit
+
+from django.conf import settings
+from django.db.models import Count
+
+from article import prices
+from article.filters import (
+    ORDERINGS,
+    PRICE_ORDERINGS,
+    PROVIDER_ORDERINGS,
+    ArticleFilter,
+)
+from article.search import SEARCH_ORDERING, SEARCH_VECTOR_COLUMN
+from article.serializers import ArticleSerializer
+from core.autocomplete import INDEXES
+from core.catalog import ADJECTIVES, NOUNS
+from core.models import Article, Provider
+from core.querybudget import QueryLog, record_queries
+from core.renderers import FastJSONRenderer
+from core.search import search
+from provider.serializers import ProviderSerializer
+
+
+def benchmarks(page_size, seed=0):
+    """Return the name and operation of every microbenchmark."""
+    rng = random.Random(seed)
+    fields = ArticleSerializer.Meta.fields
+    latest = Article.objects.order_by("-article_no")
+    articles = list(latest[:page_size])
+    expanded = list(latest.select_related("provider_no")[:page_size])
+    rows = list(latest.values(*fields)[:page_size])
+    providers = list(Provider.objects.order_by("-provider_no")[:page_size])
+    provider_no = (
+        Article.objects.values("provider_no")
+        .annotate(count=Count("article_no"))
+        .order_by("-count")
+        .values_list("provider_no", flat=True)
+        .first()
+    )
+    new_article = {
+        "article_name": "Benchmark article",
+        "price": 100,
+        "provider_no": provider_no,
+    }
+    word = rng.choice(NOUNS).lower()
+    prefix = rng.choice(ADJECTIVES)[:3]
+    filters = ArticleFilter()
+    INDEXES[Article].ensure_built()
+
+    return {
+        "serialize articles": lambda: ArticleSerializer(articles, many=True).data,
+        "serialize articles, provider expanded": lambda: ArticleSerializer(
+            expanded, many=True, expand=("provider",)
+        ).data,
+        "serialize providers": lambda: ProviderSerializer(providers, many=True).data,
+        "render article rows": lambda: FastJSONRenderer().render(rows),
+        "validate new article": lambda: ArticleSerializer(
+            data=new_article
+        ).is_valid(),
+        "query article page": lambda: list(latest.values(*fields)[:page_size]),
+        "query provider page": lambda: list(
+            filters.apply_filters(latest, {"pid": [provider_no]})
+            .order_by(*ORDERINGS[PROVIDER_ORDERINGS[0]])
+            .values(*fields)[:page_size]
+        ),
+        "query price range page": lambda: list(
+            filters.apply_filters(latest, {"min": 1000, "max": 5000})
+            .order_by(*ORDERINGS[PRICE_ORDERINGS[0]])
+            .values(*fields)[:page_size]
+        ),
+        "query article count": lambda: Article.objects.count(),
+        "query price distribution": lambda: prices.price_stats(Article.objects.all()),
+        "search article names": lambda: list(
+            search(Article.objects.all(), word, "article_name", SEARCH_VECTOR_COLUMN)
+            .order_by(*SEARCH_ORDERING)
+            .values(*fields, "rank")[:page_size]
+        ),
+        "autocomplete lookup": lambda: INDEXES[Article].lookup(prefix, 10),
+    }
+
+
+def run(page_size=settings.API_PAGE_SIZE, repeat=5, seed=0, names=None):
+    """Return the metrics of the microbenchmarks, all of them by default."""
+    results = {}
+    for name, operation in benchmarks(page_size, seed).items():
+        if names and not any(part in name for part in names):
+            continue
+        log = QueryLog()
+        with record_queries(log):
+            operation()
+        timer = timeit.Timer(operation)
+        number, _ = timer.autorange()
+        best = min(timer.repeat(repeat, number)) / number
+        results[name] = {
+            "ms": round(best * 1000, 4),
+            "calls": number * repeat,
+            "queries": len(log.queries),
+        }
+    return results
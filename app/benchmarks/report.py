@@ -0,0 +1,92 @@
+"""
+Benchmark results: summaries, JSON files and baseline comparison.
+
+A results file holds a `meta` object describing the run and one object
+per section ("micro", "load") mapping benchmark names to their metrics.
+Comparing it with a baseline, i.e. the results file of an earlier run,
+flags every metric that got worse by more than the tolerance. Query and
+error counts are compared exactly, since they do not depend on timing.
+"""
+import json
+import statistics
+
+from benchmarks.async_views import percentile
+
+# Metric name: (higher is better, compared with the tolerance).
+METRICS = {
+    "rps": (True, True),
+    "ms": (False, True),
+    "p50": (False, True),
+    "p95": (False, True),
+    "p99": (False, True),
+    "queries": (False, False),
+    "errors": (False, False),
+}
+
+
+def summarize(latencies, elapsed, errors, queries):
+    """Return the load metrics of one scenario, latencies in milliseconds."""
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50": round(statistics.median(latencies) * 1000, 3),
+        "p95": round(percentile(latencies, 95) * 1000, 3),
+        "p99": round(percentile(latencies, 99) * 1000, 3),
+        "max": round(latencies[-1] * 1000, 3),
+        "queries": round(statistics.mean(queries), 2),
+    }
+
+
+def write_results(path, results):
+    """Write `results` to the JSON file `path`."""
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def read_results(path):
+    """Return the results stored in the JSON file `path`."""
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Return (section, name, metric, baseline, current) for every metric of
+    `results` worse than in `baseline`.
+    """
+    regressions = []
+    for section in ("micro", "load"):
+        for name, metrics in results.get(section, {}).items():
+            previous = baseline.get(section, {}).get(name)
+            if previous is None:
+                continue
+            for metric, (higher_is_better, relative) in METRICS.items():
+                if metric not in metrics or metric not in previous:
+                    continue
+                current, before = metrics[metric], previous[metric]
+                margin = abs(before) * tolerance if relative else 0
+                worse = (
+                    current < before - margin
+                    if higher_is_better
+                    else current > before + margin
+                )
+                if worse:
+                    regressions.append((section, name, metric, before, current))
+    return regressions
+
+
+def print_regressions(regressions, stdout):
+    """Write a table of `regressions` to `stdout`."""
+    if not regressions:
+        stdout.write("No regressions against the baseline.\n")
+        return
+    stdout.write(f"{len(regressions)} regression(s) against the baseline:\n")
+    for section, name, metric, before, current in regressions:
+        change = (current - before) / before * 100 if before else float("inf")
+        stdout.write(
+            f"  {section:<6} {name:<48} {metric:<8} "
+            f"{before:>10.2f} -> {current:>10.2f} ({change:+.0f}%)\n"
+        )
@@ -0,0 +1,79 @@
+"""
+Benchmark of the list serialization paths.
+
+Compares the ModelSerializer path (model instances, serializer fields,
+JSONRenderer) with the fast path used by list endpoints (`values()` rows
+encoded by FastJSONRenderer), and checks both produce the same bytes.
+No database is needed: rows are generated in memory.
+
+Run from the app directory:
+
+    python -m benchmarks.serialization --rows 100000
+"""
+import argparse
+import os
+import random
+import time
+
+import django
+
+
+def best_of(repeat, func):
+    """Return the fastest wall time of `repeat` calls and the last result."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+    django.setup()
+
+    from rest_framework.renderers import JSONRenderer
+
+    from article.serializers import ArticleSerializer
+    from core.models import Article
+    from core.renderers import orjson, FastJSONRenderer
+
+    rng = random.Random(args.seed)
+    rows = [
+        (no, f"Article {no}", rng.randint(1, 100000), rng.randint(1, 1000))
+        for no in range(args.rows, 0, -1)
+    ]
+    fields = ArticleSerializer.Meta.fields
+    attnames = [Article._meta.get_field(name).attname for name in fields]
+
+    def serializer_path():
+        articles = [Article.from_db("default", attnames, row) for row in rows]
+        data = ArticleSerializer(articles, many=True).data
+        return JSONRenderer().render(data)
+
+    def fast_path():
+        data = [dict(zip(fields, row)) for row in rows]
+        return FastJSONRenderer().render(data)
+
+    slow_time, slow_body = best_of(args.repeat, serializer_path)
+    fast_time, fast_body = best_of(args.repeat, fast_path)
+
+    print(f"rows:            {args.rows:,}")
+    print(f"encoder:         {'orjson' if orjson else 'json (stdlib)'}")
+    print(f"ModelSerializer: {slow_time * 1000:10.1f} ms")
+    print(f"fast path:       {fast_time * 1000:10.1f} ms")
+    print(f"speedup:         {slow_time / fast_time:10.1f}x")
+    print(f"byte identical:  {slow_body == fast_body} ({len(fast_body):,} bytes)")
+    if slow_body != fast_body:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
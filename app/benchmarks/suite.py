@@ -0,0 +1,135 @@
+"""
+Benchmark suite of the article and provider APIs.
+
+Creates a throwaway test database, seeds it with a synthetic catalog
+(`core.catalog`), runs the microbenchmarks (`benchmarks.micro`) and
+the HTTP load scenarios (`benchmarks.load`), then writes the results as
+JSON and compares them with a baseline, i.e. the results of an earlier
+run. The exit status is 1 when a metric regressed beyond the tolerance.
+
+Response caching is off unless `--cache` is given, so requests measure
+the database path. With `--existing-db` the configured database is used
+as is, without seeding, and write scenarios are skipped. Measure against
+PostgreSQL: SQLite serializes writes, so concurrent write scenarios
+report lock errors there.
+
+Run from the app directory:
+
+    python -m benchmarks.suite --articles 100000 --output results.json
+    python -m benchmarks.suite --articles 100000 --baseline results.json
+"""
+import argparse
+import os
+import platform
+import sys
+import time
+
+import django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--providers", type=int, default=200)
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--requests", type=int, default=200, help="Requests per load scenario."
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--only", nargs="+", choices=["micro", "load"], default=["micro", "load"]
+    )
+    parser.add_argument(
+        "--filter",
+        nargs="+",
+        help="Run the benchmarks whose name contains one of these strings.",
+    )
+    parser.add_argument("--cache", action="store_true")
+    parser.add_argument("--existing-db", action="store_true")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare with this results file.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Relative slowdown tolerated before a timing counts as regressed.",
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_databases, teardown_databases
+
+    from benchmarks import load, micro, report
+    from core.catalog import seed_catalog
+
+    settings.ALLOWED_HOSTS = [load.HOST]
+    settings.API_CACHE_ENABLED = args.cache
+    settings.QUERY_BUDGET_MODE = "off"
+    out = sys.stdout
+
+    databases = None
+    if not args.existing_db:
+        databases = setup_databases(verbosity=0, interactive=False)
+        out.write(f"Seeding {args.providers} providers, {args.articles} articles...\n")
+        started = time.perf_counter()
+        seed_catalog(args.providers, args.articles, args.seed)
+        out.write(f"Seeded in {time.perf_counter() - started:.1f} s\n")
+
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "providers": args.providers,
+            "articles": args.articles,
+            "concurrency": args.concurrency,
+            "cache": args.cache,
+        }
+    }
+    try:
+        if "micro" in args.only:
+            out.write(f"\n{'microbenchmark':<52} {'ms':>10} {'queries':>7}\n")
+            results["micro"] = micro.run(
+                repeat=args.repeat, seed=args.seed, names=args.filter
+            )
+            for name, metrics in results["micro"].items():
+                out.write(
+                    f"{name:<52} {metrics['ms']:>10.3f} {metrics['queries']:>7}\n"
+                )
+        if "load" in args.only:
+            out.write(
+                f"\n{'scenario':<52} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+                f"{'p99 ms':>8} {'queries':>7} {'errors':>6}\n"
+            )
+            results["load"] = load.run(
+                requests=args.requests,
+                concurrency=args.concurrency,
+                writes=not args.existing_db,
+                names=args.filter,
+                seed=args.seed,
+                stdout=out,
+            )
+    finally:
+        if databases is not None:
+            teardown_databases(databases, verbosity=0)
+
+    if args.output:
+        report.write_results(args.output, results)
+    if args.baseline:
+        regressions = report.compare(
+            results, report.read_results(args.baseline), args.tolerance
+        )
+        out.write("\n")
+        report.print_regressions(regressions, out)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
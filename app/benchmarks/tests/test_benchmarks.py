@@ -0,0 +1,81 @@
+"""
+Tests for the benchmark suite.
+"""
+from django.test import TestCase, override_settings
+
+from benchmarks import load, micro, report
+from core import autocomplete
+from core.catalog import seed_catalog
+
+
+@override_settings(ALLOWED_HOSTS=[load.HOST], API_CACHE_ENABLED=False)
+class BenchmarkRunTests(TestCase):
+    """Test the benchmarks run against a small catalog."""
+
+    def setUp(self):
+        autocomplete.clear_indexes()
+        self.addCleanup(autocomplete.clear_indexes)
+        seed_catalog(5, 100)
+
+    def test_every_route_has_a_scenario(self):
+        """Test the load scenarios cover every named API route"""
+        load.check_coverage()
+
+        with self.assertRaisesMessage(ValueError, "provider:provider-stats"):
+            load.check_coverage(
+                [s for s in load.SCENARIOS if s.route != "provider:provider-stats"]
+            )
+
+    def test_load(self):
+        """Test every load scenario succeeds"""
+        results = load.run(requests=2, concurrency=1)
+
+        self.assertEqual(len(results), len(load.SCENARIOS))
+        for name, metrics in results.items():
+            with self.subTest(name=name):
+                self.assertEqual(metrics["requests"], 2)
+                self.assertEqual(metrics["errors"], 0)
+
+    def test_micro(self):
+        """Test the microbenchmarks report their time and queries"""
+        results = micro.run(repeat=1, names=["serialize providers", "autocomplete"])
+
+        self.assertEqual(
+            set(results), {"serialize providers", "autocomplete lookup"}
+        )
+        self.assertEqual(results["autocomplete lookup"]["queries"], 0)
+
+
+class CompareTests(TestCase):
+    """Test results are compared with a baseline."""
+
+    baseline = {
+        "micro": {"a": {"ms": 10.0, "queries": 1}},
+        "load": {"b": {"rps": 100.0, "p95": 20.0, "queries": 2, "errors": 0}},
+    }
+
+    def test_within_tolerance(self):
+        """Test small timing changes are not regressions"""
+        results = {
+            "micro": {"a": {"ms": 11.0, "queries": 1}, "new": {"ms": 1.0}},
+            "load": {"b": {"rps": 90.0, "p95": 24.0, "queries": 2, "errors": 0}},
+        }
+
+        self.assertEqual(report.compare(results, self.baseline, 0.25), [])
+
+    def test_regressions(self):
+        """Test slower timings and any extra query are regressions"""
+        results = {
+            "micro": {"a": {"ms": 13.0, "queries": 2}},
+            "load": {"b": {"rps": 70.0, "p95": 20.0, "queries": 2, "errors": 1}},
+        }
+
+        self.assertEqual(
+            report.compare(results, self.baseline, 0.25),
+            [
+                ("micro", "a", "ms", 10.0, 13.0),
+                ("micro", "a", "queries", 1, 2),
+                ("load", "b", "rps", 100.0, 70.0),
+                ("load", "b", "errors", 0, 1),
+            ],
+        )
@@ -0,0 +1,180 @@
+"""
+Native async read views for the APIs.
+
+DRF views are synchronous, so under ASGI every request to them holds a
+worker thread from the first middleware to the last byte. These views
+are coroutines that await the async queryset API (`aiterator`, `aget`)
+instead; they return the same JSON bodies as the `list` and `retrieve`
+actions of the matching viewsets, without response caching.
+
+`ChangeFeedView` serves the change log (`core.changes`); its long polls
+wait with `asyncio.sleep`, without holding a thread under ASGI.
+"""
+import asyncio
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import F
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import serializers
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+from rest_framework.request import Request
+
+from core.models import Article, Change, Provider
+from core.renderers import FastJSONRenderer
+
+# Model and response fields of the rows named by changes, by change type.
+CHANGE_DATA = {
+    Change.ARTICLE: (Article, ["article_no", "article_name", "price", "provider_no"]),
+    Change.PROVIDER: (Provider, ["provider_no", "provider_name"]),
+}
+
+
+def render_json(data, status=200):
+    """Return `data` as a JSON response."""
+    renderer = FastJSONRenderer()
+    return HttpResponse(
+        renderer.render(data), status=status, content_type=renderer.media_type
+    )
+
+
+def error_data(exc):
+    """Return the body DRF's exception handler would send for `exc`."""
+    if isinstance(exc.detail, (list, dict)):
+        return exc.detail
+    return {"detail": exc.detail}
+
+
+class AsyncReadView(View):
+    """
+    Read-only JSON view of a model, answering `GET` asynchronously.
+
+    Routed with a `pk` URL keyword it returns one row, without it the
+    list. `fields` names the model fields of the response, in order.
+    """
+
+    queryset = None
+    fields = ()
+    http_method_names = ["get", "head", "options"]
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    async def get(self, request, pk=None):
+        request = Request(request)
+        try:
+            if pk is None:
+                data = await self.alist(request)
+            else:
+                data = await self.aretrieve(request, pk)
+        except APIException as exc:
+            return render_json(error_data(exc), exc.status_code)
+        return render_json(data)
+
+    def get_columns(self, request, queryset):
+        """Return the columns of the `values()` rows of `queryset`."""
+        return self.fields
+
+    def get_data(self, request, rows):
+        """Return the response items of the `values()` rows."""
+        return rows
+
+    async def alist(self, request):
+        """Return the rows of the list response."""
+        queryset = self.get_queryset()
+        queryset = queryset.values(*self.get_columns(request, queryset))
+        return self.get_data(request, [row async for row in queryset.aiterator()])
+
+    async def aretrieve(self, request, pk):
+        """Return the row with primary key `pk`."""
+        queryset = self.get_queryset()
+        queryset = queryset.values(*self.get_columns(request, queryset))
+        try:
+            row = await queryset.aget(pk=pk)
+        except ObjectDoesNotExist:
+            raise NotFound()
+        return self.get_data(request, [row])[0]
+
+
+class ChangeFeedParamsSerializer(serializers.Serializer):
+    since = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.CHANGES_MAX_PAGE_SIZE,
+        default=settings.CHANGES_PAGE_SIZE,
+    )
+    type = serializers.ChoiceField(choices=Change.TYPES, required=False)
+    wait = serializers.FloatField(
+        min_value=0, max_value=settings.CHANGES_MAX_WAIT, default=0
+    )
+
+
+class ChangeFeedView(View):
+    """
+    The changes logged after the `since` sequence number, oldest first.
+
+    Pages hold `limit` changes at most; `next` is the `since` of the next
+    page and `has_more` tells whether it is already known to be non-empty.
+    Every change carries the current `data` of the row it names, null
+    once the row is deleted. With `wait`, an empty page is only returned
+    after that many seconds without a new change (long polling).
+    """
+
+    http_method_names = ["get", "head", "options"]
+
+    async def get(self, request):
+        request = Request(request)
+        params = ChangeFeedParamsSerializer(data=request.query_params)
+        try:
+            params.is_valid(raise_exception=True)
+        except ValidationError as exc:
+            return render_json(error_data(exc), exc.status_code)
+        params = params.validated_data
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + params["wait"]
+        while True:
+            changes = await self.achanges(params)
+            remaining = deadline - loop.time()
+            if changes or remaining <= 0:
+                break
+            await asyncio.sleep(min(settings.CHANGES_POLL_INTERVAL, remaining))
+
+        has_more = len(changes) > params["limit"]
+        changes = changes[: params["limit"]]
+        await self.add_data(changes)
+        return render_json(
+            {
+                "changes": changes,
+                "next": changes[-1]["seq"] if changes else params["since"],
+                "has_more": has_more,
+            }
+        )
+
+    async def achanges(self, params):
+        """Return the changes of a page, plus the first of the next one."""
+        queryset = Change.objects.filter(seq__gt=params["since"]).order_by("seq")
+        if "type" in params:
+            queryset = queryset.filter(type=params["type"])
+        queryset = queryset.values(
+            "seq", "type", "op", "created_at", id=F("object_id")
+        )
+        return [row async for row in queryset[: params["limit"] + 1].aiterator()]
+
+    async def add_data(self, changes):
+        """Set the current data of the rows named by `changes`."""
+        for type_, (model, fields) in CHANGE_DATA.items():
+            pks = {
+                change["id"]
+                for change in changes
+                if change["type"] == type_ and change["op"] != Change.DELETE
+            }
+            rows = {}
+            if pks:
+                queryset = model.objects.filter(pk__in=pks).values(*fields)
+                async for row in queryset.aiterator():
+                    rows[row[model._meta.pk.name]] = row
+            for change in changes:
+                if change["type"] == type_:
+                    change["data"] = rows.get(change["id"])
@@ -0,0 +1,245 @@
+"""
+In-process autocomplete index of provider and article names.
+
+Every process keeps, per model, a sorted list of keys: one per word of a
+name, holding the normalized name from that word on, a NUL and the
+primary key. The names matching a prefix are the keys from
+`bisect_left(keys, prefix)` to the first key not starting with it, so a
+lookup is a binary search plus a short scan and never queries the
+database.
+
+An index is built on its first lookup, from the newest rows down, and
+holds at most AUTOCOMPLETE_MAX_ENTRIES keys. It then follows the writes
+of this process: single saves and deletes update it once their
+transaction commits (see `core.signals`), bulk writes mark it stale. A
+stale index, or one older than AUTOCOMPLETE_MAX_AGE seconds, which is how
+the writes of other processes are picked up, keeps serving its entries
+while a background thread builds its replacement.
+"""
+import bisect
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from core.models import Article, Provider
+
+# Names are found by the prefixes of their first MAX_WORDS words.
+MAX_WORDS = 8
+
+SEPARATOR = "\x00"
+
+BUILD_CHUNK_SIZE = 10000
+
+
+def normalize(text):
+    """Return the words of `text`, case folded and joined by single spaces."""
+    return " ".join(re.findall(r"\w+", text.casefold()))
+
+
+def name_keys(pk, name):
+    """Return the index keys of the name `name` of the row `pk`."""
+    words = normalize(name).split(" ")
+    return [
+        f"{' '.join(words[start:])}{SEPARATOR}{pk}"
+        for start in range(min(len(words), MAX_WORDS))
+        if words[start]
+    ]
+
+
+class PrefixIndex:
+    """
+    Sorted prefix index of the `field` names of `model` rows, of those in
+    `queryset` if given.
+    """
+
+    def __init__(self, model, field, queryset=None):
+        self.model = model
+        self.field = field
+        if queryset is None:
+            queryset = model._default_manager.all()
+        self.queryset = queryset
+        self.truncated = False
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._keys = None
+        self._names = {}
+        self._built_at = 0.0
+        self._stale = False
+        self._refreshing = False
+        # Changes committed while a build runs, applied to its result.
+        self._pending = None
+
+    def __len__(self):
+        return len(self._keys or ())
+
+    def lookup(self, text, limit):
+        """Return up to `limit` (pk, name) pairs of names matching `text`."""
+        prefix = normalize(text)
+        if not prefix:
+            return []
+        self.ensure_built()
+        found = {}
+        with self._lock:
+            keys = self._keys
+            position = bisect.bisect_left(keys, prefix)
+            while position < len(keys) and len(found) < limit:
+                key = keys[position]
+                if not key.startswith(prefix):
+                    break
+                pk = int(key.rpartition(SEPARATOR)[2])
+                found.setdefault(pk, self._names[pk])
+                position += 1
+        return list(found.items())
+
+    def ensure_built(self):
+        """Build the index if it never was, else refresh it when outdated."""
+        if self._keys is None:
+            with self._build_lock:
+                if self._keys is None:
+                    self.build()
+        elif self._stale or (
+            time.monotonic() - self._built_at > settings.AUTOCOMPLETE_MAX_AGE
+        ):
+            self.refresh_in_background()
+
+    def build(self):
+        """Load the index from the database, newest rows first."""
+        with self._lock:
+            self._stale = False
+            self._pending = []
+        keys, names = [], {}
+        truncated = False
+        rows = (
+            self.queryset.order_by("-pk")
+            .values_list("pk", self.field)
+            .iterator(chunk_size=BUILD_CHUNK_SIZE)
+        )
+        for pk, name in rows:
+            new_keys = name_keys(pk, name)
+            if len(keys) + len(new_keys) > settings.AUTOCOMPLETE_MAX_ENTRIES:
+                truncated = True
+                break
+            keys.extend(new_keys)
+            names[pk] = name
+        keys.sort()
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._keys, self._names = keys, names
+            self.truncated = truncated
+            for pk, name in pending:
+                self._apply(pk, name)
+            self._built_at = time.monotonic()
+
+    def refresh_in_background(self):
+        """Build a fresh index in a thread, serving the current one meanwhile."""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, daemon=True).start()
+
+    def _refresh(self):
+        try:
+            with self._build_lock:
+                self.build()
+        finally:
+            self._refreshing = False
+            connections.close_all()
+
+    def add(self, pk, name):
+        """Index the name of the row `pk`, replacing its previous one."""
+        self._change(pk, name)
+
+    def remove(self, pk):
+        """Drop the row `pk` from the index."""
+        self._change(pk, None)
+
+    def invalidate(self):
+        """Mark the index for a rebuild, after writes it did not follow."""
+        self._stale = True
+
+    def clear(self):
+        """Forget the index, so that the next lookup builds it again."""
+        with self._lock:
+            self._keys = None
+            self._names = {}
+            self._stale = False
+            self.truncated = False
+
+    def _change(self, pk, name):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((pk, name))
+            if self._keys is not None:
+                self._apply(pk, name)
+
+    def _apply(self, pk, name):
+        """Replace the keys of `pk`; the caller holds the lock."""
+        old_name = self._names.pop(pk, None)
+        if old_name is not None:
+            for key in name_keys(pk, old_name):
+                position = bisect.bisect_left(self._keys, key)
+                if position < len(self._keys) and self._keys[position] == key:
+                    del self._keys[position]
+        if name is None:
+            return
+        new_keys = name_keys(pk, name)
+        if len(self._keys) + len(new_keys) > settings.AUTOCOMPLETE_MAX_ENTRIES:
+            self.truncated = True
+            return
+        for key in new_keys:
+            bisect.insort(self._keys, key)
+        self._names[pk] = name
+
+
+INDEXES = {
+    # Providers being deleted are hidden like in the API.
+    Provider: PrefixIndex(Provider, "provider_name", Provider.objects.active()),
+    Article: PrefixIndex(Article, "article_name"),
+}
+
+
+def name_saved(instance):
+    """Index the name of a saved row once its transaction commits."""
+    model = type(instance)
+    if getattr(instance, "deleting", False):
+        names_deleted(model, [instance.pk])
+        return
+    names_saved(model, [(instance.pk, getattr(instance, INDEXES[model].field))])
+
+
+def names_saved(model, rows):
+    """Index the (pk, name) pairs of `model` once the transaction commits."""
+    rows = list(rows)
+
+    def apply():
+        for pk, name in rows:
+            INDEXES[model].add(pk, name)
+
+    transaction.on_commit(apply)
+
+
+def names_deleted(model, pks):
+    """Drop deleted rows from the index once the transaction commits."""
+    pks = list(pks)
+
+    def apply():
+        for pk in pks:
+            INDEXES[model].remove(pk)
+
+    transaction.on_commit(apply)
+
+
+def invalidate(*models):
+    """Rebuild the indexes of `models` after bulk writes commit."""
+    for model in models:
+        transaction.on_commit(INDEXES[model].invalidate)
+
+
+def clear_indexes():
+    """Forget every index, e.g. between tests."""
+    for index in INDEXES.values():
+        index.clear()
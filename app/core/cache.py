@@ -0,0 +1,180 @@
+"""
+Response caching and conditional GET for list and retrieve endpoints.
+
+Cached entries are keyed on the request path, its normalized query
+parameters and the version of every table the response is built from.
+Writes bump those versions (see `core.signals`), so a stale entry is
+never looked up again and simply ages out of the cache backend.
+
+The same key doubles as the response `ETag`, and the time of the last
+bump as `Last-Modified`, so polling clients revalidating with
+`If-None-Match` get a 304 after a single primary key lookup.
+"""
+import hashlib
+import threading
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from core.models import TableVersion
+
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_stats():
+    """Return the hit/miss counters of this process."""
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        "backend": settings.CACHES[settings.API_CACHE_ALIAS]["BACKEND"],
+    }
+
+
+def reset_cache_stats():
+    """Zero the hit/miss counters of this process."""
+    with _stats_lock:
+        _stats.update(hits=0, misses=0)
+
+
+def get_api_cache():
+    """Return the cache backend used for API responses."""
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_versions(*models):
+    """Return the (table, version, updated_at) rows of the given models."""
+    tables = sorted({model._meta.db_table for model in models})
+    found = {
+        row[0]: row
+        for row in TableVersion.objects.filter(table_name__in=tables).values_list(
+            "table_name", "version", "updated_at"
+        )
+    }
+    return [found.get(table, (table, 0, None)) for table in tables]
+
+
+def bump_versions(*models):
+    """Record a write to the tables of the given models."""
+    tables = sorted({model._meta.db_table for model in models})
+    now = timezone.now()
+    updated = TableVersion.objects.filter(table_name__in=tables).update(
+        version=F("version") + 1, updated_at=now
+    )
+    if updated < len(tables):
+        for table in tables:
+            TableVersion.objects.get_or_create(
+                table_name=table, defaults={"version": 1, "updated_at": now}
+            )
+
+
+def normalize_query(query_params):
+    """Return the query string of `query_params` in a canonical order."""
+    return urlencode(
+        sorted((key, value) for key, values in query_params.lists() for value in values)
+    )
+
+
+def response_cache_key(request, versions):
+    """Return the cache key of a GET request given the table versions."""
+    token = ";".join(
+        f"{table}:{version}:{updated_at.timestamp() if updated_at else 0}"
+        for table, version, updated_at in versions
+    )
+    raw = "|".join(
+        (request.get_host(), request.path, normalize_query(request.query_params), token)
+    )
+    return "api:" + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def last_modified(versions):
+    """Return the time of the latest write among `versions`, in seconds."""
+    stamps = [updated_at for _, _, updated_at in versions if updated_at]
+    return int(max(stamps).timestamp()) if stamps else None
+
+
+def set_validators(response, etag, modified):
+    """Attach the `ETag` and `Last-Modified` headers to `response`."""
+    response["ETag"] = etag
+    if modified is not None:
+        response["Last-Modified"] = http_date(modified)
+    return response
+
+
+class CachedListMixin:
+    """
+    Cache `list` responses of a viewset and answer conditional requests
+    for them.
+
+    `cache_models` lists every model whose rows end up in the response.
+    """
+
+    cache_models = ()
+
+    def get_cache_models(self):
+        """Return the models the response of the current request is built from."""
+        return self.cache_models
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def cached_response(self, view, request, *args, **kwargs):
+        """
+        Return 304 if the client copy is current, else the cached response
+        data, else run `view` and cache its data.
+        """
+        versions = get_versions(*self.get_cache_models())
+        key = response_cache_key(request, versions)
+        etag = "W/" + quote_etag(key.split(":", 1)[1])
+        modified = last_modified(versions)
+
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=modified
+        )
+        if not_modified is not None:
+            return set_validators(not_modified, etag, modified)
+
+        if not settings.API_CACHE_ENABLED:
+            response = view(request, *args, **kwargs)
+        else:
+            cache = get_api_cache()
+            data = cache.get(key)
+            if data is not None:
+                _count("hits")
+                return set_validators(Response(data), etag, modified)
+
+            _count("misses")
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data)
+
+        if response.status_code == 200:
+            set_validators(response, etag, modified)
+        return response
+
+
+class CachedResponseMixin(CachedListMixin):
+    """
+    Cache `list` and `retrieve` responses of a viewset and answer
+    conditional requests for them.
+
+    Writes bump the versions of `cache_models` from `core.signals`.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
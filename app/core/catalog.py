@@ -0,0 +1,253 @@
+"""
+Synthetic catalog data, for local testing and benchmarks at scale.
+
+Providers get article counts following a Zipf law of exponent `zipf`, so
+a few large providers hold most of the catalog like in real data (0
+spreads articles evenly), and prices follow a log-normal distribution:
+many cheap articles, a long tail of expensive ones. Article names combine
+common words with a serial number, which keeps them unique and gives name
+searches realistic hit counts.
+
+Rows are generated a batch at a time, with NumPy when it is installed,
+and written with `COPY` on PostgreSQL, `bulk_create` elsewhere. The same
+seed gives the same catalog, for a given starting database and the same
+NumPy availability.
+"""
+import io
+import itertools
+import math
+import random
+
+from django.db import connections, router, transaction
+
+from core import autocomplete, changes
+from core.cache import bump_versions
+from core.models import Article, Change, Provider, ProviderStats
+from core.stats import refresh_provider_stats
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - NumPy is optional
+    numpy = None
+
+ADJECTIVES = [
+    "Red", "Blue", "Green", "Black", "White", "Large", "Small", "Light",
+    "Heavy", "Classic", "Modern", "Compact", "Premium", "Basic", "Organic",
+    "Steel", "Wooden", "Glass", "Cotton", "Digital", "Wireless", "Portable",
+]  # fmt: skip
+
+NOUNS = [
+    "Apple", "Chair", "Table", "Lamp", "Cable", "Bottle", "Jacket", "Shoe",
+    "Phone", "Charger", "Kettle", "Mug", "Plate", "Knife", "Pillow",
+    "Blanket", "Backpack", "Watch", "Speaker", "Keyboard", "Monitor",
+    "Drill", "Hammer", "Brush", "Candle", "Basket", "Towel", "Helmet",
+]  # fmt: skip
+
+COMPANIES = [
+    "Acme", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Wonka",
+    "Tyrell", "Cyberdyne", "Soylent", "Hooli", "Vandelay", "Gringotts",
+]  # fmt: skip
+
+SUFFIXES = ["Supplies", "Trading", "Goods", "Wholesale", "Distribution", "Market"]
+
+ZIPF_EXPONENT = 1.1
+PRICE_MEDIAN = 1500
+PRICE_SIGMA = 1.0
+MAX_PRICE = 10_000_000
+
+BATCH_SIZE = 50000
+
+COPY_SQL = "COPY {table} ({article_name}, {price}, {provider_no}) FROM STDIN"
+
+
+def provider_names(count, first=1):
+    """Yield `count` unique provider names, numbered from `first`."""
+    for number in range(first, first + count):
+        company = COMPANIES[number % len(COMPANIES)]
+        suffix = SUFFIXES[number % len(SUFFIXES)]
+        yield f"{company} {suffix} {number}"
+
+
+def provider_weights(count, zipf=ZIPF_EXPONENT):
+    """Return the cumulative Zipf weights of `count` providers by rank."""
+    return list(itertools.accumulate(1 / rank**zipf for rank in range(1, count + 1)))
+
+
+def article_batches(
+    provider_nos,
+    count,
+    seed=0,
+    zipf=ZIPF_EXPONENT,
+    price_median=PRICE_MEDIAN,
+    price_sigma=PRICE_SIGMA,
+    batch_size=BATCH_SIZE,
+    first=1,
+):
+    """
+    Yield batches of `count` articles in total, as (names, prices,
+    provider_nos) lists. Names are numbered from `first`.
+    """
+    if not count:
+        return
+    weights = provider_weights(len(provider_nos), zipf)
+    mu = math.log(price_median)
+    if numpy is not None:
+        rng = numpy.random.default_rng(seed)
+        providers = numpy.array(provider_nos)
+        bounds = numpy.array(weights) / weights[-1]
+    else:
+        rng = random.Random(seed)
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        if numpy is not None:
+            ranks = numpy.searchsorted(bounds, rng.random(size), side="right")
+            owners = providers[numpy.minimum(ranks, len(providers) - 1)].tolist()
+            prices = numpy.clip(
+                numpy.rint(rng.lognormal(mu, price_sigma, size)), 1, MAX_PRICE
+            )
+            prices = prices.astype(numpy.int64).tolist()
+            adjectives = rng.integers(len(ADJECTIVES), size=size).tolist()
+            nouns = rng.integers(len(NOUNS), size=size).tolist()
+        else:
+            owners = rng.choices(provider_nos, cum_weights=weights, k=size)
+            prices = [
+                min(MAX_PRICE, max(1, round(rng.lognormvariate(mu, price_sigma))))
+                for _ in range(size)
+            ]
+            adjectives = [rng.randrange(len(ADJECTIVES)) for _ in range(size)]
+            nouns = [rng.randrange(len(NOUNS)) for _ in range(size)]
+        serial = first + start
+        names = [
+            f"{ADJECTIVES[adjective]} {NOUNS[noun]} {serial + offset}"
+            for offset, (adjective, noun) in enumerate(zip(adjectives, nouns))
+        ]
+        yield names, prices, owners
+
+
+def copy_batch(cursor, names, prices, provider_nos):
+    """Write one batch of articles with `COPY ... FROM STDIN`."""
+    quote = cursor.db.ops.quote_name
+    opts = Article._meta
+    sql = COPY_SQL.format(
+        table=quote(opts.db_table),
+        article_name=quote(opts.get_field("article_name").column),
+        price=quote(opts.get_field("price").column),
+        provider_no=quote(opts.get_field("provider_no").column),
+    )
+    # Generated names hold no tab, newline or backslash to escape.
+    data = "".join(
+        f"{name}\t{price}\t{provider_no}\n"
+        for name, price, provider_no in zip(names, prices, provider_nos)
+    )
+    cursor.copy_expert(sql, io.StringIO(data))
+
+
+def clear_catalog(using):
+    """
+    Delete every article, provider and provider stats row and log the
+    deletes, without sending signals: callers update the other derived data.
+    """
+    connection = connections[using]
+    stats, *tables = [
+        connection.ops.quote_name(model._meta.db_table)
+        for model in (ProviderStats, Article, Provider)
+    ]
+    with connection.cursor() as cursor:
+        # The stats go before the change log is locked, see `seed_catalog`.
+        if connection.vendor == "postgresql":
+            cursor.execute(f"TRUNCATE {stats}")
+        else:
+            cursor.execute(f"DELETE FROM {stats}")
+        changes.record_query(Change.DELETE, Article.objects.using(using))
+        changes.record_query(Change.DELETE, Provider.objects.using(using))
+        if connection.vendor == "postgresql":
+            cursor.execute(f"TRUNCATE {', '.join(tables)}")
+        else:
+            for table in tables:
+                cursor.execute(f"DELETE FROM {table}")
+
+
+def seed_catalog(
+    providers,
+    articles,
+    seed=0,
+    zipf=ZIPF_EXPONENT,
+    price_median=PRICE_MEDIAN,
+    price_sigma=PRICE_SIGMA,
+    batch_size=BATCH_SIZE,
+    clear=False,
+    progress=None,
+):
+    """
+    Insert `providers` providers and `articles` articles, after deleting
+    the existing catalog with `clear`. `progress` is called with the
+    number of articles written after every batch.
+    """
+    using = router.db_for_write(Article)
+    connection = connections[using]
+    rng = random.Random(seed)
+    with transaction.atomic(using=using):
+        # Locks are taken in the order of the signal receivers: the table
+        # versions, then the provider stats, then the change log.
+        bump_versions(Article, Provider)
+        if clear:
+            clear_catalog(using)
+        last_provider = Provider.objects.using(using).order_by("-provider_no").first()
+        first_provider = last_provider.provider_no + 1 if last_provider else 1
+        last_article = Article.objects.using(using).order_by("-article_no").first()
+        Provider.objects.using(using).bulk_create(
+            (
+                Provider(provider_name=name)
+                for name in provider_names(providers, first_provider)
+            ),
+            batch_size=batch_size,
+        )
+        provider_nos = list(
+            Provider.objects.using(using)
+            .filter(provider_no__gte=first_provider)
+            .order_by("provider_no")
+            .values_list("provider_no", flat=True)
+        )
+        # Shuffled so that provider size does not follow the id order.
+        rng.shuffle(provider_nos)
+        written = 0
+        batches = article_batches(
+            provider_nos,
+            articles if provider_nos else 0,
+            seed=seed,
+            zipf=zipf,
+            price_median=price_median,
+            price_sigma=price_sigma,
+            batch_size=batch_size,
+            first=last_article.article_no + 1 if last_article else 1,
+        )
+        for names, prices, owners in batches:
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    copy_batch(cursor, names, prices, owners)
+            else:
+                Article.objects.using(using).bulk_create(
+                    Article(article_name=name, price=price, provider_no_id=owner)
+                    for name, price, owner in zip(names, prices, owners)
+                )
+            written += len(names)
+            if progress is not None:
+                progress(written)
+        refresh_provider_stats()
+        changes.record_query(
+            Change.CREATE,
+            Provider.objects.using(using).filter(provider_no__gte=first_provider),
+        )
+        changes.record_query(
+            Change.CREATE,
+            Article.objects.using(using).filter(
+                article_no__gt=last_article.article_no if last_article else 0
+            ),
+        )
+        autocomplete.invalidate(Article, Provider)
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            for model in (Provider, Article):
+                table = connection.ops.quote_name(model._meta.db_table)
+                cursor.execute(f"ANALYZE {table}")
+    return len(provider_nos), written
@@ -0,0 +1,53 @@
+"""
+PostgreSQL database backend borrowing connections from a pool.
+
+Configured like `django.db.backends.postgresql`, plus an optional `POOL`
+dict in the database settings (`MIN_SIZE`, `MAX_SIZE`, `TIMEOUT`).
+Closing a connection, e.g. at the end of a request with `CONN_MAX_AGE`
+0, returns it to the pool instead of disconnecting. With
+`CONN_HEALTH_CHECKS`, connections are pinged when borrowed and dead ones
+are replaced.
+"""
+import psycopg2.extras
+from django.db.backends.postgresql import base
+
+from core.db.pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL connection wrapper backed by `core.db.pool`."""
+
+    def get_pool(self, conn_params=None):
+        """Return the pool of this database."""
+        if conn_params is None:
+            conn_params = self.get_connection_params()
+        return get_pool(
+            self.alias,
+            conn_params,
+            self.settings_dict.get("POOL", {}),
+            check=self.settings_dict["CONN_HEALTH_CHECKS"],
+        )
+
+    def get_new_connection(self, conn_params):
+        connection = self.get_pool(conn_params).getconn()
+
+        # Same session setup as the stock backend, see its
+        # get_new_connection().
+        options = self.settings_dict["OPTIONS"]
+        try:
+            self.isolation_level = options["isolation_level"]
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                # Rolls back any open transaction before reuse.
+                return self.get_pool().putconn(self.connection)
@@ -0,0 +1,28 @@
+"""
+Transforms used by the article queries.
+"""
+from django.db import models
+from django.db.models import Transform
+
+# Collations comparing strings code point by code point, by vendor.
+BYTEWISE_COLLATIONS = {"postgresql": "C", "sqlite": "BINARY"}
+
+
+@models.CharField.register_lookup
+class Bytewise(Transform):
+    """
+    `field__bytewise`: the column under a collation comparing code points.
+
+    The strings starting with a prefix then form a single range, so one
+    index built with that collation serves both the prefix match and the
+    ordering, which locale collations cannot.
+    """
+
+    lookup_name = "bytewise"
+
+    def as_sql(self, compiler, connection):
+        sql, params = compiler.compile(self.lhs)
+        collation = BYTEWISE_COLLATIONS.get(connection.vendor)
+        if collation is not None:
+            sql = f"{sql} COLLATE {connection.ops.quote_name(collation)}"
+        return sql, params
@@ -0,0 +1,147 @@
+"""
+Process-wide PostgreSQL connection pools.
+
+One pool per database alias, created on the first connection so forked
+workers never share sockets. Used by the `core.db.backends.postgresql_pool`
+database backend.
+"""
+import threading
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool(ThreadedConnectionPool):
+    """
+    `ThreadedConnectionPool` that waits for a free connection and counts.
+
+    psycopg2's pool raises as soon as `maxconn` connections are checked
+    out; this one blocks for up to `timeout` seconds instead. Idle
+    connections beyond `minconn` are closed when returned, as in psycopg2.
+    Broken connections are discarded when returned, and with `check` idle
+    connections are pinged before they are handed out again.
+    """
+
+    def __init__(self, minconn, maxconn, *args, timeout=None, check=False, **kwargs):
+        self.timeout = timeout
+        self.check = check
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._stats_lock = threading.Lock()
+        self.in_use = self.waiting = self.created = self.timeouts = 0
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def _connect(self, key=None):
+        connection = super()._connect(key)
+        with self._stats_lock:
+            self.created += 1
+        return connection
+
+    def getconn(self, key=None):
+        with self._stats_lock:
+            self.waiting += 1
+        acquired = self._slots.acquire(timeout=self.timeout)
+        with self._stats_lock:
+            self.waiting -= 1
+            if not acquired:
+                self.timeouts += 1
+        if not acquired:
+            raise PoolError(
+                f"No database connection available within {self.timeout}s "
+                f"({self.maxconn} in use)."
+            )
+        try:
+            connection = self._checkout(key)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._stats_lock:
+            self.in_use += 1
+        return connection
+
+    def _checkout(self, key):
+        # Every idle connection may be dead, e.g. after a database restart;
+        # the last attempt then opens a new one.
+        for attempt in range(self.maxconn + 1):
+            connection = super().getconn(key)
+            if self._is_usable(connection):
+                return connection
+            super().putconn(connection, close=True)
+        raise PoolError("Could not get a usable database connection.")
+
+    def _is_usable(self, connection):
+        if connection.closed:
+            return False
+        if not self.check:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def _reset(self, connection):
+        """Roll back `connection` for reuse, return whether it still works."""
+        if connection.closed:
+            return False
+        status = connection.info.transaction_status
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def putconn(self, conn, key=None, close=False):
+        try:
+            super().putconn(conn, key, close or not self._reset(conn))
+        finally:
+            with self._stats_lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def stats(self):
+        """Return the pool size limits and counters."""
+        with self._stats_lock:
+            return {
+                "min": self.minconn,
+                "max": self.maxconn,
+                "in_use": self.in_use,
+                "idle": len(self._pool),
+                "waiting": self.waiting,
+                "created": self.created,
+                "timeouts": self.timeouts,
+            }
+
+
+def get_pool(alias, conn_params, options, check=False):
+    """
+    Return the pool of database `alias`, creating it on first use.
+
+    With `check`, connections are pinged before they are handed out.
+    """
+    pool = _pools.get(alias)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(alias)
+            if pool is None:
+                pool = _pools[alias] = ConnectionPool(
+                    options.get("MIN_SIZE", 1),
+                    options.get("MAX_SIZE", 10),
+                    timeout=options.get("TIMEOUT"),
+                    check=check,
+                    **conn_params,
+                )
+    return pool
+
+
+def pool_stats():
+    """Return the stats of every pool of this process, by database alias."""
+    return [{"alias": alias, **pool.stats()} for alias, pool in sorted(_pools.items())]
@@ -0,0 +1,128 @@
+"""
+Database router sending reads to replicas.
+
+Reads go round-robin to the aliases in `settings.DATABASE_REPLICAS`,
+skipping replicas whose last health check failed, and writes go to the
+primary (`default`). Within a `routing_context`, e.g. a request, every
+read uses the replica picked for its first one, so a response is never
+assembled from replicas lagging by different amounts. Reads fall back to
+the primary when no replica is healthy, inside a transaction on the
+primary, and for clients that just wrote (see
+`ReplicaStickinessMiddleware`), so they read their own writes even while
+replicas lag behind.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+PRIMARY = DEFAULT_DB_ALIAS
+
+_routing = contextvars.ContextVar("db_routing", default=None)
+
+_health = {}
+_counter_lock = threading.Lock()
+_counter = 0
+
+
+@contextmanager
+def routing_context(pinned=False):
+    """
+    Track writes of the enclosed code and route its reads after them, or
+    all of them if `pinned`, to the primary; other reads share one replica.
+    Yield the routing state.
+    """
+    state = {"pinned": pinned, "wrote": False, "replica": None}
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+
+
+def route_iterator(iterable, state):
+    """
+    Iterate `iterable` under the routing `state` of a `routing_context`.
+
+    For content consumed after the context exited, like the body of a
+    streaming response, whose lazy queries would otherwise not be routed.
+    """
+    iterator = iter(iterable)
+    while True:
+        token = _routing.set(state)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _routing.reset(token)
+        yield item
+
+
+def check_replica(alias):
+    """Return whether replica `alias` accepts queries."""
+    try:
+        connection = connections[alias]
+        connection.ensure_connection()
+        return connection.is_usable()
+    except DatabaseError:
+        return False
+
+
+def is_healthy(alias):
+    """Return the health of `alias`, checking it at most once per interval."""
+    healthy, checked_at = _health.get(alias, (True, None))
+    now = time.monotonic()
+    if checked_at is None or now - checked_at >= settings.DB_REPLICA_CHECK_INTERVAL:
+        healthy = check_replica(alias)
+        _health[alias] = (healthy, now)
+    return healthy
+
+
+def next_replica():
+    """Return the next healthy replica in round-robin order, or None."""
+    global _counter
+    replicas = settings.DATABASE_REPLICAS
+    for _ in range(len(replicas)):
+        with _counter_lock:
+            alias = replicas[_counter % len(replicas)]
+            _counter += 1
+        if is_healthy(alias):
+            return alias
+    return None
+
+
+class ReplicaRouter:
+    """Route reads to healthy replicas and writes to the primary."""
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is not None and (state["pinned"] or state["wrote"]):
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        if state is None:
+            return next_replica() or PRIMARY
+        if state["replica"] is None:
+            state["replica"] = next_replica() or PRIMARY
+        return state["replica"]
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state["wrote"] = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,138 @@
+"""
+Provider deletion in the background, a batch of articles at a time.
+
+Deleting a provider through the ORM cascades to all of its articles in a
+single transaction, which holds row locks for as long as that takes on
+large providers. `start_provider_deletion` instead marks the provider as
+deleting, which hides it from the API, records a `ProviderDeletion` and
+queues a `delete_provider` job (`core.tasks`). The job runs
+`run_provider_deletion`, which deletes the articles
+`PROVIDER_DELETE_BATCH_SIZE` at a time, each batch in a short
+transaction of its own, updates the progress of the deletion after every
+batch and deletes the provider itself last.
+
+Runs are idempotent, so interrupted deletions are taken over by job
+retries, or finished by the `run_provider_deletions` command.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core import autocomplete, jobs
+from core.cache import bump_versions
+from core.models import Article, Provider, ProviderDeletion, ProviderStats
+
+logger = logging.getLogger(__name__)
+
+UNFINISHED = [ProviderDeletion.PENDING, ProviderDeletion.RUNNING]
+
+
+def start_provider_deletion(provider):
+    """
+    Mark `provider` as deleting, queue the job deleting it and return its
+    `ProviderDeletion`, or None when the provider is already being deleted.
+    """
+    with transaction.atomic():
+        marked = Provider.objects.filter(pk=provider.pk, deleting=False).update(
+            deleting=True
+        )
+        if not marked:
+            return None
+        provider.deleting = True
+        total = (
+            ProviderStats.objects.filter(provider_no=provider.pk)
+            .values_list("article_count", flat=True)
+            .first()
+        )
+        deletion = ProviderDeletion.objects.create(
+            provider_no=provider.pk,
+            provider_name=provider.provider_name,
+            articles_total=total or 0,
+        )
+        bump_versions(Provider)
+        autocomplete.names_deleted(Provider, [provider.pk])
+        jobs.enqueue("delete_provider", deletion_id=deletion.pk)
+    return deletion
+
+
+def _update(deletion_id, **fields):
+    ProviderDeletion.objects.filter(pk=deletion_id).update(
+        updated_at=timezone.now(), **fields
+    )
+
+
+def run_provider_deletion(deletion_id, batch_size=None, progress=None):
+    """
+    Delete the articles of a deletion's provider in batches of
+    `batch_size`, then the provider, and return the updated deletion.
+    `progress` is called with the number of articles deleted and the
+    expected total after every batch. Failures are logged and recorded
+    on the deletion.
+    """
+    batch_size = batch_size or settings.PROVIDER_DELETE_BATCH_SIZE
+    with transaction.atomic():
+        deletion = ProviderDeletion.objects.get(pk=deletion_id)
+        provider_no = deletion.provider_no
+        deleted_total = deletion.articles_deleted
+        _update(
+            deletion_id, status=ProviderDeletion.RUNNING, error="", finished_at=None
+        )
+    try:
+        while True:
+            with transaction.atomic():
+                article_nos = list(
+                    Article.objects.filter(provider_no=provider_no)
+                    .order_by()
+                    .values_list("article_no", flat=True)[:batch_size]
+                )
+                if not article_nos:
+                    break
+                # Derived data is updated from the articles_deleted signal.
+                deleted, _ = Article.objects.filter(pk__in=article_nos).delete()
+                _update(
+                    deletion_id, articles_deleted=F("articles_deleted") + deleted
+                )
+            deleted_total += deleted
+            if progress is not None:
+                progress(deleted_total, deletion.articles_total)
+            if settings.PROVIDER_DELETE_BATCH_PAUSE:
+                # Leaves the database to other writers between batches.
+                time.sleep(settings.PROVIDER_DELETE_BATCH_PAUSE)
+        with transaction.atomic():
+            # Also takes articles added since the last batch and the stats.
+            Provider.objects.filter(pk=provider_no).delete()
+            _update(
+                deletion_id,
+                status=ProviderDeletion.DONE,
+                finished_at=timezone.now(),
+            )
+    except Exception as exc:
+        logger.exception("Deleting provider %s failed", provider_no)
+        _update(
+            deletion_id,
+            status=ProviderDeletion.FAILED,
+            error=str(exc),
+            finished_at=timezone.now(),
+        )
+    with transaction.atomic():
+        return ProviderDeletion.objects.get(pk=deletion_id)
+
+
+def resume_provider_deletions(failed=False, batch_size=None):
+    """
+    Run the unfinished deletions, and the failed ones with `failed`,
+    oldest first. Yield every deletion once it has run.
+    """
+    statuses = UNFINISHED + [ProviderDeletion.FAILED] if failed else UNFINISHED
+    with transaction.atomic():
+        deletion_ids = list(
+            ProviderDeletion.objects.filter(status__in=statuses)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+    for deletion_id in deletion_ids:
+        yield run_provider_deletion(deletion_id, batch_size)
@@ -0,0 +1,258 @@
+"""
+Background jobs stored in the database, without a separate broker.
+
+Functions registered with `task` are queued as `Job` rows by `enqueue`,
+usually from a view, and run later by the `run_workers` command. Work
+queued within a transaction only becomes visible to workers once it
+commits, like the rest of the transaction.
+
+Workers claim the oldest ready job with `SELECT ... FOR UPDATE SKIP
+LOCKED`, so any number of them share the queue without blocking each
+other, and lease it for its timeout. An attempt that raises or exceeds
+its timeout is retried after `JOB_RETRY_DELAY` seconds, doubled on every
+attempt, until `max_attempts` have run. A job whose worker died is
+claimed again once its lease expires, so tasks must be idempotent; the
+outcome of an attempt that lost its job that way is dropped.
+
+Timeouts interrupt the Python code of a task with `SIGALRM`, which works
+in the main thread of a worker process; elsewhere only the lease bounds
+a job.
+"""
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+# Seconds a lease outlasts the timeout, for the worker to record the outcome.
+LEASE_GRACE = 30
+
+
+class JobTimeout(BaseException):
+    """
+    Raised in a task that ran out of time.
+
+    Not an Exception, so that tasks catching errors do not swallow it.
+    """
+
+
+class Task:
+    """A function run by jobs of the same name."""
+
+    def __init__(self, name, func, timeout=None, max_attempts=None):
+        self.name = name
+        self.func = func
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+
+
+def task(name, timeout=None, max_attempts=None):
+    """
+    Register the decorated function as the task `name`. It is called
+    with its job and the keyword arguments given to `enqueue`, and may
+    return a JSON serializable result.
+    """
+
+    def register(func):
+        TASKS[name] = Task(name, func, timeout, max_attempts)
+        return func
+
+    return register
+
+
+def enqueue(name, run_after=None, **args):
+    """Queue a job running the task `name` with `args` and return it."""
+    if name not in TASKS:
+        raise ValueError(f"Unknown task: {name}")
+    registered = TASKS[name]
+    return Job.objects.create(
+        name=name,
+        args=args,
+        timeout=registered.timeout or settings.JOB_TIMEOUT,
+        max_attempts=registered.max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_after=run_after or timezone.now(),
+    )
+
+
+def set_progress(job, done, total):
+    """Record that `done` out of `total` units of `job` are done."""
+    job.progress = round(min(done / total, 1), 4) if total else 0.0
+    Job.objects.filter(pk=job.pk).update(
+        progress=job.progress, updated_at=timezone.now()
+    )
+
+
+def worker_name():
+    """Return the name recorded on the jobs claimed by this process."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim(worker):
+    """
+    Claim the oldest ready job for `worker` and return it, or None when
+    no job is ready. Jobs whose lease expired are ready again, unless
+    they have no attempt left.
+    """
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            job = (
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=Job.QUEUED, run_after__lte=now)
+                    | Q(status=Job.RUNNING, locked_until__lt=now)
+                )
+                .order_by("run_after", "id")
+                .first()
+            )
+            if job is None:
+                return None
+            if job.status == Job.RUNNING and job.attempts >= job.max_attempts:
+                finish(job, Job.FAILED, error="The worker running the job stopped.")
+                continue
+            fields = {
+                "status": Job.RUNNING,
+                "attempts": job.attempts + 1,
+                "worker": worker,
+                "started_at": now,
+                "updated_at": now,
+                "locked_until": now + timedelta(seconds=job.timeout + LEASE_GRACE),
+            }
+            # Guards against a concurrent claim where rows cannot be locked.
+            claimed = Job.objects.filter(
+                pk=job.pk, status=job.status, attempts=job.attempts
+            ).update(**fields)
+            if not claimed:
+                continue
+        for name, value in fields.items():
+            setattr(job, name, value)
+        return job
+
+
+def finish(job, status, **fields):
+    """Record the outcome of `job`."""
+    now = timezone.now()
+    fields.update(status=status, locked_until=None, updated_at=now, finished_at=now)
+    if status == Job.DONE:
+        fields["progress"] = 1.0
+    _record(job, fields)
+
+
+def retry_or_fail(job, error):
+    """Queue `job` again after a failed attempt, or fail it for good."""
+    if job.attempts >= job.max_attempts:
+        finish(job, Job.FAILED, error=error)
+        return
+    delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+    fields = {
+        "status": Job.QUEUED,
+        "error": error,
+        "locked_until": None,
+        "run_after": timezone.now() + timedelta(seconds=delay),
+        "updated_at": timezone.now(),
+    }
+    _record(job, fields)
+
+
+def _record(job, fields):
+    """Save `fields` of the running `job`, unless another attempt claimed it."""
+    recorded = Job.objects.filter(
+        pk=job.pk, status=Job.RUNNING, attempts=job.attempts
+    ).update(**fields)
+    if not recorded:
+        logger.warning(
+            "Job %s was claimed again, dropping attempt %s", job, job.attempts
+        )
+        return
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+
+@contextmanager
+def time_limit(seconds):
+    """Raise JobTimeout in the block after `seconds`, in the main thread."""
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expire(signum, frame):
+        raise JobTimeout(f"Timed out after {seconds}s.")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def execute(job):
+    """Run one attempt of a claimed job and record its outcome."""
+    started = time.perf_counter()
+    try:
+        if job.name not in TASKS:
+            raise ValueError(f"Unknown task: {job.name}")
+        with time_limit(job.timeout):
+            result = TASKS[job.name].func(job, **job.args)
+    except (Exception, JobTimeout) as exc:
+        logger.warning("Job %s failed: %s", job, exc, exc_info=True)
+        retry_or_fail(job, str(exc) or exc.__class__.__name__)
+    else:
+        finish(job, Job.DONE, result=result, error="")
+    logger.info("Job %s ran in %.1fs", job, time.perf_counter() - started)
+    return job
+
+
+def release_connections():
+    """Close broken or expired connections, as after a request."""
+    # Not within a transaction, e.g. when a test runs jobs.
+    if not connection.in_atomic_block:
+        close_old_connections()
+
+
+def work(worker=None, once=False, poll_interval=None, stop=None, report=None):
+    """
+    Claim and run jobs until `stop` is set, or with `once` until no job
+    is ready. `report` is called with every job run. Return the number
+    of jobs run.
+    """
+    worker = worker or worker_name()
+    if poll_interval is None:
+        poll_interval = settings.JOB_POLL_INTERVAL
+    stop = stop or threading.Event()
+    count = 0
+    while not stop.is_set():
+        release_connections()
+        try:
+            job = claim(worker)
+        except DatabaseError:
+            # E.g. the database restarted: keep the worker up and try again.
+            logger.exception("Claiming a job failed")
+            stop.wait(poll_interval)
+            continue
+        if job is None:
+            if once:
+                break
+            stop.wait(poll_interval)
+            continue
+        execute(job)
+        count += 1
+        if report is not None:
+            report(job)
+    release_connections()
+    return count
@@ -0,0 +1,360 @@
+"""
+Django command to import providers and articles from CSV/NDJSON files
+"""
+import csv
+import io
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.db.models.expressions import RawSQL
+
+from core import autocomplete, changes, jobs
+from core.cache import bump_versions
+from core.models import Article, Change, Provider
+from core.stats import refresh_provider_stats
+
+COLUMNS = ("provider_name", "article_name", "price")
+
+STAGING_TABLE = "import_article_staging"
+
+# Ids of the rows the merge inserted, for the change log.
+CREATED_TABLE = "import_created"
+
+MERGE_SQL = """
+WITH staged AS (
+    SELECT DISTINCT provider_name, article_name, price
+    FROM {staging}
+    WHERE provider_name <> '' AND article_name <> '' AND price IS NOT NULL
+        AND length(provider_name) <= 255 AND length(article_name) <= 255
+),
+new_providers AS (
+    INSERT INTO {provider} ({provider_name}, {deleting})
+    SELECT DISTINCT provider_name, false FROM staged
+    ON CONFLICT ({provider_name}) DO NOTHING
+    RETURNING {provider_no}, {provider_name}
+),
+providers AS (
+    SELECT {provider_no}, {provider_name} FROM new_providers
+    UNION ALL
+    SELECT {provider_no}, {provider_name} FROM {provider}
+    WHERE {provider_name} IN (SELECT provider_name FROM staged)
+        AND NOT {deleting}
+),
+new_articles AS (
+    INSERT INTO {article} ({article_name}, {price}, {article_provider})
+    SELECT staged.article_name, staged.price, providers.{provider_no}
+    FROM staged
+    JOIN providers ON providers.{provider_name} = staged.provider_name
+    ON CONFLICT ({article_name}, {price}, {article_provider}) DO NOTHING
+    RETURNING {article_no}
+),
+created AS (
+    INSERT INTO {created} (model, id)
+    SELECT 'provider', {provider_no} FROM new_providers
+    UNION ALL
+    SELECT 'article', {article_no} FROM new_articles
+)
+SELECT (SELECT count(*) FROM new_providers), (SELECT count(*) FROM new_articles)
+"""
+
+
+def detect_format(path, default=None):
+    """Return the input format of `path` from its extension."""
+    if default:
+        return default
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".ndjson", ".jsonl"):
+        return "ndjson"
+    raise CommandError(f"Cannot tell the format of {path}, use --format.")
+
+
+def read_csv_header(stream):
+    """Consume the header line of a CSV stream and return its columns."""
+    header = next(csv.reader([stream.readline()]), [])
+    columns = tuple(column.strip() for column in header)
+    if sorted(columns) != sorted(COLUMNS):
+        raise CommandError(
+            f"Expected CSV columns {', '.join(COLUMNS)}, got {', '.join(columns)}."
+        )
+    return columns
+
+
+def iter_rows(stream, fmt):
+    """Yield (provider_name, article_name, price) tuples from `stream`."""
+    if fmt == "csv":
+        columns = read_csv_header(stream)
+        for values in csv.reader(stream):
+            if values:
+                row = dict(zip(columns, values))
+                yield tuple(row[column] for column in COLUMNS)
+        return
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            raise CommandError(f"Invalid JSON on line {line_no}: {exc}")
+        yield tuple(row.get(column) for column in COLUMNS)
+
+
+class NDJSONToCSV:
+    """
+    Readable file object turning NDJSON lines into CSV text.
+
+    Lets `COPY ... FROM STDIN` consume NDJSON input without materializing
+    the converted file.
+    """
+
+    def __init__(self, stream):
+        self.rows = iter_rows(stream, "ndjson")
+        self.buffer = ""
+        self.out = io.StringIO()
+        self.writer = csv.writer(self.out)
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.writer.writerow(row)
+            self.buffer += self.out.getvalue()
+            self.out.seek(0)
+            self.out.truncate()
+        if size < 0:
+            size = len(self.buffer)
+        chunk, self.buffer = self.buffer[:size], self.buffer[size:]
+        return chunk
+
+
+class ProgressReader:
+    """Wrap a readable object and report progress while it is consumed."""
+
+    def __init__(self, stream, report, rows=0, interval=5.0):
+        self.stream = stream
+        self.report = report
+        self.interval = interval
+        self.rows = rows
+        self.last = time.perf_counter()
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.rows += data.count("\n")
+        now = time.perf_counter()
+        if now - self.last >= self.interval:
+            self.last = now
+            self.report(self.rows)
+        return data
+
+
+class Command(BaseCommand):
+    """Django command to bulk import articles"""
+
+    help = (
+        "Import articles from CSV/NDJSON files with provider_name, article_name "
+        "and price columns. Unknown providers are created; duplicate articles "
+        "and articles of providers being deleted are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help="CSV or NDJSON files.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "ndjson"],
+            help="Input format, detected from the file extension by default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per batch on databases without COPY support.",
+        )
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Queue the import as a job for run_workers instead.",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        if options["background"]:
+            job = jobs.enqueue(
+                "import_articles",
+                files=[str(Path(path).resolve()) for path in options["files"]],
+                format=options["format"],
+                batch_size=options["batch_size"],
+            )
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.pk}."))
+            return
+        self.started = time.perf_counter()
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                rows, providers, articles = self.copy_and_merge(options)
+            else:
+                rows, providers, articles = self.batch_insert(options)
+            bump_versions(Article, Provider)
+            autocomplete.invalidate(Article, Provider)
+            if articles:
+                self.stdout.write("Refreshing provider stats...")
+                refresh_provider_stats()
+            self.record_created()
+        elapsed = time.perf_counter() - self.started
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {articles} articles and {providers} providers from "
+                f"{rows} rows ({rows - articles} skipped) in {elapsed:.1f}s "
+                f"({rate:,.0f} rows/s)."
+            )
+        )
+
+    def report(self, rows):
+        """Print a progress line."""
+        elapsed = time.perf_counter() - self.started
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(f"  {rows:,} rows read ({rate:,.0f} rows/s)")
+
+    def copy_and_merge(self, options):
+        """COPY every file into a staging table, then merge it in one statement."""
+        quote = connection.ops.quote_name
+
+        def column(model, name):
+            return quote(model._meta.get_field(name).column)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {STAGING_TABLE} "
+                "(provider_name text, article_name text, price integer) "
+                "ON COMMIT DROP"
+            )
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {CREATED_TABLE} (model text, id bigint) "
+                "ON COMMIT DROP"
+            )
+            rows = 0
+            for path in options["files"]:
+                fmt = detect_format(path, options["format"])
+                self.stdout.write(f"Copying {path}...")
+                with open(path, newline="", encoding="utf-8") as stream:
+                    if fmt == "csv":
+                        columns = read_csv_header(stream)
+                        source = stream
+                    else:
+                        columns = COLUMNS
+                        source = NDJSONToCSV(stream)
+                    reader = ProgressReader(source, self.report, rows)
+                    try:
+                        cursor.copy_expert(
+                            f"COPY {STAGING_TABLE} ({', '.join(columns)}) "
+                            "FROM STDIN WITH (FORMAT csv)",
+                            reader,
+                        )
+                    except DatabaseError as exc:
+                        raise CommandError(f"Failed to copy {path}: {exc}")
+                    rows += cursor.rowcount
+                    self.report(rows)
+
+            self.stdout.write(f"Merging {rows:,} staged rows...")
+            cursor.execute(
+                MERGE_SQL.format(
+                    staging=STAGING_TABLE,
+                    provider=quote(Provider._meta.db_table),
+                    provider_no=column(Provider, "provider_no"),
+                    provider_name=column(Provider, "provider_name"),
+                    deleting=column(Provider, "deleting"),
+                    article=quote(Article._meta.db_table),
+                    article_no=column(Article, "article_no"),
+                    article_name=column(Article, "article_name"),
+                    price=column(Article, "price"),
+                    article_provider=column(Article, "provider_no"),
+                    created=CREATED_TABLE,
+                )
+            )
+            providers, articles = cursor.fetchone()
+        return rows, providers, articles
+
+    def batch_insert(self, options):
+        """Insert rows in batches through the ORM."""
+        rows = providers = articles = 0
+        self.created = {Provider: [], Article: []}
+        for path in options["files"]:
+            fmt = detect_format(path, options["format"])
+            self.stdout.write(f"Loading {path}...")
+            with open(path, newline="", encoding="utf-8") as stream:
+                batch = []
+                for row in iter_rows(stream, fmt):
+                    batch.append(row)
+                    if len(batch) == options["batch_size"]:
+                        created = self.insert_batch(batch)
+                        providers += created[0]
+                        articles += created[1]
+                        rows += len(batch)
+                        batch = []
+                        self.report(rows)
+                if batch:
+                    created = self.insert_batch(batch)
+                    providers += created[0]
+                    articles += created[1]
+                    rows += len(batch)
+        return rows, providers, articles
+
+    def record_created(self):
+        """
+        Log the created rows. The change log is locked last, after the
+        table versions and provider stats, like in the signal receivers.
+        """
+        if connection.vendor == "postgresql":
+            for model, name in ((Provider, "provider"), (Article, "article")):
+                created = RawSQL(
+                    f"SELECT id FROM {CREATED_TABLE} WHERE model = %s", [name]
+                )
+                changes.record_query(
+                    Change.CREATE, model.objects.filter(pk__in=created)
+                )
+        else:
+            for model, pks in self.created.items():
+                changes.record(model, Change.CREATE, pks)
+
+    def insert_batch(self, batch):
+        """Insert one batch of rows and return the (providers, articles) created."""
+        valid = []
+        for provider_name, article_name, price in batch:
+            try:
+                price = int(price)
+            except (TypeError, ValueError):
+                continue
+            if provider_name and article_name:
+                valid.append((str(provider_name), str(article_name), price))
+
+        names = {provider_name for provider_name, _, _ in valid}
+        existing = set(
+            Provider.objects.filter(provider_name__in=names).values_list(
+                "provider_name", flat=True
+            )
+        )
+        new_providers = Provider.objects.bulk_upsert(sorted(names - existing))
+        # Rows of providers being deleted are skipped.
+        provider_ids = dict(
+            Provider.objects.active()
+            .filter(provider_name__in=names)
+            .values_list("provider_name", "provider_no")
+        )
+        inserted = Article.objects.bulk_upsert(
+            [
+                Article(
+                    article_name=article_name,
+                    price=price,
+                    provider_no_id=provider_ids[provider_name],
+                )
+                for provider_name, article_name, price in valid
+                if provider_name in provider_ids
+            ]
+        )
+        self.created[Provider].extend(new_providers)
+        self.created[Article].extend(inserted)
+        return len(new_providers), len(inserted)
@@ -0,0 +1,109 @@
+"""
+Django command to report index usage and size from pg_stat_user_indexes
+"""
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+INDEX_SQL = """
+SELECT
+    s.relname,
+    s.indexrelname,
+    s.idx_scan,
+    s.idx_tup_read,
+    s.idx_tup_fetch,
+    pg_relation_size(s.indexrelid),
+    i.indisunique OR i.indisprimary,
+    pg_get_indexdef(s.indexrelid)
+FROM pg_stat_user_indexes s
+JOIN pg_index i ON i.indexrelid = s.indexrelid
+WHERE s.relname = ANY(%s)
+ORDER BY s.relname, pg_relation_size(s.indexrelid) DESC
+"""
+
+TABLE_SQL = """
+SELECT relname, seq_scan, seq_tup_read, idx_scan, n_live_tup
+FROM pg_stat_user_tables
+WHERE relname = ANY(%s)
+ORDER BY relname
+"""
+
+
+def format_size(size):
+    """Return a byte count in human readable units."""
+    for unit in ("B", "kB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+class Command(BaseCommand):
+    """Django command to report index usage"""
+
+    help = (
+        "Report scans, tuples read and size of every index of the app tables, "
+        "from PostgreSQL's cumulative statistics. Unused non-unique indexes "
+        "only cost writes and are flagged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "tables",
+            nargs="*",
+            help="Tables to report, every table of the core app by default.",
+        )
+        parser.add_argument(
+            "--unused",
+            action="store_true",
+            help="Only list non-unique indexes that were never scanned.",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        if connection.vendor != "postgresql":
+            raise CommandError("index_report requires PostgreSQL statistics views.")
+
+        tables = options["tables"] or [
+            model._meta.db_table for model in apps.get_app_config("core").get_models()
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(TABLE_SQL, [tables])
+            table_rows = cursor.fetchall()
+            cursor.execute(INDEX_SQL, [tables])
+            index_rows = cursor.fetchall()
+
+        if not options["unused"]:
+            for table, seq_scan, seq_read, idx_scan, live in table_rows:
+                self.stdout.write(
+                    f"{table}: {live or 0:,} rows, {seq_scan or 0:,} sequential "
+                    f"scans ({seq_read or 0:,} rows read), {idx_scan or 0:,} "
+                    "index scans"
+                )
+            self.stdout.write("")
+
+        self.stdout.write(
+            f"{'table':<20} {'index':<40} {'scans':>12} {'read':>14} "
+            f"{'fetched':>14} {'size':>10}"
+        )
+        unused = 0
+        for table, name, scans, read, fetched, size, unique, definition in index_rows:
+            never_used = scans == 0 and not unique
+            if options["unused"] and not never_used:
+                continue
+            unused += never_used
+            line = (
+                f"{table:<20} {name:<40} {scans:>12,} {read:>14,} "
+                f"{fetched:>14,} {format_size(size):>10}"
+            )
+            self.stdout.write(self.style.WARNING(line) if never_used else line)
+            if options["verbosity"] > 1:
+                self.stdout.write(f"    {definition}")
+
+        if unused:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{unused} non-unique indexes were never scanned since the "
+                    "statistics were last reset."
+                )
+            )
@@ -0,0 +1,45 @@
+"""
+Django command to rebuild the provider stats summary table
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import jobs
+from core.cache import bump_versions
+from core.models import Article, ProviderStats
+from core.stats import refresh_provider_stats
+
+
+class Command(BaseCommand):
+    """Django command to rebuild the provider stats"""
+
+    help = (
+        "Aggregate the article stats of every provider again. The stats are "
+        "maintained as articles are written; this repairs them after writes "
+        "made outside the application, e.g. with SQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Queue the refresh as a job for run_workers instead.",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        if options["background"]:
+            job = jobs.enqueue("refresh_provider_stats")
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.pk}."))
+            return
+        started = time.perf_counter()
+        refresh_provider_stats()
+        bump_versions(Article)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Refreshed the stats of {ProviderStats.objects.count()} "
+                f"providers in {elapsed:.1f}s."
+            )
+        )
@@ -0,0 +1,50 @@
+"""
+Django command to finish background provider deletions
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.deletion import resume_provider_deletions
+from core.models import ProviderDeletion
+
+
+class Command(BaseCommand):
+    """Django command to run the unfinished provider deletions"""
+
+    help = (
+        "Run the provider deletions left pending or running, e.g. by a "
+        "restart of the application process, see core.deletion."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--failed", action="store_true", help="Retry failed deletions too."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Articles deleted per transaction, see PROVIDER_DELETE_BATCH_SIZE.",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        if options["batch_size"] is not None and options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+        finished = failed = 0
+        for deletion in resume_provider_deletions(
+            failed=options["failed"], batch_size=options["batch_size"]
+        ):
+            line = (
+                f"  {deletion.provider_name} ({deletion.provider_no}): "
+                f"{deletion.articles_deleted:,} articles deleted, {deletion.status}"
+            )
+            if deletion.status == ProviderDeletion.DONE:
+                finished += 1
+                self.stdout.write(line)
+            else:
+                failed += 1
+                self.stderr.write(f"{line}: {deletion.error}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Finished {finished} deletions, {failed} failed.")
+        )
+        if failed:
+            raise CommandError(f"{failed} deletions failed.")
@@ -0,0 +1,113 @@
+"""
+Django command to run background job workers
+"""
+import multiprocessing
+import signal
+import threading
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import jobs
+
+
+def run_process(worker, once, poll_interval, stop):
+    """Run jobs in a worker process until `stop` is set."""
+    if not apps.ready:
+        django.setup()
+    # The parent process handles Ctrl-C and stops its workers in between jobs.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    try:
+        jobs.work(worker, once=once, poll_interval=poll_interval, stop=stop)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    """Django command to run the queued background jobs"""
+
+    help = (
+        "Claim and run the queued background jobs, see core.jobs. SIGTERM or "
+        "Ctrl-C stops the workers once their current job is done."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Worker processes; 1 runs jobs in this process.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no job is ready, instead of waiting for more.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            help="Seconds idle workers wait, JOB_POLL_INTERVAL by default.",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        if options["processes"] < 1:
+            raise CommandError("--processes must be positive.")
+        if options["processes"] == 1:
+            self.run_here(options)
+        else:
+            self.run_processes(options)
+
+    def run_here(self, options):
+        """Run jobs in this process."""
+        stop = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        count = jobs.work(
+            once=options["once"],
+            poll_interval=options["poll_interval"],
+            stop=stop,
+            report=self.report,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Ran {count} jobs."))
+
+    def run_processes(self, options):
+        """Run jobs in worker processes until they exit or are stopped."""
+        # Forked processes must not share the connections of this one.
+        connections.close_all()
+        context = multiprocessing.get_context()
+        stop = context.Event()
+        processes = [
+            context.Process(
+                target=run_process,
+                args=(
+                    f"{jobs.worker_name()}-{index}",
+                    options["once"],
+                    options["poll_interval"],
+                    stop,
+                ),
+            )
+            for index in range(options["processes"])
+        ]
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        for process in processes:
+            process.start()
+        self.stdout.write(f"Started {len(processes)} worker processes.")
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping after the current jobs...")
+            stop.set()
+            for process in processes:
+                process.join()
+
+    def report(self, job):
+        """Print the outcome of a job."""
+        line = f"  {job}, attempt {job.attempts}/{job.max_attempts}"
+        if job.error and job.status != job.DONE:
+            line += f": {job.error}"
+        self.stdout.write(line)
@@ -0,0 +1,79 @@
+"""
+Django command to seed the database with a synthetic catalog
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import catalog
+
+
+class Command(BaseCommand):
+    """Django command to generate providers and articles"""
+
+    help = (
+        "Generate deterministic providers and articles, with Zipf distributed "
+        "articles per provider and log-normal prices, see core.catalog."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--providers", type=int, default=1000)
+        parser.add_argument("--articles", type=int, default=100000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--zipf",
+            type=float,
+            default=catalog.ZIPF_EXPONENT,
+            help="Skew of the articles per provider, 0 for an even spread.",
+        )
+        parser.add_argument("--price-median", type=int, default=catalog.PRICE_MEDIAN)
+        parser.add_argument(
+            "--price-sigma",
+            type=float,
+            default=catalog.PRICE_SIGMA,
+            help="Standard deviation of the logarithm of prices.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=catalog.BATCH_SIZE,
+            help="Articles generated and written per batch.",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete every existing provider and article first.",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        if options["providers"] < 1 and options["articles"] > 0:
+            raise CommandError("Articles need at least one provider.")
+        if options["batch_size"] < 1 or options["price_median"] < 1:
+            raise CommandError("--batch-size and --price-median must be positive.")
+        self.started = time.perf_counter()
+        providers, articles = catalog.seed_catalog(
+            options["providers"],
+            options["articles"],
+            seed=options["seed"],
+            zipf=options["zipf"],
+            price_median=options["price_median"],
+            price_sigma=options["price_sigma"],
+            batch_size=options["batch_size"],
+            clear=options["clear"],
+            progress=self.report,
+        )
+        elapsed = time.perf_counter() - self.started
+        rate = articles / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {articles:,} articles and {providers:,} providers in "
+                f"{elapsed:.1f}s ({rate:,.0f} rows/s)."
+            )
+        )
+
+    def report(self, rows):
+        """Print a progress line."""
+        elapsed = time.perf_counter() - self.started
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(f"  {rows:,} articles written ({rate:,.0f} rows/s)")
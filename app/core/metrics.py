@@ -0,0 +1,109 @@
+"""
+In-process request metrics, rendered in the Prometheus text format.
+
+Counters live in the memory of each worker process; scrape every worker
+(or run one per container) to get the full picture.
+"""
+import threading
+from bisect import bisect_left
+
+_lock = threading.Lock()
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Histogram of observations per label set."""
+
+    def __init__(self, name, help, buckets, labels=("method", "route")):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        self._series = {}
+
+    def observe(self, value, *label_values):
+        with _lock:
+            self._observe(value, label_values)
+
+    def _observe(self, value, label_values):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def reset(self):
+        with _lock:
+            self._series.clear()
+
+    def render(self):
+        """Return the histogram in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with _lock:
+            series = sorted(
+                (labels, list(counts), total)
+                for labels, (counts, total) in self._series.items()
+            )
+        for label_values, counts, total in series:
+            labels = ",".join(
+                f'{name}="{escape(value)}"'
+                for name, value in zip(self.labels, label_values)
+            )
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines)
+
+
+def escape(value):
+    """Escape a Prometheus label value."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_DURATION = Histogram(
+    "api_request_duration_seconds", "Wall time of requests.", DURATION_BUCKETS
+)
+DB_QUERIES = Histogram(
+    "api_db_queries_per_request", "SQL queries run per request.", QUERY_BUCKETS
+)
+DB_DURATION = Histogram(
+    "api_db_duration_seconds",
+    "Time spent in SQL queries per request.",
+    DURATION_BUCKETS,
+)
+RENDER_DURATION = Histogram(
+    "api_render_duration_seconds",
+    "Time spent serializing response bodies.",
+    DURATION_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "api_response_size_bytes", "Size of response bodies.", SIZE_BUCKETS
+)
+
+HISTOGRAMS = (REQUEST_DURATION, DB_QUERIES, DB_DURATION, RENDER_DURATION, RESPONSE_SIZE)
+
+
+def observe_many(label_values, observations):
+    """Record (histogram, value) pairs sharing `label_values` at once."""
+    with _lock:
+        for histogram, value in observations:
+            histogram._observe(value, label_values)
+
+
+def render_metrics():
+    """Return every metric in the Prometheus text format."""
+    return "\n".join(histogram.render() for histogram in HISTOGRAMS) + "\n"
+
+
+def reset_metrics():
+    """Drop every recorded observation."""
+    for histogram in HISTOGRAMS:
+        histogram.reset()
@@ -0,0 +1,190 @@
+"""
+Middleware shared by the APIs.
+"""
+import asyncio
+import contextvars
+from asyncio import iscoroutinefunction
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.decorators import sync_and_async_middleware
+
+from core import metrics
+from core.db.router import route_iterator, routing_context
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+@sync_and_async_middleware
+def replica_stickiness_middleware(get_response):
+    """
+    Read-your-writes for clients of the replica router.
+
+    Unsafe requests and requests carrying the primary cookie read from the
+    primary. Responses to requests that wrote set that cookie for
+    `DB_REPLICA_STICKY_SECONDS`, about the replication lag to cover.
+    Streaming content is read under the routing of its request.
+    """
+
+    def wants_primary(request):
+        return (
+            request.method not in SAFE_METHODS
+            or settings.DB_PRIMARY_COOKIE in request.COOKIES
+        )
+
+    def remember_write(request, response, state):
+        if response.streaming:
+            response.streaming_content = route_iterator(
+                response.streaming_content, state
+            )
+        if state["wrote"] or request.method not in SAFE_METHODS:
+            response.set_cookie(
+                settings.DB_PRIMARY_COOKIE,
+                "1",
+                max_age=settings.DB_REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            with routing_context(pinned=wants_primary(request)) as state:
+                response = await get_response(request)
+            return remember_write(request, response, state)
+
+    else:
+
+        def middleware(request):
+            with routing_context(pinned=wants_primary(request)) as state:
+                response = get_response(request)
+            return remember_write(request, response, state)
+
+    return middleware
+
+
+class QueryTimer:
+    """Number and total time of the SQL queries of a request."""
+
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+_query_timer = contextvars.ContextVar("query_timer", default=None)
+
+
+def time_queries(execute, sql, params, many, context):
+    """Execute wrapper adding each query to the timer of the current request."""
+    timer = _query_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.duration += perf_counter() - started
+        timer.count += 1
+
+
+def install_query_timer(sender=None, connection=None, **kwargs):
+    """
+    Add `time_queries` to the execute wrappers of `connection`, once.
+
+    Installing it for the lifetime of the connection is cheaper than
+    entering `connection.execute_wrapper()` for every database on every
+    request.
+    """
+    if time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_queries)
+
+
+class PerformanceMiddleware:
+    """
+    Record wall time, SQL queries, serialization time and response size
+    of every request.
+
+    The figures go to the `core.metrics` histograms, labelled with the
+    method and URL name (e.g. `article:article-list`), and to the
+    `Server-Timing` response header. Disabled with `API_METRICS_ENABLED`.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.API_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            # Mark the instance as a coroutine function, as MiddlewareMixin does.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+        connection_created.connect(
+            install_query_timer, dispatch_uid="install_query_timer"
+        )
+        for connection in connections.all():
+            if connection.connection is not None:
+                install_query_timer(connection=connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = perf_counter()
+        token = _query_timer.set(QueryTimer())
+        try:
+            response = self.get_response(request)
+        finally:
+            timer = _query_timer.get()
+            _query_timer.reset(token)
+        return self.record(request, response, started, timer)
+
+    async def __acall__(self, request):
+        started = perf_counter()
+        token = _query_timer.set(QueryTimer())
+        try:
+            response = await self.get_response(request)
+        finally:
+            timer = _query_timer.get()
+            _query_timer.reset(token)
+        return self.record(request, response, started, timer)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook.
+        started = perf_counter()
+
+        def rendered(response):
+            request._render_duration = perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def record(self, request, response, started, timer):
+        """Store the request figures and add the `Server-Timing` header."""
+        duration = perf_counter() - started
+        match = request.resolver_match
+        labels = (request.method, match.view_name if match else "unmatched")
+        render = getattr(request, "_render_duration", None)
+
+        observations = [
+            (metrics.REQUEST_DURATION, duration),
+            (metrics.DB_QUERIES, timer.count),
+            (metrics.DB_DURATION, timer.duration),
+        ]
+        timings = f'db;dur={timer.duration * 1000:.2f};desc="{timer.count} queries", '
+        if render is not None:
+            observations.append((metrics.RENDER_DURATION, render))
+            timings += f"render;dur={render * 1000:.2f}, "
+        if not response.streaming:
+            observations.append((metrics.RESPONSE_SIZE, len(response.content)))
+        metrics.observe_many(labels, observations)
+
+        response["Server-Timing"] = f"{timings}total;dur={duration * 1000:.2f}"
+        return response
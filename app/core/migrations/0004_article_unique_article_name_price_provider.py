@@ -0,0 +1,37 @@
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_articles(apps, schema_editor):
+    """Keep the oldest article of every (name, price, provider) group."""
+    Article = apps.get_model("core", "Article")
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        # Block concurrent writers until the constraint is in place, so no
+        # new duplicate can slip in between the cleanup and ALTER TABLE.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "LOCK TABLE %s IN SHARE ROW EXCLUSIVE MODE"
+                % connection.ops.quote_name(Article._meta.db_table)
+            )
+    keep = (
+        Article.objects.values("article_name", "price", "provider_no")
+        .annotate(keep=Min("article_no"))
+        .values("keep")
+    )
+    Article.objects.exclude(article_no__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_article_core_articl_article_1c23c0_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_articles, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='article',
+            constraint=models.UniqueConstraint(fields=('article_name', 'price', 'provider_no'), name='unique_article_name_price_provider'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def create_versions(apps, schema_editor):
+    """Start a version counter for every versioned table."""
+    TableVersion = apps.get_model("core", "TableVersion")
+    for model_name in ("Article", "Provider"):
+        table_name = apps.get_model("core", model_name)._meta.db_table
+        TableVersion.objects.get_or_create(table_name=table_name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_article_unique_article_name_price_provider'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('table_name', models.CharField(max_length=63, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_tableversion'),
+    ]
+
+    # Build the new indexes before dropping the ones they replace, the
+    # foreign key is never left without an index.
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['provider_no', '-article_no'], include=('price', 'article_name'), name='article_provider_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['price', 'article_no'], include=('article_name', 'provider_no'), name='article_price_idx'),
+        ),
+        migrations.AlterField(
+            model_name='article',
+            name='provider_no',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.provider'),
+        ),
+        migrations.RemoveIndex(
+            model_name='article',
+            name='core_articl_article_1c23c0_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='article',
+            name='core_articl_article_73c613_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='article',
+            name='core_articl_price_4061ad_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='article',
+            name='core_articl_provide_cc843a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='provider',
+            name='core_provid_provide_fb4c98_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='provider',
+            name='core_provid_provide_180222_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='provider',
+            name='core_provid_provide_c098b3_idx',
+        ),
+    ]
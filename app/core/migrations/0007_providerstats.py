@@ -0,0 +1,47 @@
+# Generated by Django 4.1.13 on 2026-10-18 19:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def build_stats(apps, schema_editor):
+    """Aggregate the stats of every provider with articles."""
+    Article = apps.get_model("core", "Article")
+    ProviderStats = apps.get_model("core", "ProviderStats")
+    rows = (
+        Article.objects.order_by()
+        .values("provider_no")
+        .annotate(
+            article_count=models.Count("*"),
+            price_sum=models.Sum("price"),
+            price_min=models.Min("price"),
+            price_max=models.Max("price"),
+        )
+    )
+    ProviderStats.objects.bulk_create(
+        [ProviderStats(provider_no_id=row.pop("provider_no"), **row) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_index_redesign'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProviderStats',
+            fields=[
+                ('provider_no', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='core.provider')),
+                ('article_count', models.BigIntegerField(default=0)),
+                ('price_sum', models.BigIntegerField(default=0)),
+                ('price_min', models.IntegerField(null=True)),
+                ('price_max', models.IntegerField(null=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(build_stats, migrations.RunPython.noop),
+    ]
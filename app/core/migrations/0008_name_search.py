@@ -0,0 +1,51 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# The tsvector column is generated by PostgreSQL and unknown to the
+# models (Django 4.1 cannot declare generated columns), so the search
+# schema only exists on PostgreSQL. Adding the column rewrites the table.
+SEARCH_SQL = [
+    """
+    ALTER TABLE core_article ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple'::regconfig, article_name)) STORED
+    """,
+    "CREATE INDEX article_search_idx ON core_article USING gin (search_vector)",
+    """
+    CREATE INDEX article_name_trgm_idx ON core_article
+        USING gin (article_name gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX provider_name_trgm_idx ON core_provider
+        USING gin (provider_name gin_trgm_ops)
+    """,
+]
+
+DROP_SEARCH_SQL = [
+    "DROP INDEX IF EXISTS provider_name_trgm_idx",
+    "DROP INDEX IF EXISTS article_name_trgm_idx",
+    "DROP INDEX IF EXISTS article_search_idx",
+    "ALTER TABLE core_article DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            for sql in statements:
+                schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_providerstats'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(
+            run_on_postgresql(SEARCH_SQL), run_on_postgresql(DROP_SEARCH_SQL)
+        ),
+    ]
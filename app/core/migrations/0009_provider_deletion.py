@@ -0,0 +1,34 @@
+# Generated by Django 4.1.13 on 2026-10-18 19:50
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_name_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProviderDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider_no', models.BigIntegerField(db_index=True)),
+                ('provider_name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('articles_total', models.BigIntegerField(default=0)),
+                ('articles_deleted', models.BigIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='provider',
+            name='deleting',
+            field=models.BooleanField(default=False),
+        ),
+    ]
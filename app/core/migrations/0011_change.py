@@ -0,0 +1,55 @@
+# Generated by Django 4.1.13 on 2026-10-18 19:59
+
+from django.db import migrations, models
+import django.utils.timezone
+
+BACKFILL_SQL = """
+INSERT INTO {change} ({type}, {object_id}, {op}, {created_at})
+SELECT %s, {pk}, 'create', %s FROM {table} ORDER BY {pk}
+"""
+
+
+def log_existing_rows(apps, schema_editor):
+    """Log a create of every existing provider, then of every article."""
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    Change = apps.get_model("core", "Change")
+    opts = Change._meta
+    now = connection.ops.adapt_datetimefield_value(django.utils.timezone.now())
+    for name, type_ in (("Provider", "provider"), ("Article", "article")):
+        model = apps.get_model("core", name)
+        sql = BACKFILL_SQL.format(
+            change=quote(opts.db_table),
+            type=quote(opts.get_field("type").column),
+            object_id=quote(opts.get_field("object_id").column),
+            op=quote(opts.get_field("op").column),
+            created_at=quote(opts.get_field("created_at").column),
+            pk=quote(model._meta.pk.column),
+            table=quote(model._meta.db_table),
+        )
+        schema_editor.execute(sql, [type_, now])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('type', models.CharField(choices=[('article', 'Article'), ('provider', 'Provider')], max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('op', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], max_length=8)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['type', 'seq'], name='change_type_idx'),
+        ),
+        migrations.RunPython(log_existing_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+# Under a locale collation, LIKE 'prefix%' can only use an index built
+# with the pattern operator class. Declared in the models, the index would
+# also be built on SQLite, without it, next to the unique constraint's
+# index which already serves prefixes there; it only exists on PostgreSQL.
+PATTERN_INDEX_SQL = """
+CREATE INDEX article_name_pattern_idx ON core_article
+    (article_name varchar_pattern_ops)
+"""
+
+DROP_PATTERN_INDEX_SQL = "DROP INDEX IF EXISTS article_name_pattern_idx"
+
+
+def run_on_postgresql(sql):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_change'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(PATTERN_INDEX_SQL),
+            run_on_postgresql(DROP_PATTERN_INDEX_SQL),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# The name orderings and prefixes of article.filters compare article_name
+# under the C collation (core.db.lookups.Bytewise). An index with the same
+# collation serves both, with the columns of the unique constraint for
+# keyset pagination and the primary key for index-only scans. The pattern
+# index of 0012 only served the prefix match and left a sort to every page.
+# On SQLite the unique constraint's index, BINARY collated, already does.
+C_INDEX_SQL = """
+CREATE INDEX article_name_c_idx ON core_article
+    (article_name COLLATE "C", price, provider_no_id) INCLUDE (article_no)
+"""
+
+DROP_C_INDEX_SQL = "DROP INDEX IF EXISTS article_name_c_idx"
+
+PATTERN_INDEX_SQL = """
+CREATE INDEX article_name_pattern_idx ON core_article
+    (article_name varchar_pattern_ops)
+"""
+
+DROP_PATTERN_INDEX_SQL = "DROP INDEX IF EXISTS article_name_pattern_idx"
+
+
+def run_on_postgresql(*statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            for sql in statements:
+                schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_article_name_pattern_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(C_INDEX_SQL, DROP_PATTERN_INDEX_SQL),
+            run_on_postgresql(PATTERN_INDEX_SQL, DROP_C_INDEX_SQL),
+        ),
+    ]
@@ -0,0 +1,54 @@
+"""
+Viewset mixins shared by the APIs.
+"""
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from core.renderers import FastJSONRenderer
+
+
+class FastListMixin:
+    """
+    Serve `list` from `values()` rows instead of model instances.
+
+    `fast_list_fields` must name the model fields the serializer outputs,
+    in the same order; the rows then serialize to the same JSON without
+    instantiating models or running serializer fields, and are encoded
+    by `FastJSONRenderer`.
+    """
+
+    fast_list_fields = ()
+
+    def use_fast_list(self):
+        return settings.API_FAST_JSON and self.action == "list"
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if not self.use_fast_list():
+            return renderers
+        return [
+            FastJSONRenderer() if type(renderer) is JSONRenderer else renderer
+            for renderer in renderers
+        ]
+
+    def get_fast_list_fields(self, queryset):
+        """Return the columns of the `values()` rows of `queryset`."""
+        return self.fast_list_fields
+
+    def get_fast_list_data(self, rows):
+        """Return the response items of the `values()` rows."""
+        return rows
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_list():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.values(*self.get_fast_list_fields(queryset))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_fast_list_data(page))
+
+        return Response(self.get_fast_list_data(list(queryset)))
@@ -1,7 +1,53 @@
 """
 Database Models.
 """
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+# Sent after (a batch of) articles were deleted, with their (article_no,
+# provider_no, price) `rows`. Unlike a post_delete receiver, it leaves
+# deleting a provider free to cascade to its articles in a single DELETE.
+articles_deleted = Signal()
+
+# Articles read and deleted per query by `ArticleQuerySet.delete()`.
+DELETE_BATCH_SIZE = 1000
+
+
+class ProviderQuerySet(models.QuerySet):
+    """
+    Provider QuerySet.
+    """
+
+    def active(self):
+        """Exclude the providers being deleted in the background."""
+        return self.filter(deleting=False)
+
+    def bulk_upsert(self, names):
+        """
+        Insert providers named `names` with `INSERT ... ON CONFLICT DO
+        NOTHING`, skipping the existing names. Return the primary keys of
+        the rows actually inserted.
+        """
+        if not names:
+            return []
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        opts = self.model._meta
+        name = quote(opts.get_field("provider_name").column)
+        deleting = quote(opts.get_field("deleting").column)
+        values = ", ".join(["(%s, %s)"] * len(names))
+        params = []
+        for provider_name in names:
+            params.extend((provider_name, False))
+        sql = (
+            f"INSERT INTO {quote(opts.db_table)} ({name}, {deleting}) "
+            f"VALUES {values} ON CONFLICT ({name}) DO NOTHING "
+            f"RETURNING {quote(opts.pk.column)}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
 
 
 class Provider(models.Model):
@@ -11,18 +57,127 @@ class Provider(models.Model):
 
     provider_no = models.BigAutoField(primary_key=True)
     provider_name = models.CharField(max_length=255, unique=True)
+    # Set while core.deletion removes the provider's articles.
+    deleting = models.BooleanField(default=False)
 
-    class Meta:
-        indexes = [
-            models.Index(fields=["provider_no"]),
-            models.Index(fields=["provider_name"]),
-            models.Index(fields=["provider_no", "provider_name"]),
-        ]
+    objects = ProviderQuerySet.as_manager()
 
     def __str__(self):
         return self.provider_name
 
 
+class ArticleQuerySet(models.QuerySet):
+    """
+    Article QuerySet.
+    """
+
+    def bulk_upsert(self, articles, fields=("article_no",)):
+        """
+        Insert `articles` with `INSERT ... ON CONFLICT DO NOTHING`.
+
+        Rows clashing with the unique (article_name, price, provider_no)
+        constraint are skipped without raising. Return the `fields` of the
+        rows actually inserted: their primary keys by default, tuples when
+        several fields are given.
+        """
+        if not articles:
+            return []
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        opts = self.model._meta
+        columns = ", ".join(
+            quote(opts.get_field(name).column)
+            for name in ("article_name", "price", "provider_no")
+        )
+        values = ", ".join(["(%s, %s, %s)"] * len(articles))
+        params = []
+        for article in articles:
+            params.extend((article.article_name, article.price, article.provider_no_id))
+        returning = ", ".join(quote(opts.get_field(name).column) for name in fields)
+        sql = (
+            f"INSERT INTO {quote(opts.db_table)} ({columns}) VALUES {values} "
+            f"ON CONFLICT ({columns}) DO NOTHING "
+            f"RETURNING {returning}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            if len(fields) == 1:
+                return [row[0] for row in cursor.fetchall()]
+            return [tuple(row) for row in cursor.fetchall()]
+
+    def upsert(self, article_name, price, provider_no):
+        """
+        Insert an article unless an identical one exists.
+
+        Return a tuple of (article, created). Inserting costs a single
+        round trip; the existing row is only fetched on conflict.
+        """
+        article = self.model(
+            article_name=article_name, price=price, provider_no=provider_no
+        )
+        while True:
+            inserted = self.bulk_upsert([article])
+            if inserted:
+                break
+            try:
+                existing = self.get(
+                    article_name=article_name, price=price, provider_no=provider_no
+                )
+            except self.model.DoesNotExist:
+                # Deleted since the conflict, the insert can go through now.
+                continue
+            return existing, False
+        article.article_no = inserted[0]
+        article._state.adding = False
+        article._state.db = self.db
+        # Inserted without save(), the receivers still need to know.
+        models.signals.post_save.send(
+            sender=self.model,
+            instance=article,
+            created=True,
+            update_fields=None,
+            raw=False,
+            using=self.db,
+        )
+        return article, True
+
+    def delete(self):
+        """
+        Delete the articles and send `articles_deleted`, a batch at a time.
+
+        The rows of a batch are read first and deleted by primary key, so
+        that rows written concurrently are neither deleted nor reported
+        unseen, and memory use does not grow with the number of rows.
+        """
+        if self.query.is_sliced or self.query.distinct or self._fields is not None:
+            # Unsupported, let Django raise its error.
+            return super().delete()
+        connection = connections[self.db]
+        batch_size = min(
+            DELETE_BATCH_SIZE,
+            connection.ops.bulk_batch_size(["article_no"], [None] * DELETE_BATCH_SIZE),
+        )
+        remaining = self.order_by("pk").values_list(
+            "article_no", "provider_no", "price"
+        )
+        deleted = 0
+        with transaction.atomic(using=self.db, savepoint=False):
+            while True:
+                rows = list(remaining[:batch_size])
+                if not rows:
+                    break
+                deleted += (
+                    models.QuerySet(self.model, using=self.db)
+                    .filter(pk__in=[row[0] for row in rows])
+                    .delete()[0]
+                )
+                articles_deleted.send(sender=self.model, rows=rows, using=self.db)
+                if len(rows) < batch_size:
+                    break
+                remaining = remaining.filter(pk__gt=rows[-1][0])
+        return deleted, {self.model._meta.label: deleted}
+
+
 class Article(models.Model):
     """
     Article Model.
@@ -31,15 +186,203 @@ class Article(models.Model):
     article_no = models.BigAutoField(primary_key=True)
     article_name = models.CharField(max_length=255)
     price = models.IntegerField(null=False, blank=False)
-    provider_no = models.ForeignKey(Provider, on_delete=models.CASCADE)
+    # Indexed as the leading column of article_provider_idx.
+    provider_no = models.ForeignKey(
+        Provider, on_delete=models.CASCADE, db_index=False
+    )
+
+    objects = ArticleQuerySet.as_manager()
+
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(Article, instance=self)
+        row = (self.pk, self.provider_no_id, self.price)
+        result = super().delete(using, keep_parents)
+        articles_deleted.send(sender=Article, rows=[row], using=using)
+        return result
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["article_name", "price", "provider_no"],
+                name="unique_article_name_price_provider",
+            ),
+        ]
+        # Matched to the list queries of article.filters; the INCLUDE
+        # columns (PostgreSQL only) allow index-only scans of list pages.
+        # Name prefix queries use the unique constraint's index, or on
+        # PostgreSQL its C collated copy article_name_c_idx (migration 0013).
         indexes = [
-            models.Index(fields=["article_no"]),
-            models.Index(fields=["article_no", "price"]),
-            models.Index(fields=["price"]),
-            models.Index(fields=["provider_no"]),
+            models.Index(
+                fields=["provider_no", "-article_no"],
+                include=["price", "article_name"],
+                name="article_provider_idx",
+            ),
+            models.Index(
+                fields=["price", "article_no"],
+                include=["article_name", "provider_no"],
+                name="article_price_idx",
+            ),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets core.stats tell which provider an update moved away from.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     def __str__(self):
         return self.article_name
+
+
+class ProviderStats(models.Model):
+    """
+    Article aggregates of a provider.
+
+    A summary table maintained by `core.stats` as articles are written, so
+    the stats of every provider are read without aggregating articles.
+    Providers without articles have no row.
+    """
+
+    provider_no = models.OneToOneField(
+        Provider, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    article_count = models.BigIntegerField(default=0)
+    price_sum = models.BigIntegerField(default=0)
+    price_min = models.IntegerField(null=True)
+    price_max = models.IntegerField(null=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.provider_no_id}: {self.article_count} articles"
+
+
+class ProviderDeletion(models.Model):
+    """
+    Progress of a provider deleted in the background by `core.deletion`.
+
+    Keeps the provider id and name as plain values, so the row outlives
+    the provider.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    provider_no = models.BigIntegerField(db_index=True)
+    provider_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=16, choices=STATUSES, default=PENDING)
+    articles_total = models.BigIntegerField(default=0)
+    articles_deleted = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"{self.provider_name}: {self.status}"
+
+
+class Job(models.Model):
+    """
+    A unit of background work, run by the `run_workers` command.
+
+    `name` picks the function registered with `core.jobs.task`, called
+    with `args`. Failed attempts are retried after a growing delay until
+    `max_attempts` have run; `locked_until` bounds how long the worker
+    that claimed the job may hold it.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    name = models.CharField(max_length=100)
+    args = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=16, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    # Seconds an attempt may run.
+    timeout = models.PositiveIntegerField(default=600)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True)
+    worker = models.CharField(max_length=255, blank=True)
+    progress = models.FloatField(null=True)
+    result = models.JSONField(null=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+
+    class Meta:
+        # Workers claim the next job from this index; it stays small as
+        # finished jobs drop out of it.
+        indexes = [
+            models.Index(
+                fields=["run_after", "id"],
+                condition=models.Q(status__in=["queued", "running"]),
+                name="job_claim_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}: {self.status}"
+
+
+class Change(models.Model):
+    """
+    An entry of the append-only log of article and provider writes,
+    written by `core.changes` and read through `/api/changes`.
+    """
+
+    ARTICLE = "article"
+    PROVIDER = "provider"
+    TYPES = [(ARTICLE, "Article"), (PROVIDER, "Provider")]
+
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+    OPS = [(CREATE, "Create"), (UPDATE, "Update"), (DELETE, "Delete")]
+
+    seq = models.BigAutoField(primary_key=True)
+    type = models.CharField(max_length=16, choices=TYPES)
+    object_id = models.BigIntegerField()
+    op = models.CharField(max_length=8, choices=OPS)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["type", "seq"], name="change_type_idx")]
+
+    def __str__(self):
+        return f"{self.seq}: {self.op} {self.type} {self.object_id}"
+
+
+class TableVersion(models.Model):
+    """
+    Change counter of a table.
+
+    Bumped on every write to the table; readers use it to key and
+    invalidate cached responses without querying the table itself.
+    """
+
+    table_name = models.CharField(max_length=63, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.table_name}@{self.version}"
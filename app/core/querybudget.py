@@ -0,0 +1,194 @@
+"""
+Query budgets: catch N+1 and duplicate queries.
+
+`query_budget` is a context manager and decorator recording the SQL run
+inside it. On exit it raises `QueryBudgetExceeded` when
+
+* more queries ran than `max_queries`;
+* the same statement ran twice with the same parameters;
+* the same statement ran more than `max_repeats` times with different
+  parameters, the signature of an N+1 query.
+
+`QueryBudgetMiddleware` applies the same checks to every request, with
+the per-route budgets of `settings.QUERY_BUDGETS`, and logs or raises
+depending on `settings.QUERY_BUDGET_MODE`. It is meant for tests and
+staging, not production. It runs in sync and async handlers: the queries
+of async views run in other threads, so while the middleware is enabled
+every connection gets an execute wrapper logging to the request's context
+variable. With the middleware off, queries run without that wrapper.
+"""
+import asyncio
+import contextvars
+import logging
+from asyncio import iscoroutinefunction
+from collections import Counter
+from contextlib import ContextDecorator, ExitStack
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when code runs more or more repetitive queries than allowed."""
+
+
+class QueryLog:
+    """Execute wrapper recording the SQL and parameters of every query."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, repr(params)))
+        return execute(sql, params, many, context)
+
+    def problems(self, max_queries=None, max_repeats=None):
+        """Return a description of every way the queries break the budget."""
+        problems = []
+        if max_queries is not None and len(self.queries) > max_queries:
+            problems.append(f"{len(self.queries)} queries, budget is {max_queries}")
+        for (sql, params), count in Counter(self.queries).items():
+            if count > 1:
+                problems.append(f"{count}x identical query: {sql} {params}")
+        if max_repeats is not None:
+            for sql, count in Counter(sql for sql, _ in self.queries).items():
+                if count > max_repeats:
+                    problems.append(f"{count}x similar query (N+1?): {sql}")
+        return problems
+
+
+def record_queries(log, using=None):
+    """Return a context sending the queries of `using`, or all, to `log`."""
+    stack = ExitStack()
+    for alias in [using] if using else connections:
+        stack.enter_context(connections[alias].execute_wrapper(log))
+    return stack
+
+
+def get_route_budget(view_name, method):
+    """Return the query budget of a URL name and HTTP method, if any."""
+    budgets = settings.QUERY_BUDGETS.get(view_name, {})
+    if method == "HEAD":
+        method = "GET"
+    return budgets.get(method)
+
+
+class query_budget(ContextDecorator):
+    """Fail when the enclosed code breaks the query budget, see the module."""
+
+    def __init__(self, max_queries=None, max_repeats=None, using=None):
+        self.max_queries = max_queries
+        self.max_repeats = (
+            settings.QUERY_BUDGET_MAX_REPEATS if max_repeats is None else max_repeats
+        )
+        self.using = using
+
+    @classmethod
+    def for_route(cls, view_name, method="GET", **kwargs):
+        """Return the budget of `settings.QUERY_BUDGETS` for a route."""
+        return cls(get_route_budget(view_name, method), **kwargs)
+
+    def __enter__(self):
+        self.log = QueryLog()
+        self._recording = record_queries(self.log, self.using)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._recording.close()
+        if exc_type is not None:
+            return False
+        problems = self.log.problems(self.max_queries, self.max_repeats)
+        if problems:
+            raise QueryBudgetExceeded("\n".join(problems))
+        return False
+
+
+_request_log = contextvars.ContextVar("query_budget_log", default=None)
+
+
+def log_request_queries(execute, sql, params, many, context):
+    """Execute wrapper adding each query to the log of the current request."""
+    log = _request_log.get()
+    if log is None:
+        return execute(sql, params, many, context)
+    return log(execute, sql, params, many, context)
+
+
+def install_request_log(sender=None, connection=None, **kwargs):
+    """Add `log_request_queries` to the execute wrappers of `connection`, once."""
+    if log_request_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_request_queries)
+
+
+def install_request_logs():
+    """
+    Install the request log on the connections this thread opened already;
+    `connection_created` covers the later ones.
+    """
+    for connection in connections.all(initialized_only=True):
+        install_request_log(connection=connection)
+
+
+class QueryBudgetMiddleware:
+    """Check every request against its route budget, see the module."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if settings.QUERY_BUDGET_MODE not in ("log", "raise"):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            # Mark the instance as a coroutine function, as MiddlewareMixin does.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+        connection_created.connect(
+            install_request_log, dispatch_uid="install_request_log"
+        )
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        install_request_logs()
+        token = _request_log.set(QueryLog())
+        try:
+            response = self.get_response(request)
+        finally:
+            log = _request_log.get()
+            _request_log.reset(token)
+        self.check(request, log)
+        return response
+
+    async def __acall__(self, request):
+        # In the thread running the ORM calls of async views.
+        await sync_to_async(install_request_logs)()
+        token = _request_log.set(QueryLog())
+        try:
+            response = await self.get_response(request)
+        finally:
+            log = _request_log.get()
+            _request_log.reset(token)
+        self.check(request, log)
+        return response
+
+    def check(self, request, log):
+        """Log or raise the ways the queries of `request` break its budget."""
+        match = request.resolver_match
+        max_queries = (
+            get_route_budget(match.view_name, request.method) if match else None
+        )
+        problems = log.problems(max_queries, settings.QUERY_BUDGET_MAX_REPEATS)
+        if problems:
+            message = "\n".join(
+                [f"Query budget exceeded by {request.method} {request.path}:"]
+                + problems
+            )
+            if settings.QUERY_BUDGET_MODE == "raise":
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
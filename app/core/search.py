@@ -0,0 +1,116 @@
+"""
+Name search for the catalog APIs.
+
+On PostgreSQL a name matches when every word of the query is a prefix of
+one of its words (full-text search on a stored generated `tsvector`
+column), or when the query is similar enough to a part of it
+(`pg_trgm` word similarity, tolerating typos). Both conditions are served
+by GIN indexes, see migration `0008_name_search`. Matches are ranked by
+`ts_rank_cd` plus the trigram word similarity.
+
+Other databases, used in tests, match names containing every word of the
+query, case insensitively, and rank them by the number of words they
+start with.
+"""
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVectorExact,
+    SearchVectorField,
+    TrigramWordSimilarity,
+)
+from django.db import connections
+from django.db.models import (
+    Case,
+    Expression,
+    FloatField,
+    IntegerField,
+    Q,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast
+
+SEARCH_CONFIG = "simple"
+
+MAX_TERMS = 8
+
+
+class TableColumn(Expression):
+    """A column of the queried table the model does not declare."""
+
+    def __init__(self, column, output_field):
+        super().__init__(output_field=output_field)
+        self.column = column
+
+    def as_sql(self, compiler, connection):
+        alias = compiler.query.get_initial_alias()
+        column = connection.ops.quote_name(self.column)
+        return f"{compiler.quote_name_unless_alias(alias)}.{column}", []
+
+
+def search_terms(text):
+    """Return the lower case words of a search query."""
+    return re.findall(r"\w+", text.lower())[:MAX_TERMS]
+
+
+def prefix_query(terms):
+    """Return a tsquery matching names with a word starting with every term."""
+    return SearchQuery(
+        " & ".join(f"{term}:*" for term in terms),
+        search_type="raw",
+        config=SEARCH_CONFIG,
+    )
+
+
+def search(queryset, text, field, vector_column=None):
+    """
+    Return the rows of `queryset` whose `field` matches `text`, annotated
+    with their `rank`.
+
+    `vector_column` names the generated tsvector column of `field`;
+    without it only trigram matching is used.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+
+    if connections[queryset.db].vendor != "postgresql":
+        return fallback_search(queryset, terms, field)
+
+    phrase = " ".join(terms)
+    similarity = TrigramWordSimilarity(phrase, field)
+    condition = Q(**{f"{field}__trigram_word_similar": phrase})
+    rank = similarity
+    if vector_column is not None:
+        vector = TableColumn(vector_column, SearchVectorField())
+        query = prefix_query(terms)
+        condition |= Q(SearchVectorExact(vector, query))
+        rank = SearchRank(vector, query, cover_density=True) + similarity
+    return queryset.filter(condition).annotate(
+        rank=Cast(rank, output_field=FloatField())
+    )
+
+
+def fallback_search(queryset, terms, field):
+    """Match and rank with portable lookups, see the module docstring."""
+    for term in terms:
+        queryset = queryset.filter(**{f"{field}__icontains": term})
+    starts = [
+        Case(
+            When(
+                Q(**{f"{field}__istartswith": term})
+                | Q(**{f"{field}__icontains": f" {term}"}),
+                then=Value(1),
+            ),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        for term in terms
+    ]
+    rank = starts[0]
+    for start in starts[1:]:
+        rank = rank + start
+    return queryset.annotate(rank=Cast(rank, output_field=FloatField()))
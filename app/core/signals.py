@@ -0,0 +1,97 @@
+"""
+Signal receivers keeping derived data in sync with catalog writes.
+
+Receivers run in the order they are connected, which is also the order
+writes lock shared rows in: table versions, provider stats, then the
+change log (see `core.changes`).
+
+Bulk inserts and updates bypass model signals; those code paths call
+`core.cache.bump_versions` and update `core.stats`, `core.autocomplete`
+and `core.changes` themselves. Article deletes, single or through a
+queryset, send `articles_deleted` instead of post_delete, so that
+deleting a provider can still cascade to its articles with a single
+DELETE statement; the provider receivers cover those articles.
+"""
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from core import autocomplete, changes
+from core.cache import bump_versions
+from core.models import Article, Change, Provider, ProviderStats, articles_deleted
+from core.stats import article_saved as update_provider_stats
+from core.stats import change_articles
+
+
+@receiver(post_save, sender=Article, dispatch_uid="article_saved_version")
+def article_saved(sender, **kwargs):
+    bump_versions(Article)
+
+
+@receiver(post_save, sender=Article, dispatch_uid="article_saved_stats")
+def article_saved_stats(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        update_provider_stats(instance, created)
+
+
+@receiver(post_save, sender=Provider, dispatch_uid="provider_saved_version")
+def provider_saved(sender, **kwargs):
+    bump_versions(Provider)
+
+
+@receiver(post_save, sender=Article, dispatch_uid="article_saved_autocomplete")
+@receiver(post_save, sender=Provider, dispatch_uid="provider_saved_autocomplete")
+def name_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        autocomplete.name_saved(instance)
+
+
+@receiver(post_save, sender=Article, dispatch_uid="article_saved_change")
+@receiver(post_save, sender=Provider, dispatch_uid="provider_saved_change")
+def log_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        op = Change.CREATE if created else Change.UPDATE
+        changes.record(sender, op, [instance.pk])
+
+
+@receiver(articles_deleted, dispatch_uid="articles_deleted_version")
+def article_deleted(sender, **kwargs):
+    bump_versions(Article)
+
+
+@receiver(articles_deleted, dispatch_uid="articles_deleted_stats")
+def article_deleted_stats(sender, rows, **kwargs):
+    change_articles([(provider_no, price) for _, provider_no, price in rows])
+
+
+@receiver(articles_deleted, dispatch_uid="articles_deleted_autocomplete")
+def article_deleted_autocomplete(sender, rows, **kwargs):
+    autocomplete.names_deleted(Article, [article_no for article_no, _, _ in rows])
+
+
+@receiver(articles_deleted, dispatch_uid="articles_deleted_change")
+def log_article_deleted(sender, rows, **kwargs):
+    changes.record(Article, Change.DELETE, [article_no for article_no, _, _ in rows])
+
+
+@receiver(post_delete, sender=Provider, dispatch_uid="provider_deleted_autocomplete")
+def provider_deleted_autocomplete(sender, instance, **kwargs):
+    autocomplete.names_deleted(Provider, [instance.pk])
+    # Its articles went with it, in a single DELETE.
+    autocomplete.invalidate(Article)
+
+
+@receiver(pre_delete, sender=Provider, dispatch_uid="provider_deleting")
+def provider_deleting(sender, instance, using, **kwargs):
+    # The cascade deletes the articles without signals, log them while they
+    # are still there. Versions and stats are locked before the change log,
+    # in the order of the article receivers.
+    bump_versions(Provider, Article)
+    ProviderStats.objects.using(using).filter(provider_no=instance.pk).delete()
+    changes.record_query(
+        Change.DELETE, Article.objects.using(using).filter(provider_no=instance.pk)
+    )
+
+
+@receiver(post_delete, sender=Provider, dispatch_uid="provider_deleted_change")
+def log_provider_deleted(sender, instance, **kwargs):
+    changes.record(Provider, Change.DELETE, [instance.pk])
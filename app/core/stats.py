@@ -0,0 +1,218 @@
+"""
+Provider article statistics kept in the `ProviderStats` summary table.
+
+New articles are added to the stats of their provider incrementally, with
+one `INSERT ... ON CONFLICT DO UPDATE` for any number of providers.
+Updates and deletes adjust the count and sum in place as well; only when
+they remove the minimum or maximum price of a provider are its stats
+aggregated again from `article_provider_idx`, which covers
+(provider_no, price).
+
+Like `core.cache.bump_versions`, maintenance runs from model signals for
+single saves and article deletes, and is called explicitly by bulk writes.
+`refresh_provider_stats()` without arguments rebuilds the whole table.
+"""
+from django.db import connections, router, transaction
+from django.db.models import Count, DateTimeField, F, Max, Min, Sum, Value
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from core.models import Article, ProviderStats
+
+ADD_SQL = """
+INSERT INTO {table} AS stats
+    ({provider_no}, {article_count}, {price_sum}, {price_min}, {price_max},
+     {updated_at})
+VALUES {values}
+ON CONFLICT ({provider_no}) DO UPDATE SET
+    {article_count} = stats.{article_count} + excluded.{article_count},
+    {price_sum} = stats.{price_sum} + excluded.{price_sum},
+    {price_min} = CASE
+        WHEN stats.{price_min} IS NULL OR excluded.{price_min} < stats.{price_min}
+        THEN excluded.{price_min} ELSE stats.{price_min} END,
+    {price_max} = CASE
+        WHEN stats.{price_max} IS NULL OR excluded.{price_max} > stats.{price_max}
+        THEN excluded.{price_max} ELSE stats.{price_max} END,
+    {updated_at} = excluded.{updated_at}
+"""
+
+REFRESH_SQL = """
+INSERT INTO {table}
+    ({provider_no}, {article_count}, {price_sum}, {price_min}, {price_max},
+     {updated_at})
+{select}
+ON CONFLICT ({provider_no}) DO UPDATE SET
+    {article_count} = excluded.{article_count},
+    {price_sum} = excluded.{price_sum},
+    {price_min} = excluded.{price_min},
+    {price_max} = excluded.{price_max},
+    {updated_at} = excluded.{updated_at}
+"""
+
+STATS_FIELDS = ["article_count", "price_sum", "price_min", "price_max", "updated_at"]
+
+
+def _totals(rows):
+    """Return (count, sum, min, max) of (provider_no, price) pairs by provider."""
+    totals = {}
+    for provider_no, price in rows:
+        count, total, low, high = totals.get(provider_no, (0, 0, price, price))
+        totals[provider_no] = (
+            count + 1,
+            total + price,
+            min(low, price),
+            max(high, price),
+        )
+    return totals
+
+
+def add_articles(rows):
+    """Add (provider_no, price) pairs of new articles to the provider stats."""
+    _add_totals(_totals(rows))
+
+
+def _add_totals(totals):
+    if not totals:
+        return
+
+    connection = connections[router.db_for_write(ProviderStats)]
+    quote = connection.ops.quote_name
+    opts = ProviderStats._meta
+    columns = {
+        name: quote(opts.get_field(name).column)
+        for name in ["provider_no", *STATS_FIELDS]
+    }
+    now = timezone.now()
+    params = []
+    for provider_no, values in sorted(totals.items()):
+        params.extend((provider_no, *values, now))
+    values = ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(totals))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            ADD_SQL.format(table=quote(opts.db_table), values=values, **columns),
+            params,
+        )
+
+
+def refresh_provider_stats(provider_nos=None):
+    """
+    Aggregate the stats of the given providers, or of all, from their
+    articles again.
+    """
+    articles = Article.objects.all()
+    if provider_nos is not None:
+        provider_nos = set(provider_nos)
+        if not provider_nos:
+            return
+        articles = articles.filter(provider_no__in=provider_nos)
+
+    using = router.db_for_write(ProviderStats)
+    aggregates = (
+        articles.order_by()
+        .values("provider_no")
+        .annotate(
+            article_count=Count("*"),
+            price_sum=Sum("price"),
+            price_min=Min("price"),
+            price_max=Max("price"),
+            updated_at=Value(timezone.now(), output_field=DateTimeField()),
+        )
+    )
+    select, params = aggregates.query.get_compiler(using).as_sql()
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    opts = ProviderStats._meta
+    columns = {
+        name: quote(opts.get_field(name).column)
+        for name in ["provider_no", *STATS_FIELDS]
+    }
+    # Callers usually are in a transaction already, no savepoint needed.
+    with transaction.atomic(using=using, savepoint=False):
+        stale = ProviderStats.objects.all()
+        if provider_nos is not None:
+            stale = stale.filter(provider_no__in=provider_nos)
+            if connection.features.has_select_for_update:
+                # Wait for concurrent writers of these rows, so the
+                # aggregate below sees their articles.
+                list(stale.select_for_update().values_list("pk", flat=True))
+        stale.exclude(provider_no__in=articles.values("provider_no")).delete()
+        # An upsert, so refreshes racing to create a row do not fail.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                REFRESH_SQL.format(
+                    table=quote(opts.db_table), select=select, **columns
+                ),
+                params,
+            )
+
+
+def change_articles(removed, added=()):
+    """
+    Update the provider stats after articles changed or were deleted.
+
+    `removed` are the (provider_no, price) pairs of the old rows, `added`
+    those of the rows replacing them. Counts and sums move by the
+    difference; providers that lost their minimum or maximum price are
+    aggregated again.
+    """
+    removed, added = _totals(removed), _totals(added)
+    if not removed:
+        _add_totals(added)
+        return
+
+    using = router.db_for_write(ProviderStats)
+    # Callers usually are in a transaction already, no savepoint needed.
+    with transaction.atomic(using=using, savepoint=False):
+        stats = ProviderStats.objects.filter(provider_no__in=removed)
+        if connections[using].features.has_select_for_update:
+            stats = stats.select_for_update()
+        current = {
+            provider_no: (count, low, high)
+            for provider_no, count, low, high in stats.values_list(
+                "provider_no", "article_count", "price_min", "price_max"
+            )
+        }
+        stale = set()
+        now = timezone.now()
+        for provider_no, (count, total, low, high) in removed.items():
+            new_count, new_total, new_min, new_max = added.pop(
+                provider_no, (0, 0, None, None)
+            )
+            current_count, current_min, current_max = current.get(
+                provider_no, (0, None, None)
+            )
+            if count >= current_count or low <= current_min or high >= current_max:
+                # Also counts the added rows, they are saved already.
+                stale.add(provider_no)
+                continue
+            values = {
+                "article_count": F("article_count") - count + new_count,
+                "price_sum": F("price_sum") - total + new_total,
+                "updated_at": now,
+            }
+            if new_count:
+                values["price_min"] = Least("price_min", new_min)
+                values["price_max"] = Greatest("price_max", new_max)
+            ProviderStats.objects.filter(pk=provider_no).update(**values)
+        refresh_provider_stats(stale)
+        _add_totals(added)
+
+
+def article_saved(article, created):
+    """Update the provider stats after `article` was saved."""
+    if created:
+        add_articles([(article.provider_no_id, article.price)])
+        return
+    loaded = getattr(article, "_loaded_values", {})
+    if "price" not in loaded:
+        refresh_provider_stats({article.provider_no_id})
+    else:
+        old = (loaded.get("provider_no_id", article.provider_no_id), loaded["price"])
+        new = (article.provider_no_id, article.price)
+        if old != new:
+            change_articles([old], [new])
+    article._loaded_values = {
+        **loaded,
+        "provider_no_id": article.provider_no_id,
+        "price": article.price,
+    }
@@ -0,0 +1,65 @@
+"""
+Background tasks run by `core.jobs` workers.
+
+Every task is idempotent: a job whose worker stopped is run again.
+"""
+import io
+
+from django.conf import settings
+from django.core.management import call_command
+from django.http import QueryDict
+
+from article.export import write_export
+from article.filters import ORDERINGS, ArticleFilter, ArticleFilterSerializer
+from core import jobs
+from core.cache import bump_versions
+from core.deletion import run_provider_deletion
+from core.models import Article, ProviderDeletion
+from core.stats import refresh_provider_stats
+
+
+class TaskError(Exception):
+    """A task failed, to be retried like any other error."""
+
+
+@jobs.task("delete_provider", timeout=3600)
+def delete_provider(job, deletion_id):
+    """Delete a provider and its articles, see `core.deletion`."""
+    deletion = run_provider_deletion(
+        deletion_id,
+        progress=lambda done, total: jobs.set_progress(job, done, total),
+    )
+    if deletion.status == ProviderDeletion.FAILED:
+        raise TaskError(deletion.error)
+    return {"articles_deleted": deletion.articles_deleted}
+
+
+@jobs.task("refresh_provider_stats")
+def refresh_stats(job):
+    """Aggregate the article stats of every provider again."""
+    refresh_provider_stats()
+    bump_versions(Article)
+
+
+@jobs.task("import_articles", timeout=3600, max_attempts=1)
+def import_articles(job, files, format=None, batch_size=5000):
+    """Import articles from files the workers can read, see the command."""
+    out = io.StringIO()
+    call_command(
+        "import_articles", *files, format=format, batch_size=batch_size, stdout=out
+    )
+    return {"output": out.getvalue().strip().splitlines()[-1]}
+
+
+@jobs.task("export_articles", timeout=3600)
+def export_articles(job, query="", format="ndjson"):
+    """Export the articles matching the filter `query` string to a file."""
+    serializer = ArticleFilterSerializer(data=QueryDict(query))
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+    queryset = ArticleFilter().apply_filters(Article.objects.all(), params)
+    queryset = queryset.order_by(*ORDERINGS[params["ordering"]])
+
+    path = settings.ARTICLE_EXPORT_DIR / f"articles-{job.pk}.{format}"
+    rows = write_export(queryset, format, path, settings.ARTICLE_EXPORT_CHUNK_SIZE)
+    return {"path": str(path), "rows": rows}
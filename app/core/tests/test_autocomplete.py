@@ -0,0 +1,244 @@
+"""
+Tests for the autocomplete index and endpoint.
+"""
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import autocomplete
+from core.autocomplete import INDEXES, PrefixIndex, name_keys
+from core.models import Article, Provider
+
+
+AUTOCOMPLETE_URL = reverse("autocomplete")
+BULK_URL = reverse("article:article-bulk")
+
+
+def article_detail_url(article_id):
+    """Return article detail URL"""
+    return reverse("article:article-detail", args=[article_id])
+
+
+class PrefixIndexTests(TestCase):
+    """Test the sorted prefix index."""
+
+    def setUp(self):
+        self.provider = Provider.objects.create(provider_name="Provider1")
+        for name in ["Red apple", "Green Apple juice", "Pineapple", "Apricot"]:
+            Article.objects.create(
+                article_name=name, price=1, provider_no=self.provider
+            )
+        self.index = PrefixIndex(Article, "article_name")
+
+    def names(self, text, limit=10):
+        return [name for _, name in self.index.lookup(text, limit)]
+
+    def test_name_keys(self):
+        """Test a name has one key per word"""
+        self.assertEqual(
+            name_keys(7, "Green  Apple-juice"),
+            ["green apple juice\x007", "apple juice\x007", "juice\x007"],
+        )
+        self.assertEqual(name_keys(7, "--"), [])
+
+    def test_lookup(self):
+        """Test names with a word starting with the prefix are found"""
+        self.assertEqual(
+            self.names("ap"), ["Red apple", "Green Apple juice", "Apricot"]
+        )
+        self.assertEqual(self.names("APPLE J"), ["Green Apple juice"])
+        self.assertEqual(self.names("apple", limit=1), ["Red apple"])
+        self.assertEqual(self.names("pear"), [])
+        self.assertEqual(self.names("!"), [])
+
+    def test_lookup_without_queries(self):
+        """Test only the first lookup reads the database"""
+        with self.assertNumQueries(1):
+            self.names("red")
+        with self.assertNumQueries(0):
+            self.names("green")
+
+    def test_add_and_remove(self):
+        """Test incremental changes replace the keys of a row"""
+        self.names("a")
+        article = Article.objects.get(article_name="Apricot")
+
+        self.index.add(article.pk, "Blue plum")
+        self.index.remove(Article.objects.get(article_name="Pineapple").pk)
+        self.index.remove(9999)
+
+        self.assertEqual(self.names("apricot"), [])
+        self.assertEqual(self.names("plum"), ["Blue plum"])
+        self.assertEqual(self.names("pi"), [])
+        self.assertEqual(len(self.index), 7)
+
+    def test_changes_during_build(self):
+        """Test changes made while the index builds are kept"""
+        rows = Article.objects.order_by("-pk").values_list("pk", "article_name")
+        first = rows[0]
+
+        def read_rows(*args, **kwargs):
+            self.index.remove(first[0])
+            self.index.add(first[0], "Quince")
+            return iter(list(rows))
+
+        with mock.patch("django.db.models.query.QuerySet.iterator", read_rows):
+            self.index.build()
+
+        self.assertEqual(self.names("quince"), ["Quince"])
+        self.assertEqual(self.names(first[1]), [])
+
+    @override_settings(AUTOCOMPLETE_MAX_ENTRIES=4)
+    def test_bounded(self):
+        """Test the index keeps the newest names within its entry limit"""
+        self.assertEqual(self.names("a"), ["Apricot"])
+        self.assertTrue(self.index.truncated)
+        self.assertLessEqual(len(self.index), 4)
+
+        self.index.add(9999, "Extra long article name")
+
+        self.assertEqual(self.names("extra"), [])
+
+    def test_refresh_when_stale(self):
+        """Test a stale index is rebuilt in the background"""
+        self.names("a")
+        self.index.invalidate()
+
+        with mock.patch.object(self.index, "refresh_in_background") as refresh:
+            self.assertEqual(len(self.names("red")), 1)
+
+        refresh.assert_called_once_with()
+
+    @override_settings(AUTOCOMPLETE_MAX_AGE=0)
+    def test_refresh_when_old(self):
+        """Test an index older than its maximum age is rebuilt"""
+        self.names("a")
+
+        with mock.patch.object(self.index, "refresh_in_background") as refresh:
+            self.names("red")
+
+        refresh.assert_called_once_with()
+
+
+class AutocompleteApiTests(TestCase):
+    """Test the autocomplete endpoint."""
+
+    def setUp(self):
+        autocomplete.clear_indexes()
+        self.addCleanup(autocomplete.clear_indexes)
+        self.client = APIClient()
+        self.provider = Provider.objects.create(provider_name="Acme Fruit")
+        self.article = Article.objects.create(
+            article_name="Apple", price=1, provider_no=self.provider
+        )
+
+    def test_autocomplete(self):
+        """Test providers and articles are suggested"""
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "a"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.json(),
+            {
+                "providers": [
+                    {
+                        "provider_no": self.provider.provider_no,
+                        "provider_name": "Acme Fruit",
+                    }
+                ],
+                "articles": [
+                    {"article_no": self.article.article_no, "article_name": "Apple"}
+                ],
+            },
+        )
+
+    def test_type_and_limit(self):
+        """Test the suggestions can be limited to one type"""
+        Article.objects.create(
+            article_name="Apricot", price=1, provider_no=self.provider
+        )
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "ap", "type": "article"})
+        limited = self.client.get(AUTOCOMPLETE_URL, {"q": "ap", "limit": 1})
+
+        self.assertEqual(list(res.json()), ["articles"])
+        self.assertEqual(len(res.json()["articles"]), 2)
+        self.assertEqual(len(limited.json()["articles"]), 1)
+
+    def test_invalid_parameters(self):
+        """Test invalid parameters are rejected"""
+        for params in [{}, {"q": "a", "type": "user"}, {"q": "a", "limit": 0}]:
+            with self.subTest(params=params):
+                res = self.client.get(AUTOCOMPLETE_URL, params)
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_follows_writes(self):
+        """Test saves and deletes update the index once committed"""
+        self.client.get(AUTOCOMPLETE_URL, {"q": "a"})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Provider.objects.create(provider_name="Banana Republic")
+            self.article.article_name = "Blueberry"
+            self.article.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(article_detail_url(self.article.article_no))
+        with self.assertNumQueries(0):
+            res = self.client.get(AUTOCOMPLETE_URL, {"q": "b"})
+
+        self.assertEqual(
+            [p["provider_name"] for p in res.json()["providers"]],
+            ["Banana Republic"],
+        )
+        self.assertEqual(res.json()["articles"], [])
+
+    def test_deleting_providers_hidden(self):
+        """Test providers being deleted are not suggested"""
+        Provider.objects.create(provider_name="Acme Tools", deleting=True)
+        hidden = Provider.objects.create(provider_name="Acme Toys")
+
+        self.client.get(AUTOCOMPLETE_URL, {"q": "acme"})
+        with self.captureOnCommitCallbacks(execute=True):
+            hidden.deleting = True
+            hidden.save()
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "acme", "type": "provider"})
+
+        self.assertEqual(
+            [p["provider_name"] for p in res.json()["providers"]], ["Acme Fruit"]
+        )
+
+    def test_bulk_writes(self):
+        """Test bulk updates are indexed and bulk creates mark it stale"""
+        self.client.get(AUTOCOMPLETE_URL, {"q": "a"})
+        update = {
+            "article_no": self.article.article_no,
+            "article_name": "Cherry",
+            "price": 1,
+            "provider_no": self.provider.provider_no,
+        }
+        create = {**update, "article_name": "Date"}
+        del create["article_no"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(BULK_URL, [update], format="json")
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "cherry"})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(BULK_URL, [create], format="json")
+
+        self.assertEqual(len(res.json()["articles"]), 1)
+        self.assertTrue(INDEXES[Article]._stale)
+
+    def test_uncommitted_writes_ignored(self):
+        """Test writes are not indexed before their transaction commits"""
+        self.client.get(AUTOCOMPLETE_URL, {"q": "a"})
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Provider.objects.create(provider_name="Banana Republic")
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "banana"})
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(res.json()["providers"], [])
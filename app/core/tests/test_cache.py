@@ -0,0 +1,166 @@
+"""
+Tests for the API response cache.
+"""
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.cache import bump_versions, get_api_cache, get_versions, reset_cache_stats
+from core.models import Article, Provider, TableVersion
+
+
+ARTICLE_URL = reverse("article:article-list")
+PRICE_FILTER_URL = reverse("article:price-filter-list")
+PROVIDER_URL = reverse("provider:provider-list")
+BULK_URL = reverse("article:article-bulk")
+CACHE_STATS_URL = reverse("cache-stats")
+
+
+def article_queries(queries):
+    """Return the captured queries reading the article table"""
+    return [query for query in queries if 'FROM "core_article"' in query["sql"]]
+
+
+class CacheTests(TestCase):
+    """Test the API response cache."""
+
+    def setUp(self):
+        get_api_cache().clear()
+        reset_cache_stats()
+        self.client = APIClient()
+        self.provider = Provider.objects.create(provider_name="Provider1")
+        Article.objects.create(
+            article_name="Article1", price=100, provider_no=self.provider
+        )
+
+    def test_list_served_from_cache(self):
+        """Test a repeated list request does not query the article table."""
+        first = self.client.get(ARTICLE_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(ARTICLE_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(article_queries(queries), [])
+        stats = self.client.get(CACHE_STATS_URL).data
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_filter_aliases_list_only(self):
+        """Test the list-only filter routes have no detail route"""
+        for name in ["article:price-filter-detail", "article:provider-filter-detail"]:
+            with self.subTest(name=name):
+                with self.assertRaises(NoReverseMatch):
+                    reverse(name, args=[1])
+
+    def test_query_params_normalized(self):
+        """Test the order of query parameters does not matter."""
+        self.client.get(f"{PRICE_FILTER_URL}?min=1&max=500")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f"{PRICE_FILTER_URL}?max=500&min=1")
+
+        self.assertEqual(article_queries(queries), [])
+
+    def test_api_write_invalidates(self):
+        """Test creating through the API invalidates cached lists."""
+        self.client.get(ARTICLE_URL)
+        payload = {
+            "article_name": "Article2",
+            "price": 200,
+            "provider_no": self.provider.provider_no,
+        }
+        self.client.post(ARTICLE_URL, payload)
+
+        res = self.client.get(ARTICLE_URL)
+
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_api_delete_invalidates(self):
+        """Test deleting through the API invalidates cached entries."""
+        article = Article.objects.get()
+        url = reverse("article:article-detail", args=[article.article_no])
+        self.client.get(url)
+        self.client.get(ARTICLE_URL)
+
+        self.client.delete(url)
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(ARTICLE_URL).data["results"], [])
+
+    def test_bulk_write_invalidates(self):
+        """Test bulk writes invalidate cached lists."""
+        self.client.get(ARTICLE_URL)
+        rows = [
+            {
+                "article_name": "Article2",
+                "price": 200,
+                "provider_no": self.provider.provider_no,
+            }
+        ]
+        self.client.post(BULK_URL, rows, format="json")
+
+        res = self.client.get(ARTICLE_URL)
+
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_provider_delete_invalidates_articles(self):
+        """Test deleting a provider invalidates the article lists."""
+        self.client.get(ARTICLE_URL)
+        self.client.get(PROVIDER_URL)
+
+        self.provider.delete()
+
+        self.assertEqual(self.client.get(ARTICLE_URL).data["results"], [])
+        self.assertEqual(self.client.get(PROVIDER_URL).data, [])
+
+    def test_model_delete_invalidates(self):
+        """Test deleting articles outside the API invalidates cached entries."""
+        article = Article.objects.create(
+            article_name="Article2", price=200, provider_no=self.provider
+        )
+        url = reverse("article:article-detail", args=[article.article_no])
+        self.client.get(url)
+        self.client.get(ARTICLE_URL)
+
+        article.delete()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        Article.objects.filter(provider_no=self.provider).delete()
+
+        self.assertEqual(self.client.get(ARTICLE_URL).data["results"], [])
+
+    def test_provider_delete_cascades_in_one_statement(self):
+        """Test deleting a provider does not load its articles."""
+        with CaptureQueriesContext(connection) as queries:
+            self.provider.delete()
+
+        # The change log selects the deleted ids in the database.
+        self.assertEqual(
+            [query["sql"].split()[0] for query in article_queries(queries)],
+            ["INSERT", "DELETE"],
+        )
+
+    def test_bump_versions(self):
+        """Test bumping versions, including tables without a version row."""
+        TableVersion.objects.all().delete()
+
+        bump_versions(Article)
+        bump_versions(Article, Provider)
+
+        versions = {table: version for table, version, _ in get_versions(Article)}
+        self.assertEqual(versions, {Article._meta.db_table: 2})
+
+    @override_settings(API_CACHE_ENABLED=False)
+    def test_cache_disabled(self):
+        """Test responses are not cached when the cache is disabled."""
+        self.client.get(ARTICLE_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(ARTICLE_URL)
+
+        self.assertEqual(len(article_queries(queries)), 1)
@@ -0,0 +1,408 @@
+"""
+Tests for the change log and the change feed.
+"""
+import io
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import changes, jobs
+from core.catalog import clear_catalog, seed_catalog
+from core.deletion import start_provider_deletion
+from core.models import Article, Change, Provider, ProviderStats, articles_deleted
+
+CHANGES_URL = reverse("changes")
+
+# Shared rows in the order every write locks them.
+LOCKS = [
+    ("versions", '"core_tableversion"'),
+    ("stats", '"core_providerstats"'),
+    ("changes", '"core_change"'),
+]
+
+
+def logged():
+    """Return the logged changes as (type, id, op) tuples, oldest first."""
+    return list(Change.objects.order_by("seq").values_list("type", "object_id", "op"))
+
+
+class ChangeLogTests(TestCase):
+    """Test writes are logged."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.provider = Provider.objects.create(provider_name="Acme")
+
+    def test_model_saves(self):
+        """Test saving and deleting models logs changes"""
+        article = Article.objects.create(
+            article_name="Anvil", price=10, provider_no=self.provider
+        )
+        article.price = 12
+        article.save()
+        pk = self.provider.pk
+        self.provider.delete()
+
+        self.assertEqual(
+            logged(),
+            [
+                (Change.PROVIDER, pk, Change.CREATE),
+                (Change.ARTICLE, article.pk, Change.CREATE),
+                (Change.ARTICLE, article.pk, Change.UPDATE),
+                (Change.ARTICLE, article.pk, Change.DELETE),
+                (Change.PROVIDER, pk, Change.DELETE),
+            ],
+        )
+
+    def test_queryset_delete(self):
+        """Test deleting articles through a queryset logs each of them"""
+        articles = Article.objects.bulk_create(
+            [
+                Article(article_name=f"A{i}", price=i, provider_no=self.provider)
+                for i in range(3)
+            ]
+        )
+        Change.objects.all().delete()
+
+        Article.objects.filter(price__lt=2).delete()
+
+        self.assertEqual(
+            logged(),
+            [(Change.ARTICLE, a.pk, Change.DELETE) for a in articles[:2]],
+        )
+        self.assertEqual(ProviderStats.objects.get().article_count, 1)
+
+    @mock.patch("core.models.DELETE_BATCH_SIZE", 2)
+    def test_queryset_delete_batches(self):
+        """Test queryset deletes read and report the rows a batch at a time"""
+        articles = Article.objects.bulk_create(
+            [
+                Article(article_name=f"A{i}", price=i, provider_no=self.provider)
+                for i in range(5)
+            ]
+        )
+        Change.objects.all().delete()
+        sent = []
+        receiver = lambda rows, **kwargs: sent.append(len(rows))  # noqa: E731
+        articles_deleted.connect(receiver, weak=False)
+        self.addCleanup(articles_deleted.disconnect, receiver)
+
+        deleted, _ = Article.objects.all().delete()
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(sent, [2, 2, 1])
+        self.assertEqual(
+            logged(), [(Change.ARTICLE, a.pk, Change.DELETE) for a in articles]
+        )
+        self.assertFalse(ProviderStats.objects.exists())
+
+    def test_api_writes(self):
+        """Test the article endpoints and bulk writes log changes"""
+        res = self.client.post(
+            reverse("article:article-list"),
+            {"article_name": "Anvil", "price": 10, "provider_no": self.provider.pk},
+        )
+        pk = res.data["article_no"]
+        self.client.post(
+            reverse("article:article-bulk"),
+            [{"article_name": "Rope", "price": 5, "provider_no": self.provider.pk}],
+            format="json",
+        )
+        bulk_pk = Article.objects.get(article_name="Rope").pk
+        self.client.delete(reverse("article:article-bulk"), [bulk_pk], format="json")
+        self.client.delete(reverse("article:article-detail", args=[pk]))
+
+        self.assertEqual(
+            logged()[1:],
+            [
+                (Change.ARTICLE, pk, Change.CREATE),
+                (Change.ARTICLE, bulk_pk, Change.CREATE),
+                (Change.ARTICLE, bulk_pk, Change.DELETE),
+                (Change.ARTICLE, pk, Change.DELETE),
+            ],
+        )
+
+    def test_provider_delete_cascade(self):
+        """Test deleting a provider in one transaction logs its articles"""
+        articles = Article.objects.bulk_create(
+            [
+                Article(article_name=f"A{i}", price=i, provider_no=self.provider)
+                for i in range(3)
+            ]
+        )
+        other = Provider.objects.create(provider_name="Other")
+        Article.objects.create(article_name="B", price=1, provider_no=other)
+        Change.objects.all().delete()
+
+        res = self.client.delete(
+            reverse("provider:provider-detail", args=[self.provider.pk])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            logged(),
+            [(Change.ARTICLE, a.pk, Change.DELETE) for a in articles]
+            + [(Change.PROVIDER, self.provider.pk, Change.DELETE)],
+        )
+        self.assertEqual(list(ProviderStats.objects.values_list("pk")), [(other.pk,)])
+
+    def test_clear_catalog(self):
+        """Test clearing the catalog logs the deleted articles and providers"""
+        article = Article.objects.create(
+            article_name="Anvil", price=10, provider_no=self.provider
+        )
+        Change.objects.all().delete()
+
+        clear_catalog("default")
+
+        self.assertEqual(
+            logged(),
+            [
+                (Change.ARTICLE, article.pk, Change.DELETE),
+                (Change.PROVIDER, self.provider.pk, Change.DELETE),
+            ],
+        )
+
+    def test_background_provider_deletion(self):
+        """Test deleting a provider in the background logs its articles"""
+        articles = Article.objects.bulk_create(
+            [
+                Article(article_name=f"A{i}", price=i, provider_no=self.provider)
+                for i in range(3)
+            ]
+        )
+        Change.objects.all().delete()
+
+        start_provider_deletion(self.provider)
+        jobs.work(once=True)
+
+        deleted = {(Change.ARTICLE, a.pk, Change.DELETE) for a in articles}
+        self.assertEqual(set(logged()[:3]), deleted)
+        self.assertEqual(
+            logged()[3:], [(Change.PROVIDER, self.provider.pk, Change.DELETE)]
+        )
+
+    def test_import(self):
+        """Test imported rows are logged"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "articles.csv")
+            with open(path, "w") as f:
+                f.write("provider_name,article_name,price\nNew,Anvil,10\n")
+            call_command("import_articles", path, stdout=io.StringIO())
+
+        provider = Provider.objects.get(provider_name="New")
+        article = Article.objects.get()
+        self.assertEqual(
+            logged()[1:],
+            [
+                (Change.PROVIDER, provider.pk, Change.CREATE),
+                (Change.ARTICLE, article.pk, Change.CREATE),
+            ],
+        )
+
+    def test_record_query(self):
+        """Test the rows of a queryset are logged in primary key order"""
+        Change.objects.all().delete()
+
+        changes.record_query(Change.UPDATE, Provider.objects.all())
+
+        self.assertEqual(logged(), [(Change.PROVIDER, self.provider.pk, Change.UPDATE)])
+
+
+class LockOrderTests(TestCase):
+    """Test writes lock the versions, stats and change log in one order."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.provider = Provider.objects.create(provider_name="Acme")
+
+    def lock_order(self, write):
+        """Return the shared rows in the order `write` first locked them."""
+        with CaptureQueriesContext(connection) as queries:
+            write()
+        order = []
+        for query in queries:
+            sql = query["sql"].lstrip()
+            if sql.startswith("SELECT") and "FOR UPDATE" not in sql:
+                continue
+            if "pg_advisory_xact_lock" in sql:
+                sql = LOCKS[-1][1]
+            for name, table in LOCKS:
+                if table in sql and name not in order:
+                    order.append(name)
+        return order
+
+    def test_signals(self):
+        """Test the signal receivers lock in order"""
+        res = {}
+
+        def create():
+            res["article"] = self.client.post(
+                reverse("article:article-list"),
+                {"article_name": "Anvil", "price": 1, "provider_no": self.provider.pk},
+            )
+
+        self.assertEqual(self.lock_order(create), ["versions", "stats", "changes"])
+        pk = res["article"].data["article_no"]
+        url = reverse("article:article-detail", args=[pk])
+        self.assertEqual(
+            self.lock_order(lambda: self.client.delete(url)),
+            ["versions", "stats", "changes"],
+        )
+        self.assertEqual(
+            self.lock_order(
+                lambda: self.client.post(
+                    reverse("provider:provider-list"), {"provider_name": "New"}
+                )
+            ),
+            ["versions", "changes"],
+        )
+
+    def test_bulk_create(self):
+        """Test bulk writes lock in order"""
+        rows = [{"article_name": "Anvil", "price": 1, "provider_no": self.provider.pk}]
+
+        order = self.lock_order(
+            lambda: self.client.post(
+                reverse("article:article-bulk"), rows, format="json"
+            )
+        )
+
+        self.assertEqual(order, ["versions", "stats", "changes"])
+
+    def test_provider_delete(self):
+        """Test deleting a provider locks in order"""
+        Article.objects.create(article_name="Anvil", price=1, provider_no=self.provider)
+        url = reverse("provider:provider-detail", args=[self.provider.pk])
+
+        order = self.lock_order(lambda: self.client.delete(url))
+
+        self.assertEqual(order, ["versions", "stats", "changes"])
+
+    def test_import(self):
+        """Test imports lock in order"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "articles.csv")
+            with open(path, "w") as f:
+                f.write("provider_name,article_name,price\nNew,Anvil,10\n")
+
+            order = self.lock_order(
+                lambda: call_command("import_articles", path, stdout=io.StringIO())
+            )
+
+        self.assertEqual(order, ["versions", "stats", "changes"])
+
+    def test_seed_catalog(self):
+        """Test seeding the catalog locks in order, also when clearing it"""
+        Article.objects.create(article_name="Anvil", price=1, provider_no=self.provider)
+
+        self.assertEqual(
+            self.lock_order(lambda: seed_catalog(2, 10)),
+            ["versions", "stats", "changes"],
+        )
+        self.assertEqual(
+            self.lock_order(lambda: seed_catalog(2, 10, clear=True)),
+            ["versions", "stats", "changes"],
+        )
+
+
+class ChangeFeedTests(TestCase):
+    """Test the change feed API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.provider = Provider.objects.create(provider_name="Acme")
+        self.article = Article.objects.create(
+            article_name="Anvil", price=10, provider_no=self.provider
+        )
+        self.gone = Article.objects.create(
+            article_name="Rope", price=5, provider_no=self.provider
+        )
+        self.client.delete(reverse("article:article-detail", args=[self.gone.pk]))
+
+    def test_feed(self):
+        """Test changes are listed oldest first with the current data"""
+        res = self.client.get(CHANGES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        body = res.json()
+        self.assertEqual(
+            [(c["type"], c["id"], c["op"]) for c in body["changes"]],
+            [
+                (Change.PROVIDER, self.provider.pk, Change.CREATE),
+                (Change.ARTICLE, self.article.pk, Change.CREATE),
+                (Change.ARTICLE, self.gone.pk, Change.CREATE),
+                (Change.ARTICLE, self.gone.pk, Change.DELETE),
+            ],
+        )
+        self.assertEqual(
+            body["changes"][0]["data"],
+            {"provider_no": self.provider.pk, "provider_name": "Acme"},
+        )
+        self.assertEqual(body["changes"][1]["data"]["provider_no"], self.provider.pk)
+        self.assertIsNone(body["changes"][2]["data"])
+        self.assertIsNone(body["changes"][3]["data"])
+        self.assertEqual(body["next"], body["changes"][-1]["seq"])
+        self.assertFalse(body["has_more"])
+
+    def test_pages(self):
+        """Test reading the feed page by page"""
+        first = self.client.get(CHANGES_URL, {"limit": 3}).json()
+        second = self.client.get(
+            CHANGES_URL, {"since": first["next"], "limit": 3}
+        ).json()
+        last = self.client.get(CHANGES_URL, {"since": second["next"]}).json()
+
+        self.assertEqual(len(first["changes"]), 3)
+        self.assertTrue(first["has_more"])
+        self.assertEqual(second["changes"][0]["op"], Change.DELETE)
+        self.assertFalse(second["has_more"])
+        self.assertEqual(
+            last, {"changes": [], "next": second["next"], "has_more": False}
+        )
+
+    def test_type(self):
+        """Test filtering changes by type"""
+        res = self.client.get(CHANGES_URL, {"type": Change.PROVIDER})
+
+        self.assertEqual([c["id"] for c in res.json()["changes"]], [self.provider.pk])
+
+    def test_invalid_params(self):
+        """Test invalid parameters are rejected"""
+        for params in [{"since": -1}, {"limit": 0}, {"type": "job"}, {"wait": 3600}]:
+            res = self.client.get(CHANGES_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_long_poll_timeout(self):
+        """Test a long poll without new changes ends after its wait"""
+        since = Change.objects.latest("seq").seq
+        started = time.monotonic()
+
+        with self.settings(CHANGES_POLL_INTERVAL=0.05):
+            res = self.client.get(CHANGES_URL, {"since": since, "wait": 0.2})
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(res.json(), {"changes": [], "next": since, "has_more": False})
+
+    def test_long_poll(self):
+        """Test a long poll returns the changes logged while it waits"""
+        since = Change.objects.latest("seq").seq
+
+        async def sleep(seconds):
+            await Provider.objects.acreate(provider_name="Late")
+
+        with mock.patch("core.async_views.asyncio.sleep", sleep):
+            res = self.client.get(CHANGES_URL, {"since": since, "wait": 10})
+
+        data = [c["data"] for c in res.json()["changes"]]
+        self.assertEqual([d["provider_name"] for d in data], ["Late"])
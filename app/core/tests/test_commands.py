@@ -1,13 +1,26 @@
 """
 Test custom Django management commands
 """
+import csv
+import io
+import json
+import os
+import tempfile
+from collections import Counter
+from unittest import skipIf, skipUnless
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2Error
 
-from django.core.management import call_command
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+
+from core import catalog
+from core.management.commands import import_articles
+from core.management.commands.import_articles import NDJSONToCSV
+from core.models import Article, Change, Provider, ProviderStats
 
 
 @patch("core.management.commands.wait_for_db.Command.check")
@@ -32,3 +45,213 @@ class CommandTest(SimpleTestCase):
         call_command("wait_for_db")
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=["default"])
+
+
+class ImportArticlesCommandTests(TestCase):
+    """Test the import_articles command."""
+
+    def write_file(self, suffix, content):
+        """Write {content} to a temporary file and return its path."""
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, "w", encoding="utf-8") as stream:
+            stream.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_import_csv(self):
+        """Test importing a CSV file creates providers and articles."""
+        Provider.objects.create(provider_name="Provider1")
+        path = self.write_file(
+            ".csv",
+            "price,provider_name,article_name\n"
+            "100,Provider1,Article1\n"
+            "200,Provider2,Article2\n"
+            "100,Provider1,Article1\n",
+        )
+        out = io.StringIO()
+
+        call_command("import_articles", path, stdout=out)
+
+        self.assertEqual(Provider.objects.count(), 2)
+        self.assertEqual(Article.objects.count(), 2)
+        article = Article.objects.get(article_name="Article2")
+        self.assertEqual(article.provider_no.provider_name, "Provider2")
+        self.assertEqual(article.price, 200)
+        self.assertIn("Imported 2 articles and 1 providers from 3 rows", out.getvalue())
+
+    def test_import_ndjson_skips_existing(self):
+        """Test importing NDJSON skips articles already stored."""
+        provider = Provider.objects.create(provider_name="Provider1")
+        Article.objects.create(article_name="Article1", price=100, provider_no=provider)
+        rows = [
+            {"provider_name": "Provider1", "article_name": "Article1", "price": 100},
+            {"provider_name": "Provider1", "article_name": "Article2", "price": 5},
+            {"provider_name": "Provider1", "article_name": "Bad", "price": "x"},
+        ]
+        path = self.write_file(".ndjson", "\n".join(json.dumps(r) for r in rows))
+
+        call_command("import_articles", path, "--batch-size", "2", stdout=io.StringIO())
+
+        self.assertEqual(Article.objects.count(), 2)
+        self.assertTrue(Article.objects.filter(article_name="Article2").exists())
+
+    def test_import_skips_deleting_providers(self):
+        """Test importing skips the articles of providers being deleted."""
+        Provider.objects.create(provider_name="Provider1", deleting=True)
+        path = self.write_file(
+            ".csv",
+            "provider_name,article_name,price\n"
+            "Provider1,Article1,100\n"
+            "Provider2,Article2,200\n",
+        )
+
+        call_command("import_articles", path, stdout=io.StringIO())
+
+        self.assertEqual(
+            list(Article.objects.values_list("article_name", flat=True)),
+            ["Article2"],
+        )
+
+    def test_import_logs_inserted_rows(self):
+        """Test only the rows the import inserted are logged as created."""
+        provider = Provider.objects.create(provider_name="Provider1")
+        path = self.write_file(
+            ".csv", "provider_name,article_name,price\nProvider2,Article1,100\n"
+        )
+        insert_batch = import_articles.Command.insert_batch
+
+        # Another client writes while the import runs.
+        def concurrent_insert(command, batch):
+            Article.objects.bulk_create(
+                [Article(article_name="Other", price=1, provider_no=provider)]
+            )
+            return insert_batch(command, batch)
+
+        with patch.object(import_articles.Command, "insert_batch", concurrent_insert):
+            call_command("import_articles", path, stdout=io.StringIO())
+
+        imported = Article.objects.get(article_name="Article1")
+        self.assertEqual(
+            list(
+                Change.objects.filter(type=Change.ARTICLE).values_list(
+                    "object_id", flat=True
+                )
+            ),
+            [imported.pk],
+        )
+
+    def test_import_bad_header(self):
+        """Test a CSV without the expected columns is rejected."""
+        path = self.write_file(".csv", "name,cost\nArticle1,100\n")
+
+        with self.assertRaises(CommandError):
+            call_command("import_articles", path, stdout=io.StringIO())
+
+    def test_import_unknown_format(self):
+        """Test a file of unknown format is rejected."""
+        path = self.write_file(".txt", "")
+
+        with self.assertRaises(CommandError):
+            call_command("import_articles", path, stdout=io.StringIO())
+
+    def test_ndjson_to_csv(self):
+        """Test NDJSON input is converted to CSV for COPY."""
+        source = io.StringIO(
+            '{"provider_name": "P, 1", "article_name": "A", "price": 1}\n\n'
+            '{"provider_name": "P2", "article_name": "B", "price": 2}\n'
+        )
+        reader = NDJSONToCSV(source)
+
+        chunks = []
+        while True:
+            chunk = reader.read(8)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+        rows = list(csv.reader(io.StringIO("".join(chunks))))
+        self.assertEqual(rows, [["P, 1", "A", "1"], ["P2", "B", "2"]])
+
+
+class IndexReportCommandTests(TestCase):
+    """Test the index_report command."""
+
+    @skipIf(connection.vendor == "postgresql", "Requires a non-PostgreSQL database.")
+    def test_index_report_requires_postgresql(self):
+        """Test the report refuses databases without pg_stat_user_indexes"""
+        with self.assertRaises(CommandError):
+            call_command("index_report", stdout=io.StringIO())
+
+    @skipUnless(connection.vendor == "postgresql", "Requires PostgreSQL.")
+    def test_index_report(self):
+        """Test the report lists the article indexes"""
+        out = io.StringIO()
+
+        call_command("index_report", stdout=out)
+
+        self.assertIn("article_provider_idx", out.getvalue())
+        self.assertIn("article_price_idx", out.getvalue())
+
+
+class SeedCatalogCommandTests(TestCase):
+    """Test the seed_catalog command."""
+
+    def seed(self, *args):
+        call_command("seed_catalog", *args, stdout=io.StringIO())
+        return list(
+            Article.objects.order_by("article_no").values_list(
+                "article_name", "price", "provider_no__provider_name"
+            )
+        )
+
+    def test_seed_catalog(self):
+        """Test providers get Zipf distributed articles and stats"""
+        self.seed("--providers", "20", "--articles", "3000", "--batch-size", "700")
+
+        counts = Counter(Article.objects.values_list("provider_no", flat=True))
+        sizes = [count for _, count in counts.most_common()]
+        self.assertEqual(Provider.objects.count(), 20)
+        self.assertEqual(sum(sizes), 3000)
+        self.assertGreater(sizes[0], 5 * sizes[-1])
+        self.assertFalse(Article.objects.filter(price__lt=1).exists())
+        self.assertEqual(ProviderStats.objects.count(), len(counts))
+
+    def test_even_spread(self):
+        """Test a zero skew spreads articles evenly"""
+        self.seed("--providers", "4", "--articles", "4000", "--zipf", "0")
+
+        counts = Counter(Article.objects.values_list("provider_no", flat=True))
+        self.assertLess(max(counts.values()) - min(counts.values()), 250)
+
+    def test_deterministic(self):
+        """Test the same seed gives the same catalog"""
+        args = ["--providers", "5", "--articles", "200", "--seed", "3"]
+        first = self.seed(*args)
+
+        second = self.seed(*args, "--clear")
+        other = self.seed("--clear", "--providers", "5", "--articles", "200")
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(Article.objects.count(), 200)
+
+    def test_seed_more(self):
+        """Test seeding again adds to the catalog"""
+        self.seed("--providers", "3", "--articles", "50")
+        self.seed("--providers", "3", "--articles", "50")
+
+        self.assertEqual(Provider.objects.count(), 6)
+        self.assertEqual(Article.objects.count(), 100)
+
+    def test_price_distribution(self):
+        """Test generated prices are log-normal around the median"""
+        _, prices, _ = next(catalog.article_batches([1], 20000, price_median=1000))
+
+        prices.sort()
+        self.assertAlmostEqual(prices[len(prices) // 2], 1000, delta=60)
+        self.assertGreater(prices[-1], 20 * prices[len(prices) // 2])
+
+    def test_invalid_options(self):
+        """Test articles cannot be seeded without providers"""
+        with self.assertRaises(CommandError):
+            self.seed("--providers", "0")
@@ -0,0 +1,85 @@
+"""
+Tests for conditional GET support.
+"""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Article, Provider
+
+
+ARTICLE_URL = reverse("article:article-list")
+PROVIDER_URL = reverse("provider:provider-list")
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETag and Last-Modified handling."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.provider = Provider.objects.create(provider_name="Provider1")
+        Article.objects.create(
+            article_name="Article1", price=100, provider_no=self.provider
+        )
+
+    def test_validators_set(self):
+        """Test list responses carry ETag and Last-Modified."""
+        res = self.client.get(ARTICLE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["ETag"].startswith('W/"'))
+        self.assertIn("Last-Modified", res)
+
+    def test_if_none_match_not_modified(self):
+        """Test a matching If-None-Match is answered with 304 and no query."""
+        etag = self.client.get(ARTICLE_URL)["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ARTICLE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+        self.assertEqual(res["ETag"], etag)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('FROM "core_article"', queries[0]["sql"])
+
+    def test_etag_changes_after_write(self):
+        """Test a write changes the ETag and ends 304 answers."""
+        etag = self.client.get(ARTICLE_URL)["ETag"]
+        Article.objects.create(
+            article_name="Article2", price=200, provider_no=self.provider
+        )
+
+        res = self.client.get(ARTICLE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_etag_depends_on_query(self):
+        """Test different query parameters get different ETags."""
+        first = self.client.get(ARTICLE_URL)["ETag"]
+        second = self.client.get(ARTICLE_URL, {"page_size": 1})["ETag"]
+
+        self.assertNotEqual(first, second)
+
+    def test_if_modified_since_not_modified(self):
+        """Test a current If-Modified-Since is answered with 304."""
+        modified = self.client.get(PROVIDER_URL)["Last-Modified"]
+
+        res = self.client.get(PROVIDER_URL, HTTP_IF_MODIFIED_SINCE=modified)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_not_modified(self):
+        """Test conditional requests on detail endpoints."""
+        url = reverse("provider:provider-detail", args=[self.provider.provider_no])
+        etag = self.client.get(url)["ETag"]
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,140 @@
+"""
+Tests for the database connection pool.
+"""
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.db.pool import ConnectionPool
+
+
+def fake_connect(*args, **kwargs):
+    """Return a stand-in for an open, idle psycopg2 connection."""
+    connection = MagicMock(closed=0)
+    connection.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+    return connection
+
+
+@patch("psycopg2.pool.psycopg2.connect", side_effect=fake_connect)
+class ConnectionPoolTests(SimpleTestCase):
+    """Test the pool counters and blocking behaviour."""
+
+    def test_reuses_connections(self, patched_connect):
+        """Test returned connections are handed out again"""
+        pool = ConnectionPool(1, 2)
+
+        first = pool.getconn()
+        pool.putconn(first)
+        second = pool.getconn()
+
+        self.assertIs(first, second)
+        self.assertEqual(pool.stats()["created"], 1)
+        self.assertEqual(pool.stats()["in_use"], 1)
+
+    def test_stats(self, patched_connect):
+        """Test the in use, idle and created counters"""
+        pool = ConnectionPool(1, 3)
+
+        connections = [pool.getconn(), pool.getconn()]
+        stats = pool.stats()
+        for connection in connections:
+            pool.putconn(connection)
+
+        self.assertEqual(stats["in_use"], 2)
+        self.assertEqual(stats["idle"], 0)
+        self.assertEqual(stats["created"], 2)
+        self.assertEqual(pool.stats()["in_use"], 0)
+        self.assertEqual(pool.stats()["idle"], 1)
+
+    def test_timeout_when_exhausted(self, patched_connect):
+        """Test getting a connection fails after the timeout when all are used"""
+        pool = ConnectionPool(1, 1, timeout=0.01)
+        pool.getconn()
+
+        with self.assertRaises(PoolError):
+            pool.getconn()
+
+        self.assertEqual(pool.stats()["timeouts"], 1)
+        self.assertEqual(pool.stats()["waiting"], 0)
+
+    def test_waits_for_returned_connection(self, patched_connect):
+        """Test a waiting thread gets the next returned connection"""
+        pool = ConnectionPool(1, 1, timeout=5)
+        connection = pool.getconn()
+        result = []
+
+        waiter = threading.Thread(target=lambda: result.append(pool.getconn()))
+        waiter.start()
+        while pool.stats()["waiting"] == 0:
+            time.sleep(0.001)
+        pool.putconn(connection)
+        waiter.join()
+
+        self.assertEqual(result, [connection])
+
+    def test_discards_closed_connections(self, patched_connect):
+        """Test connections closed while idle are replaced on checkout"""
+        pool = ConnectionPool(1, 2)
+        first = pool.getconn()
+        pool.putconn(first)
+        first.closed = 2
+
+        second = pool.getconn()
+
+        self.assertIsNot(second, first)
+        self.assertEqual(pool.stats()["created"], 2)
+        self.assertEqual(pool.stats()["in_use"], 1)
+
+    def test_checks_connections(self, patched_connect):
+        """Test idle connections failing a ping are replaced with check"""
+        pool = ConnectionPool(1, 2, check=True)
+        first = pool.getconn()
+        pool.putconn(first)
+        first.cursor.return_value.__enter__.return_value.execute.side_effect = (
+            psycopg2.OperationalError
+        )
+
+        second = pool.getconn()
+
+        self.assertIsNot(second, first)
+        first.close.assert_called_once()
+        self.assertEqual(pool.stats()["idle"], 0)
+        self.assertEqual(pool.stats()["in_use"], 1)
+
+    def test_discards_broken_connections_on_return(self, patched_connect):
+        """Test connections that cannot be rolled back are not pooled"""
+        pool = ConnectionPool(1, 2)
+        connection = pool.getconn()
+        connection.info.transaction_status = extensions.TRANSACTION_STATUS_INERROR
+        connection.rollback.side_effect = psycopg2.InterfaceError
+
+        pool.putconn(connection)
+
+        connection.close.assert_called_once()
+        self.assertEqual(pool.stats()["idle"], 0)
+        self.assertEqual(pool.stats()["in_use"], 0)
+
+
+class PoolStatsApiTests(TestCase):
+    """Test the pool stats API."""
+
+    def test_pool_stats(self):
+        """Test listing the pools of the process"""
+        pool = MagicMock()
+        pool.stats.return_value = {"min": 1, "max": 2, "in_use": 1}
+
+        with patch.dict("core.db.pool._pools", {"default": pool}, clear=True):
+            res = APIClient().get(reverse("db-pool-stats"))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            res.json(), [{"alias": "default", "min": 1, "max": 2, "in_use": 1}]
+        )
@@ -0,0 +1,256 @@
+"""
+Tests for background jobs.
+"""
+import io
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import jobs
+from core.models import Article, Job, Provider, ProviderStats
+
+
+def register(name, func, **options):
+    """Register a task for the duration of a test."""
+    jobs.task(name, **options)(func)
+
+
+@override_settings(JOB_RETRY_DELAY=10, JOB_MAX_ATTEMPTS=3)
+class JobTests(TestCase):
+    """Test queuing, claiming and running jobs."""
+
+    def setUp(self):
+        self.calls = []
+        tasks = dict(jobs.TASKS)
+        self.addCleanup(lambda: (jobs.TASKS.clear(), jobs.TASKS.update(tasks)))
+
+        def add(job, a, b):
+            self.calls.append(job.pk)
+            return a + b
+
+        def broken(job):
+            raise RuntimeError("broken")
+
+        def slow(job):
+            time.sleep(5)
+
+        register("add", add)
+        register("broken", broken)
+        register("slow", slow, timeout=1, max_attempts=1)
+
+    def test_run_job(self):
+        """Test a job runs its task and records the result"""
+        job = jobs.enqueue("add", a=1, b=2)
+
+        self.assertEqual(jobs.work(once=True), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.result, 3)
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(job.progress, 1)
+        self.assertIsNone(job.locked_until)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_unknown_task(self):
+        """Test only registered tasks are queued"""
+        with self.assertRaisesMessage(ValueError, "Unknown task: missing"):
+            jobs.enqueue("missing")
+
+    def test_claim_order(self):
+        """Test jobs are claimed oldest first, once they are due"""
+        later = jobs.enqueue("add", run_after=timezone.now() + timedelta(hours=1))
+        first = jobs.enqueue("add", a=1, b=1)
+        second = jobs.enqueue("add", a=2, b=2)
+
+        self.assertEqual(jobs.claim("w").pk, first.pk)
+        self.assertEqual(jobs.claim("w").pk, second.pk)
+        self.assertIsNone(jobs.claim("w"))
+        later.refresh_from_db()
+        self.assertEqual(later.status, Job.QUEUED)
+
+    def test_claim(self):
+        """Test claiming a job leases it to the worker"""
+        jobs.enqueue("add", a=1, b=1)
+
+        job = jobs.claim("worker-1")
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertEqual(job.worker, "worker-1")
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(
+            job.locked_until, timezone.now() + timedelta(seconds=job.timeout)
+        )
+
+    def test_retry(self):
+        """Test failed attempts are retried with a growing delay, then fail"""
+        job = jobs.enqueue("broken")
+
+        with self.assertLogs("core.jobs", "WARNING"):
+            jobs.work(once=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.error, "broken")
+        delay = job.run_after - timezone.now()
+        self.assertTrue(timedelta(seconds=5) < delay <= timedelta(seconds=10))
+
+        Job.objects.update(run_after=timezone.now())
+        with self.assertLogs("core.jobs", "WARNING"):
+            jobs.work(once=True)
+        job.refresh_from_db()
+        self.assertGreater(job.run_after - timezone.now(), timedelta(seconds=15))
+
+        Job.objects.update(run_after=timezone.now())
+        with self.assertLogs("core.jobs", "WARNING"):
+            jobs.work(once=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 3)
+        self.assertEqual(jobs.work(once=True), 0)
+
+    def test_timeout(self):
+        """Test an attempt running past its timeout is stopped"""
+        job = jobs.enqueue("slow")
+        started = time.monotonic()
+
+        with self.assertLogs("core.jobs", "WARNING"):
+            jobs.work(once=True)
+
+        job.refresh_from_db()
+        self.assertLess(time.monotonic() - started, 4)
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.error, "Timed out after 1s.")
+
+    def test_expired_lease(self):
+        """Test jobs of a stopped worker are claimed again"""
+        job = jobs.enqueue("add", a=1, b=1)
+        jobs.claim("stopped")
+        stale = jobs.enqueue("add", a=2, b=2)
+        jobs.claim("stopped")
+        expired = timezone.now() - timedelta(seconds=1)
+        Job.objects.update(locked_until=expired)
+        Job.objects.filter(pk=stale.pk).update(attempts=3)
+
+        self.assertEqual(jobs.work("new", once=True), 1)
+
+        job.refresh_from_db()
+        stale.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(job.worker, "new")
+        self.assertEqual(stale.status, Job.FAILED)
+        self.assertEqual(stale.error, "The worker running the job stopped.")
+
+    def test_expired_attempt_dropped(self):
+        """Test a worker whose lease expired cannot overwrite a new attempt"""
+        jobs.enqueue("add", a=1, b=1)
+        first = jobs.claim("slow")
+        Job.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        second = jobs.claim("new")
+
+        with self.assertLogs("core.jobs", "WARNING"):
+            jobs.finish(first, Job.DONE, result=0)
+        jobs.finish(second, Job.DONE, result=2)
+
+        second.refresh_from_db()
+        self.assertEqual(first.status, Job.RUNNING)
+        self.assertEqual(second.result, 2)
+        self.assertEqual(second.worker, "new")
+        self.assertEqual(second.attempts, 2)
+
+    def test_set_progress(self):
+        """Test tasks record their progress"""
+        job = jobs.enqueue("add", a=1, b=1)
+
+        jobs.set_progress(job, 3, 4)
+
+        job.refresh_from_db()
+        self.assertEqual(job.progress, 0.75)
+
+    def test_run_workers(self):
+        """Test the command runs the ready jobs"""
+        jobs.enqueue("add", a=1, b=2)
+        jobs.enqueue("broken")
+        out = io.StringIO()
+
+        with self.assertLogs("core.jobs", "WARNING"):
+            call_command("run_workers", "--once", stdout=out)
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertIn("add #", out.getvalue())
+        self.assertIn("attempt 1/3: broken", out.getvalue())
+        self.assertIn("Ran 2 jobs.", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command("run_workers", "--processes", "0")
+
+
+class JobTaskTests(TestCase):
+    """Test the tasks the application queues."""
+
+    def test_refresh_provider_stats(self):
+        """Test provider stats are refreshed in the background"""
+        provider = Provider.objects.create(provider_name="Acme")
+        Article.objects.bulk_create(
+            [Article(article_name="A", price=5, provider_no=provider)]
+        )
+
+        call_command("refresh_provider_stats", "--background", stdout=io.StringIO())
+        self.assertFalse(ProviderStats.objects.exists())
+        jobs.work(once=True)
+
+        self.assertEqual(ProviderStats.objects.get().article_count, 1)
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_import_articles(self):
+        """Test files are imported in the background"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "articles.csv")
+            with open(path, "w") as f:
+                f.write("provider_name,article_name,price\nAcme,Anvil,10\n")
+
+            call_command("import_articles", path, "--background", stdout=io.StringIO())
+            self.assertFalse(Article.objects.exists())
+            jobs.work(once=True)
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.DONE, job.error)
+        self.assertEqual(job.args["files"], [path])
+        self.assertIn("Imported 1 articles", job.result["output"])
+        self.assertEqual(Article.objects.get().provider_no.provider_name, "Acme")
+
+
+class JobApiTests(TestCase):
+    """Test the job status API."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_job_status(self):
+        """Test listing and retrieving jobs"""
+        first = jobs.enqueue("refresh_provider_stats")
+        second = jobs.enqueue("refresh_provider_stats")
+        Job.objects.filter(pk=first.pk).update(status=Job.DONE)
+
+        res = self.client.get(reverse("job-list"))
+        done = self.client.get(reverse("job-list"), {"status": "done"})
+        invalid = self.client.get(reverse("job-list"), {"status": "lost"})
+        detail = self.client.get(reverse("job-detail", args=[second.pk]))
+        missing = self.client.get(reverse("job-detail", args=[999]))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([job["id"] for job in res.data], [second.pk, first.pk])
+        self.assertEqual([job["id"] for job in done.data], [first.pk])
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(detail.data["status"], Job.QUEUED)
+        self.assertEqual(detail.data["name"], "refresh_provider_stats")
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
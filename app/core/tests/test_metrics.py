@@ -0,0 +1,70 @@
+"""
+Tests for the request metrics.
+"""
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.models import Provider
+
+PROVIDER_URL = reverse("provider:provider-list")
+METRICS_URL = reverse("metrics")
+
+
+class HistogramTests(TestCase):
+    """Test the histogram rendering."""
+
+    def test_render(self):
+        """Test buckets are cumulative and labelled"""
+        histogram = metrics.Histogram("test_seconds", "Test.", (1, 2))
+        for value in (0.5, 1.5, 3):
+            histogram.observe(value, "GET", 'a"b')
+
+        self.assertEqual(
+            histogram.render().splitlines(),
+            [
+                "# HELP test_seconds Test.",
+                "# TYPE test_seconds histogram",
+                'test_seconds_bucket{method="GET",route="a\\"b",le="1"} 1',
+                'test_seconds_bucket{method="GET",route="a\\"b",le="2"} 2',
+                'test_seconds_bucket{method="GET",route="a\\"b",le="+Inf"} 3',
+                'test_seconds_sum{method="GET",route="a\\"b"} 5.0',
+                'test_seconds_count{method="GET",route="a\\"b"} 3',
+            ],
+        )
+
+
+class PerformanceMiddlewareTests(TestCase):
+    """Test the performance middleware."""
+
+    def setUp(self):
+        self.client = APIClient()
+        metrics.reset_metrics()
+
+    def test_server_timing(self):
+        """Test responses carry SQL, render and total timings"""
+        Provider.objects.create(provider_name="Provider1")
+
+        res = self.client.get(PROVIDER_URL)
+
+        timing = res["Server-Timing"]
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="\d+ queries", ')
+        self.assertIn("render;dur=", timing)
+        self.assertRegex(timing, r"total;dur=[\d.]+$")
+
+    def test_metrics_endpoint(self):
+        """Test recorded requests are exposed in Prometheus format"""
+        self.client.get(PROVIDER_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        body = res.content.decode()
+        labels = 'method="GET",route="provider:provider-list"'
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn(
+            f'api_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1', body
+        )
+        self.assertIn(f"api_db_queries_per_request_count{{{labels}}} 1", body)
+        self.assertIn(f"api_response_size_bytes_count{{{labels}}} 1", body)
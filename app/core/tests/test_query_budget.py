@@ -0,0 +1,269 @@
+"""
+Tests for query budgets.
+"""
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from rest_framework.test import APIClient
+
+from core import autocomplete, jobs
+from core.models import Article, Provider, ProviderDeletion
+from core.querybudget import QueryBudgetExceeded, log_request_queries, query_budget
+
+
+def url_names(patterns=None, namespace=None):
+    """Yield the names of every named URL pattern."""
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            inner = pattern.namespace or namespace
+            if pattern.namespace and namespace:
+                inner = f"{namespace}:{pattern.namespace}"
+            yield from url_names(pattern.url_patterns, inner)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield f"{namespace}:{pattern.name}" if namespace else pattern.name
+
+
+class QueryBudgetTests(TestCase):
+    """Test the query budget context manager."""
+
+    def setUp(self):
+        self.provider = Provider.objects.create(provider_name="Provider1")
+        for i in range(3):
+            Article.objects.create(
+                article_name=f"Article{i}", price=i, provider_no=self.provider
+            )
+
+    def test_within_budget(self):
+        """Test code within its budget passes"""
+        with query_budget(max_queries=1) as budget:
+            list(Article.objects.all())
+
+        self.assertEqual(len(budget.log.queries), 1)
+
+    def test_too_many_queries(self):
+        """Test exceeding the query count fails"""
+        with self.assertRaisesRegex(QueryBudgetExceeded, "2 queries, budget is 1"):
+            with query_budget(max_queries=1):
+                Article.objects.count()
+                Provider.objects.count()
+
+    def test_n_plus_one(self):
+        """Test one query per row is reported as N+1"""
+        with self.assertRaisesRegex(QueryBudgetExceeded, "3x similar query"):
+            with query_budget(max_repeats=2):
+                for article in Article.objects.all():
+                    Provider.objects.get(pk=article.provider_no_id).provider_name
+
+    def test_identical_queries(self):
+        """Test running the same query twice is reported"""
+        with self.assertRaisesRegex(QueryBudgetExceeded, "2x identical query"):
+            with query_budget():
+                Provider.objects.get(pk=self.provider.pk)
+                Provider.objects.get(pk=self.provider.pk)
+
+    def test_decorator(self):
+        """Test the budget can decorate a function"""
+
+        @query_budget(max_queries=0)
+        def count():
+            return Article.objects.count()
+
+        with self.assertRaises(QueryBudgetExceeded):
+            count()
+
+    def test_error_inside_budget(self):
+        """Test exceptions of the enclosed code propagate unchanged"""
+        with self.assertRaises(Provider.DoesNotExist):
+            with query_budget(max_queries=0):
+                Provider.objects.get(pk=0)
+
+
+@override_settings(QUERY_BUDGETS={"provider:provider-list": {"GET": 0}})
+class QueryBudgetMiddlewareTests(TestCase):
+    """Test the query budget middleware."""
+
+    url = reverse("provider:provider-list")
+
+    @override_settings(QUERY_BUDGET_MODE="raise")
+    def test_raise(self):
+        """Test a request over its budget raises in raise mode"""
+        with self.assertRaises(QueryBudgetExceeded):
+            APIClient().get(self.url)
+
+    @override_settings(QUERY_BUDGET_MODE="log")
+    def test_log(self):
+        """Test a request over its budget is logged in log mode"""
+        with self.assertLogs("core.querybudget", "WARNING") as logs:
+            res = APIClient().get(self.url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn("budget is 0", logs.output[0])
+
+    @override_settings(QUERY_BUDGET_MODE="off")
+    def test_off(self):
+        """Test queries are not wrapped while the middleware is off"""
+        with mock.patch.object(connection, "execute_wrappers", []):
+            APIClient().get(self.url)
+
+            self.assertNotIn(log_request_queries, connection.execute_wrappers)
+
+    @override_settings(QUERY_BUDGET_MODE="raise")
+    def test_installs_on_open_connections(self):
+        """Test connections opened before the middleware get the request log"""
+        with mock.patch.object(connection, "execute_wrappers", []):
+            with self.assertRaises(QueryBudgetExceeded):
+                APIClient().get(self.url)
+
+            self.assertIn(log_request_queries, connection.execute_wrappers)
+
+    @override_settings(QUERY_BUDGET_MODE="raise")
+    async def test_async_view(self):
+        """Test the queries of async views are checked too"""
+        url = reverse("provider:provider-async-list")
+        budgets = {"provider:provider-async-list": {"GET": 0}}
+
+        with self.settings(QUERY_BUDGETS=budgets):
+            with self.assertRaisesRegex(QueryBudgetExceeded, "budget is 0"):
+                await AsyncClient().get(url)
+
+
+class EndpointBudgetTests(TestCase):
+    """Test every endpoint runs within its query budget."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.provider = Provider.objects.create(provider_name="Provider1")
+        self.other = Provider.objects.create(provider_name="Provider2")
+        for i in range(10):
+            Article.objects.create(
+                article_name=f"Article{i}", price=i, provider_no=self.provider
+            )
+        self.article = Article.objects.first()
+
+    def request(self, route, method="GET", args=(), data=None, **params):
+        """Send a request within the budget of the URL named `route`"""
+        url = reverse(route, args=args)
+        with query_budget.for_route(route, method):
+            res = getattr(self.client, method.lower())(
+                url, data if data is not None else params, format="json"
+            )
+            body = b"".join(res.streaming_content) if res.streaming else res.content
+        self.assertLess(res.status_code, 400, body)
+        return res
+
+    def test_every_route_has_budget(self):
+        """Test a budget is declared for every named API URL"""
+        # The router root views are shadowed by the list routes registered
+        # at the same prefix.
+        names = {
+            name
+            for name in url_names()
+            if not name.startswith("admin:") and not name.endswith(":api-root")
+        }
+
+        self.assertEqual(names - set(settings.QUERY_BUDGETS), set())
+
+    def test_article_reads(self):
+        """Test the article read endpoints"""
+        pk = self.article.article_no
+        pid = self.provider.provider_no
+        self.request("article:article-list")
+        self.request("article:article-list", pid=pid, min=1, name="Art")
+        self.request("article:article-list", expand="provider", fields="price")
+        self.request("article:article-detail", args=[pk])
+        self.request("article:article-detail", args=[pk], expand="provider")
+        self.request("article:article-export", pid=pid)
+        self.request("article:article-prices", pid=pid)
+        self.request("article:article-search", q="Art", pid=pid)
+        self.request("article:article-async-list", min=1)
+        self.request("article:article-async-detail", args=[pk])
+        self.request("article:price-filter-list", min=1, max=5)
+        self.request("article:provider-filter-list", pid=pid)
+
+    def test_article_writes(self):
+        """Test the article write endpoints"""
+        pk = self.article.article_no
+        pid = self.provider.provider_no
+        data = {"article_name": "New", "price": 1, "provider_no": pid}
+        self.request("article:article-list", "POST", data=data)
+        data = {"article_name": "Renamed", "price": 2, "provider_no": pid}
+        self.request("article:article-detail", "PUT", args=[pk], data=data)
+        self.request("article:article-detail", "PATCH", args=[pk], data={"price": 3})
+        self.request("article:article-detail", "DELETE", args=[pk])
+
+    def test_article_bulk(self):
+        """Test the bulk article endpoints"""
+        pid = self.provider.provider_no
+        rows = [
+            {"article_name": f"Bulk{i}", "price": i, "provider_no": pid}
+            for i in range(20)
+        ]
+        self.request("article:article-bulk", "POST", data=rows)
+        existing = list(
+            Article.objects.filter(article_name__startswith="Bulk").values_list(
+                "article_no", flat=True
+            )
+        )
+        updates = [
+            {"article_no": pk, "article_name": f"B{pk}", "price": 1, "provider_no": pid}
+            for pk in existing
+        ]
+        self.request("article:article-bulk", "PUT", data=updates)
+        self.request("article:article-bulk", "DELETE", data=existing)
+
+    def test_provider_endpoints(self):
+        """Test the provider endpoints"""
+        pk = self.other.provider_no
+        self.request("provider:provider-list")
+        self.request("provider:provider-detail", args=[pk])
+        self.request("provider:provider-async-list")
+        self.request("provider:provider-async-detail", args=[pk])
+        self.request("provider:provider-stats")
+        self.request("provider:provider-search", q="Prov")
+        self.request("provider:provider-list", "POST", data={"provider_name": "New"})
+        data = {"provider_name": "Renamed"}
+        self.request("provider:provider-detail", "PUT", args=[pk], data=data)
+        self.request("provider:provider-detail", "PATCH", args=[pk], data=data)
+        self.request("provider:provider-detail", "DELETE", args=[self.provider.pk])
+        url = reverse("provider:provider-detail", args=[pk]) + "?async=true"
+        with query_budget.for_route("provider:provider-detail", "DELETE"):
+            res = self.client.delete(url)
+        self.assertEqual(res.status_code, 202)
+        deletion = ProviderDeletion.objects.get()
+        self.request("provider:provider-deletion", args=[deletion.pk])
+
+    def test_job_endpoints(self):
+        """Test the background job endpoints"""
+        job = jobs.enqueue("refresh_provider_stats")
+        self.request("job-list")
+        self.request("job-list", status="queued", name="refresh_provider_stats")
+        self.request("job-detail", args=[job.pk])
+
+    def test_change_feed(self):
+        """Test the change feed, with the data of articles and providers"""
+        self.request("changes")
+        self.request("changes", since=1, limit=1, type="article")
+
+    def test_core_endpoints(self):
+        """Test the monitoring and documentation endpoints"""
+        for name in [
+            "health-check",
+            "cache-stats",
+            "db-pool-stats",
+            "metrics",
+            "api-schema",
+            "api-docs",
+        ]:
+            with self.subTest(name=name):
+                self.request(name)
+
+    def test_autocomplete(self):
+        """Test autocomplete lookups are served from memory once built"""
+        autocomplete.clear_indexes()
+        self.addCleanup(autocomplete.clear_indexes)
+        self.client.get(reverse("autocomplete"), {"q": "warm"})
+
+        self.request("autocomplete", q="Art")
@@ -0,0 +1,78 @@
+"""
+Tests for the fast JSON serialization path.
+"""
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Article, Provider
+from core.renderers import FastJSONRenderer
+
+
+TRICKY_STRINGS = [
+    "",
+    "plain",
+    'quote " and backslash \\',
+    "controls \x00\x01\x08\x09\x0a\x0c\x0d\x1f\x7f",
+    "unicode é ü 中文 \U0001f600",
+    "separators \u2028 \u2029",
+    "</script>",
+]
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class FastJSONTests(TestCase):
+    """Test the fast JSON path produces the same bytes as DRF."""
+
+    def test_renderer_byte_identical(self):
+        """Test the fast renderer matches JSONRenderer."""
+        data = {
+            "next": None,
+            "previous": "http://testserver/api/article/?cursor=cD0x",
+            "results": [
+                {"article_no": i, "article_name": name, "price": -i, "provider_no": 1}
+                for i, name in enumerate(TRICKY_STRINGS)
+            ],
+            "big": 2**63 - 1,
+            "flags": [True, False],
+        }
+
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_renderer_indent_falls_back(self):
+        """Test indented output is delegated to JSONRenderer."""
+        data = {"a": [1, 2]}
+        media_type = "application/json; indent=4"
+
+        self.assertEqual(
+            FastJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type),
+        )
+
+    def test_list_endpoints_byte_identical(self):
+        """Test list endpoints return the same body on both paths."""
+        client = APIClient()
+        provider = Provider.objects.create(provider_name="Provider \u2028")
+        for i, name in enumerate(TRICKY_STRINGS):
+            Article.objects.create(
+                article_name=name, price=100 * i, provider_no=provider
+            )
+        urls = [
+            reverse("article:article-list") + "?page_size=3",
+            reverse("article:price-filter-list") + "?min=100",
+            reverse("article:provider-filter-list") + f"?pid={provider.pk}",
+            reverse("provider:provider-list"),
+        ]
+
+        for url in urls:
+            with self.subTest(url=url):
+                with override_settings(API_FAST_JSON=True):
+                    fast = client.get(url)
+                with override_settings(API_FAST_JSON=False):
+                    slow = client.get(url)
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, slow.content)
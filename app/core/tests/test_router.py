@@ -0,0 +1,159 @@
+"""
+Tests for the replica database router.
+"""
+from unittest.mock import patch
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.db import router
+from core.db.router import ReplicaRouter, routing_context
+from core.middleware import replica_stickiness_middleware
+from core.models import Article
+
+
+@override_settings(
+    DATABASE_REPLICAS=["replica1", "replica2"], DB_REPLICA_CHECK_INTERVAL=60
+)
+@patch.dict("core.db.router._health", clear=True)
+@patch("core.db.router.check_replica", return_value=True)
+class ReplicaRouterTests(SimpleTestCase):
+    """Test routing reads to replicas."""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        router._counter = 0
+
+    def test_reads_round_robin(self, patched_check):
+        """Test reads alternate between the replicas"""
+        reads = [self.router.db_for_read(Article) for _ in range(4)]
+
+        self.assertEqual(reads, ["replica1", "replica2", "replica1", "replica2"])
+
+    def test_one_replica_per_context(self, patched_check):
+        """Test the reads of a routing context all use the same replica"""
+        contexts = []
+        for _ in range(2):
+            with routing_context():
+                contexts.append([self.router.db_for_read(Article) for _ in range(3)])
+
+        self.assertEqual(contexts, [["replica1"] * 3, ["replica2"] * 3])
+
+    def test_writes_go_to_primary(self, patched_check):
+        """Test writes use the primary"""
+        self.assertEqual(self.router.db_for_write(Article), "default")
+
+    def test_unhealthy_replica_skipped(self, patched_check):
+        """Test a failing replica is skipped until it is checked again"""
+        patched_check.side_effect = lambda alias: alias != "replica1"
+
+        reads = [self.router.db_for_read(Article) for _ in range(3)]
+
+        self.assertEqual(reads, ["replica2", "replica2", "replica2"])
+        self.assertEqual(patched_check.call_count, 2)
+
+    def test_no_healthy_replica(self, patched_check):
+        """Test reads fall back to the primary without healthy replicas"""
+        patched_check.return_value = False
+
+        self.assertEqual(self.router.db_for_read(Article), "default")
+
+    @override_settings(DB_REPLICA_CHECK_INTERVAL=0)
+    def test_replica_recovers(self, patched_check):
+        """Test a replica is used again once its check passes"""
+        patched_check.return_value = False
+        self.router.db_for_read(Article)
+        patched_check.return_value = True
+
+        self.assertEqual(self.router.db_for_read(Article), "replica1")
+
+    def test_read_your_writes(self, patched_check):
+        """Test reads after a write in the same context use the primary"""
+        with routing_context() as state:
+            before = self.router.db_for_read(Article)
+            self.router.db_for_write(Article)
+            after = self.router.db_for_read(Article)
+
+        self.assertEqual(before, "replica1")
+        self.assertEqual(after, "default")
+        self.assertTrue(state["wrote"])
+
+    def test_pinned_context(self, patched_check):
+        """Test every read of a pinned context uses the primary"""
+        with routing_context(pinned=True):
+            self.assertEqual(self.router.db_for_read(Article), "default")
+
+    def test_migrations_only_on_primary(self, patched_check):
+        """Test replicas are never migrated"""
+        self.assertFalse(self.router.allow_migrate("replica1", "core"))
+        self.assertIsNone(self.router.allow_migrate("default", "core"))
+
+
+@override_settings(DB_PRIMARY_COOKIE="db_primary", DB_REPLICA_STICKY_SECONDS=5)
+class ReplicaStickinessMiddlewareTests(SimpleTestCase):
+    """Test the read-your-writes middleware."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def run_middleware(self, request, write=False):
+        """Run `request` through the middleware and return (state, response)"""
+        seen = {}
+
+        def view(request):
+            seen.update(router._routing.get())
+            if write:
+                ReplicaRouter().db_for_write(Article)
+            return HttpResponse()
+
+        response = replica_stickiness_middleware(view)(request)
+        return seen, response
+
+    def test_read_not_pinned(self):
+        """Test a plain read may use replicas and sets no cookie"""
+        state, response = self.run_middleware(self.factory.get("/"))
+
+        self.assertFalse(state["pinned"])
+        self.assertNotIn("db_primary", response.cookies)
+
+    def test_write_sets_cookie(self):
+        """Test an unsafe request is pinned and keeps the client on the primary"""
+        state, response = self.run_middleware(self.factory.post("/"))
+
+        self.assertTrue(state["pinned"])
+        self.assertEqual(response.cookies["db_primary"]["max-age"], 5)
+
+    def test_write_during_get(self):
+        """Test a GET that wrote also sets the cookie"""
+        state, response = self.run_middleware(self.factory.get("/"), write=True)
+
+        self.assertIn("db_primary", response.cookies)
+
+    def test_cookie_pins_reads(self):
+        """Test reads of a client that recently wrote use the primary"""
+        request = self.factory.get("/")
+        request.COOKIES["db_primary"] = "1"
+
+        state, response = self.run_middleware(request)
+
+        self.assertTrue(state["pinned"])
+
+    def test_streaming_content_pinned(self):
+        """Test streaming content read after the response keeps the routing"""
+        request = self.factory.get("/")
+        request.COOKIES["db_primary"] = "1"
+
+        def content():
+            yield ReplicaRouter().db_for_read(Article)
+
+        def view(request):
+            return StreamingHttpResponse(content())
+
+        with override_settings(DATABASE_REPLICAS=["replica1"]), patch(
+            "core.db.router.check_replica", return_value=True
+        ), patch.dict("core.db.router._health", clear=True):
+            response = replica_stickiness_middleware(view)(request)
+            body = b"".join(response.streaming_content)
+
+        self.assertEqual(body, b"default")
+        self.assertIsNone(router._routing.get())
@@ -1,11 +1,25 @@
 """
 Core views for app
 """
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import serializers
 
+from core.autocomplete import INDEXES
+from core.cache import cache_stats as get_cache_stats
+from core.db.pool import pool_stats
+from core.metrics import render_metrics
+from core.models import Article, Job, Provider
+
+AUTOCOMPLETE_LIMIT = 10
+MAX_AUTOCOMPLETE_LIMIT = 50
+
+JOB_LIMIT = 50
+MAX_JOB_LIMIT = 500
+
 
 class HealthCheckSerializer(serializers.Serializer):
     healthy = serializers.BooleanField()
@@ -16,3 +30,149 @@ class HealthCheckSerializer(serializers.Serializer):
 def health_check(request):
     """Returns successful response."""
     return Response({"healthy": True})
+
+
+class CacheStatsSerializer(serializers.Serializer):
+    hits = serializers.IntegerField()
+    misses = serializers.IntegerField()
+    hit_ratio = serializers.FloatField()
+    backend = serializers.CharField()
+
+
+@extend_schema(tags=["cache"], responses={200: CacheStatsSerializer})
+@api_view(["GET"])
+def cache_stats(request):
+    """Returns the response cache counters of this process."""
+    return Response(get_cache_stats())
+
+
+class PoolStatsSerializer(serializers.Serializer):
+    alias = serializers.CharField()
+    min = serializers.IntegerField()
+    max = serializers.IntegerField()
+    in_use = serializers.IntegerField()
+    idle = serializers.IntegerField()
+    waiting = serializers.IntegerField()
+    created = serializers.IntegerField()
+    timeouts = serializers.IntegerField()
+
+
+@extend_schema(tags=["database"], responses={200: PoolStatsSerializer(many=True)})
+@api_view(["GET"])
+def db_pool_stats(request):
+    """Returns the database connection pool counters of this process."""
+    return Response(pool_stats())
+
+
+def metrics(request):
+    """Returns the request metrics of this process in Prometheus text format."""
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+class AutocompleteParamsSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=100)
+    type = serializers.ChoiceField(choices=["provider", "article"], required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=MAX_AUTOCOMPLETE_LIMIT, default=AUTOCOMPLETE_LIMIT
+    )
+
+
+class ProviderSuggestionSerializer(serializers.Serializer):
+    provider_no = serializers.IntegerField()
+    provider_name = serializers.CharField()
+
+
+class ArticleSuggestionSerializer(serializers.Serializer):
+    article_no = serializers.IntegerField()
+    article_name = serializers.CharField()
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    providers = ProviderSuggestionSerializer(many=True, required=False)
+    articles = ArticleSuggestionSerializer(many=True, required=False)
+
+
+@extend_schema(
+    tags=["autocomplete"],
+    parameters=[AutocompleteParamsSerializer],
+    responses={200: AutocompleteSerializer},
+)
+@api_view(["GET"])
+def autocomplete(request):
+    """Returns the provider and article names with a word starting with q."""
+    serializer = AutocompleteParamsSerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+    types = [params["type"]] if "type" in params else ["provider", "article"]
+    data = {}
+    if "provider" in types:
+        data["providers"] = [
+            {"provider_no": pk, "provider_name": name}
+            for pk, name in INDEXES[Provider].lookup(params["q"], params["limit"])
+        ]
+    if "article" in types:
+        data["articles"] = [
+            {"article_no": pk, "article_name": name}
+            for pk, name in INDEXES[Article].lookup(params["q"], params["limit"])
+        ]
+    return Response(data)
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            "id",
+            "name",
+            "args",
+            "status",
+            "attempts",
+            "max_attempts",
+            "timeout",
+            "progress",
+            "result",
+            "error",
+            "run_after",
+            "created_at",
+            "updated_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+
+class JobParamsSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Job.STATUSES, required=False)
+    name = serializers.CharField(max_length=100, required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=MAX_JOB_LIMIT, default=JOB_LIMIT
+    )
+
+
+@extend_schema(
+    tags=["jobs"],
+    parameters=[JobParamsSerializer],
+    responses={200: JobSerializer(many=True)},
+)
+@api_view(["GET"])
+def job_list(request):
+    """Returns the latest background jobs, newest first."""
+    serializer = JobParamsSerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+    queryset = Job.objects.order_by("-id")
+    if "status" in params:
+        queryset = queryset.filter(status=params["status"])
+    if "name" in params:
+        queryset = queryset.filter(name=params["name"])
+    return Response(JobSerializer(queryset[: params["limit"]], many=True).data)
+
+
+@extend_schema(tags=["jobs"], responses={200: JobSerializer})
+@api_view(["GET"])
+def job_detail(request, job_id):
+    """Returns the status, progress and result of a background job."""
+    job = get_object_or_404(Job, pk=job_id)
+    return Response(JobSerializer(job).data)
@@ -0,0 +1,13 @@
+"""
+Async read views for the provider API.
+"""
+from core.async_views import AsyncReadView
+from core.models import Provider
+from provider.serializers import ProviderSerializer
+
+
+class ProviderReadView(AsyncReadView):
+    """Async list and detail of providers."""
+
+    queryset = Provider.objects.active().order_by("-provider_no")
+    fields = ProviderSerializer.Meta.fields
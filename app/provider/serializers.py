@@ -2,7 +2,10 @@
 Serializers for provider APIs.
 """
 from rest_framework import serializers
-from core.models import Provider
+from core.models import Provider, ProviderDeletion
+
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
 
 
 class ProviderSerializer(serializers.ModelSerializer):
@@ -15,3 +18,64 @@ class ProviderSerializer(serializers.ModelSerializer):
             "provider_name",
         ]
         read_only_fields = ["provider_no"]
+
+
+class ProviderStatsSerializer(serializers.Serializer):
+    """Serializer for the article stats of a provider."""
+
+    provider_no = serializers.IntegerField()
+    provider_name = serializers.CharField()
+    article_count = serializers.IntegerField()
+    price_min = serializers.IntegerField(allow_null=True)
+    price_max = serializers.IntegerField(allow_null=True)
+    price_avg = serializers.FloatField(allow_null=True)
+
+
+class ProviderSearchSerializer(serializers.Serializer):
+    """Serializer validating the provider search query parameters."""
+
+    q = serializers.CharField(max_length=255)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=MAX_SEARCH_LIMIT, default=SEARCH_LIMIT
+    )
+
+
+class ProviderSearchResultSerializer(ProviderSerializer):
+    """Serializer for a provider found by a search."""
+
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(ProviderSerializer.Meta):
+        fields = ProviderSerializer.Meta.fields + ["rank"]
+
+
+class ProviderDeletionSerializer(serializers.ModelSerializer):
+    """Serializer for the progress of a background provider deletion."""
+
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProviderDeletion
+        fields = [
+            "id",
+            "provider_no",
+            "provider_name",
+            "status",
+            "articles_total",
+            "articles_deleted",
+            "progress",
+            "error",
+            "created_at",
+            "updated_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, deletion) -> float:
+        """Return the share of the articles deleted, from 0 to 1."""
+        if deletion.status == ProviderDeletion.DONE:
+            return 1.0
+        if not deletion.articles_total:
+            return 0.0
+        # The total comes from the stats; articles added meanwhile exceed it.
+        return round(min(deletion.articles_deleted / deletion.articles_total, 1), 4)
@@ -123,3 +123,35 @@ class ProviderApiTests(TestCase):
         res = self.client.delete(url)
 
         self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_async_provider_views(self):
+        """Test the async provider list and detail"""
+        provider = await Provider.objects.acreate(provider_name="Provider1")
+
+        res = await self.async_client.get(reverse("provider:provider-async-list"))
+        detail = await self.async_client.get(
+            reverse("provider:provider-async-detail", args=[provider.provider_no])
+        )
+
+        expected = {
+            "provider_no": provider.provider_no,
+            "provider_name": "Provider1",
+        }
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), [expected])
+        self.assertEqual(detail.json(), expected)
+
+    def test_search_providers(self):
+        """Test searching providers by name"""
+        Provider.objects.create(provider_name="Acme Tools")
+        Provider.objects.create(provider_name="Acme")
+        Provider.objects.create(provider_name="Globex")
+        url = reverse("provider:provider-search")
+
+        res = self.client.get(url, {"q": "acme", "limit": 1})
+        missing = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()), 1)
+        self.assertTrue(res.json()[0]["provider_name"].startswith("Acme"))
+        self.assertEqual(missing.status_code, status.HTTP_400_BAD_REQUEST)
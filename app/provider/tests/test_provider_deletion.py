@@ -0,0 +1,165 @@
+"""
+Tests for background provider deletion.
+"""
+import io
+from unittest.mock import call, patch
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.deletion import run_provider_deletion
+from core.models import Article, Job, Provider, ProviderDeletion, ProviderStats
+from core.stats import refresh_provider_stats
+
+
+def detail_url(provider_id):
+    """Return provider detail URL"""
+    return reverse("provider:provider-detail", args=[provider_id])
+
+
+def deletion_url(deletion_id):
+    """Return provider deletion status URL"""
+    return reverse("provider:provider-deletion", kwargs={"deletion_id": deletion_id})
+
+
+class ProviderDeletionTests(TestCase):
+    """Test deleting providers in the background"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.provider = Provider.objects.create(provider_name="Acme")
+        self.other = Provider.objects.create(provider_name="Globex")
+        Article.objects.bulk_create(
+            Article(article_name=f"Article{i}", price=i + 1, provider_no=provider)
+            for provider in (self.provider, self.other)
+            for i in range(5)
+        )
+        refresh_provider_stats()
+
+    def delete_async(self, provider_id):
+        return self.client.delete(f"{detail_url(provider_id)}?async=true")
+
+    def test_async_delete(self):
+        """Test an async delete hides the provider and returns its progress"""
+        res = self.delete_async(self.provider.provider_no)
+
+        deletion = ProviderDeletion.objects.get()
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertTrue(res["Location"].endswith(deletion_url(deletion.pk)))
+        self.assertEqual(res.data["status"], ProviderDeletion.PENDING)
+        self.assertEqual(res.data["articles_total"], 5)
+        self.assertEqual(res.data["progress"], 0)
+        self.assertTrue(Provider.objects.get(pk=self.provider.pk).deleting)
+        self.assertEqual(Article.objects.count(), 10)
+        job = Job.objects.get()
+        self.assertEqual(job.name, "delete_provider")
+        self.assertEqual(job.args, {"deletion_id": deletion.pk})
+
+        names = [row["provider_name"] for row in self.client.get("/api/provider/").data]
+        stats = self.client.get(reverse("provider:provider-stats")).json()
+        search = self.client.get(reverse("provider:provider-search"), {"q": "acme"})
+        again = self.delete_async(self.provider.provider_no)
+        self.assertEqual(names, ["Globex"])
+        self.assertEqual([row["provider_name"] for row in stats], ["Globex"])
+        self.assertEqual(search.json(), [])
+        self.assertEqual(again.status_code, status.HTTP_404_NOT_FOUND)
+        res = self.client.get(detail_url(self.provider.provider_no))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deleting_provider_takes_no_articles(self):
+        """Test articles cannot be added to a provider being deleted"""
+        self.delete_async(self.provider.provider_no)
+        payload = {"article_name": "New", "price": 1, "provider_no": self.provider.pk}
+
+        res = self.client.post(reverse("article:article-list"), payload)
+        bulk = self.client.post(
+            reverse("article:article-bulk"), [payload], format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("provider_no", res.data)
+        self.assertEqual(bulk.data["errors"][0]["index"], 0)
+        self.assertFalse(Article.objects.filter(article_name="New").exists())
+
+    def test_run_deletion(self):
+        """Test the worker deletes the articles in batches, then the provider"""
+        self.delete_async(self.provider.provider_no)
+        deletion = ProviderDeletion.objects.get()
+
+        with patch("core.signals.bump_versions") as bump:
+            deletion = run_provider_deletion(deletion.pk, batch_size=2)
+
+        # One version bump per batch of articles.
+        self.assertEqual(bump.call_args_list.count(call(Article)), 3)
+        self.assertEqual(deletion.status, ProviderDeletion.DONE)
+        self.assertEqual(deletion.articles_deleted, 5)
+        self.assertIsNotNone(deletion.finished_at)
+        self.assertFalse(Provider.objects.filter(pk=self.provider.pk).exists())
+        self.assertFalse(ProviderStats.objects.filter(pk=self.provider.pk).exists())
+        self.assertEqual(Article.objects.count(), 5)
+        self.assertFalse(Article.objects.exclude(provider_no=self.other).exists())
+
+        res = self.client.get(deletion_url(deletion.pk))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["status"], ProviderDeletion.DONE)
+        self.assertEqual(res.data["progress"], 1)
+
+    def test_worker_runs_deletion(self):
+        """Test a job worker runs the deletion and reports its progress"""
+        self.delete_async(self.provider.provider_no)
+
+        with self.settings(PROVIDER_DELETE_BATCH_SIZE=2):
+            call_command("run_workers", "--once", stdout=io.StringIO())
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.progress, 1)
+        self.assertEqual(job.result, {"articles_deleted": 5})
+        self.assertFalse(Provider.objects.filter(pk=self.provider.pk).exists())
+
+    def test_failed_deletion(self):
+        """Test a failing deletion is recorded and can be retried"""
+        self.delete_async(self.provider.provider_no)
+        deletion = ProviderDeletion.objects.get()
+
+        with patch("core.signals.bump_versions", side_effect=RuntimeError("boom")):
+            with self.assertLogs("core.deletion", "ERROR"):
+                deletion = run_provider_deletion(deletion.pk, batch_size=2)
+
+        self.assertEqual(deletion.status, ProviderDeletion.FAILED)
+        self.assertEqual(deletion.error, "boom")
+        self.assertEqual(deletion.articles_deleted, 0)
+        self.assertEqual(Article.objects.count(), 10)
+
+        call_command("run_provider_deletions", stdout=io.StringIO())
+        self.assertTrue(Provider.objects.filter(pk=self.provider.pk).exists())
+
+        call_command("run_provider_deletions", "--failed", stdout=io.StringIO())
+        deletion.refresh_from_db()
+        self.assertEqual(deletion.status, ProviderDeletion.DONE)
+        self.assertEqual(deletion.error, "")
+        self.assertFalse(Provider.objects.filter(pk=self.provider.pk).exists())
+
+    def test_resume_command(self):
+        """Test the command finishes deletions a restart interrupted"""
+        self.delete_async(self.provider.provider_no)
+        self.delete_async(self.other.provider_no)
+        out = io.StringIO()
+
+        call_command("run_provider_deletions", "--batch-size", "3", stdout=out)
+
+        self.assertIn("Finished 2 deletions, 0 failed.", out.getvalue())
+        self.assertFalse(Provider.objects.exists())
+        self.assertFalse(Article.objects.exists())
+        with self.assertRaises(CommandError):
+            call_command("run_provider_deletions", "--batch-size", "0")
+
+    def test_deletion_not_found(self):
+        """Test the status of an unknown deletion"""
+        res = self.client.get(deletion_url(999))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
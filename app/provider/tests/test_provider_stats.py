@@ -0,0 +1,264 @@
+"""
+Test for the provider stats summary and its endpoint.
+"""
+import io
+import tempfile
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db.models import Count, Max, Min, Sum
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import stats
+from core.models import Article, Provider, ProviderStats
+
+
+STATS_URL = reverse("provider:provider-stats")
+ARTICLE_URL = reverse("article:article-list")
+BULK_URL = reverse("article:article-bulk")
+
+
+def article_detail_url(article_id):
+    """Return article detail URL"""
+    return reverse("article:article-detail", args=[article_id])
+
+
+def aggregated():
+    """Return the stats of every provider aggregated from the articles"""
+    rows = (
+        Article.objects.order_by()
+        .values("provider_no")
+        .annotate(
+            article_count=Count("*"),
+            price_sum=Sum("price"),
+            price_min=Min("price"),
+            price_max=Max("price"),
+        )
+    )
+    return {row.pop("provider_no"): row for row in rows}
+
+
+def summarized():
+    """Return the stats of every provider read from the summary table"""
+    rows = ProviderStats.objects.values(
+        "provider_no", "article_count", "price_sum", "price_min", "price_max"
+    )
+    return {row.pop("provider_no"): row for row in rows}
+
+
+class ProviderStatsTests(TestCase):
+    """Test the provider stats stay in sync with article writes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.provider1 = Provider.objects.create(provider_name="Provider1")
+        self.provider2 = Provider.objects.create(provider_name="Provider2")
+        self.provider3 = Provider.objects.create(provider_name="Provider3")
+        for i in range(4):
+            Article.objects.create(
+                article_name=f"Article{i}",
+                price=100 * (i + 1),
+                provider_no=self.provider1,
+            )
+        Article.objects.create(
+            article_name="Other", price=50, provider_no=self.provider2
+        )
+
+    def assertInSync(self):
+        self.assertEqual(summarized(), aggregated())
+
+    def test_stats_endpoint(self):
+        """Test the stats of every provider come back in one read"""
+        with self.assertNumQueries(2):
+            res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.json(),
+            [
+                {
+                    "provider_no": self.provider1.provider_no,
+                    "provider_name": "Provider1",
+                    "article_count": 4,
+                    "price_min": 100,
+                    "price_max": 400,
+                    "price_avg": 250.0,
+                },
+                {
+                    "provider_no": self.provider2.provider_no,
+                    "provider_name": "Provider2",
+                    "article_count": 1,
+                    "price_min": 50,
+                    "price_max": 50,
+                    "price_avg": 50.0,
+                },
+                {
+                    "provider_no": self.provider3.provider_no,
+                    "provider_name": "Provider3",
+                    "article_count": 0,
+                    "price_min": None,
+                    "price_max": None,
+                    "price_avg": None,
+                },
+            ],
+        )
+
+    def test_stats_endpoint_cache(self):
+        """Test cached stats are refreshed by article writes"""
+        self.client.get(STATS_URL)
+        Article.objects.create(
+            article_name="New", price=1000, provider_no=self.provider3
+        )
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data[2]["article_count"], 1)
+        self.assertEqual(res.data[2]["price_max"], 1000)
+
+    def test_single_writes(self):
+        """Test the stats follow article API writes"""
+        article = Article.objects.filter(provider_no=self.provider1).first()
+        pid1, pid3 = self.provider1.provider_no, self.provider3.provider_no
+        url = article_detail_url(article.article_no)
+        for method, url, data in [
+            (
+                "post",
+                ARTICLE_URL,
+                {"article_name": "A", "price": 5, "provider_no": pid3},
+            ),
+            (
+                "post",
+                f"{ARTICLE_URL}?upsert=1",
+                {"article_name": "B", "price": 9, "provider_no": pid3},
+            ),
+            ("patch", url, {"price": 1}),
+            ("put", url, {"article_name": "Moved", "price": 7, "provider_no": pid3}),
+            ("patch", url, {"provider_no": pid1}),
+            ("delete", url, None),
+        ]:
+            with self.subTest(method=method, url=url, data=data):
+                res = getattr(self.client, method)(url, data, format="json")
+
+                self.assertLess(res.status_code, 400, res.data)
+                self.assertInSync()
+
+    def test_incremental_writes(self):
+        """Test only writes removing a minimum or maximum price aggregate again"""
+        articles = list(
+            Article.objects.filter(provider_no=self.provider1).order_by("price")
+        )
+        pid1 = self.provider1.provider_no
+        for article, price, refreshed in [
+            (articles[1], 250, set()),
+            (articles[2], 50, set()),
+            (articles[1], 150, set()),
+            (articles[2], 120, {pid1}),
+            (articles[3], None, {pid1}),
+            (articles[2], None, set()),
+        ]:
+            with self.subTest(article=article.article_name, price=price):
+                with patch(
+                    "core.stats.refresh_provider_stats",
+                    wraps=stats.refresh_provider_stats,
+                ) as refresh:
+                    if price is None:
+                        article.delete()
+                    else:
+                        article.price = price
+                        article.save()
+
+                refresh.assert_called_once_with(refreshed)
+                self.assertInSync()
+
+    def test_bulk_writes(self):
+        """Test the stats follow bulk article writes"""
+        pid2, pid3 = self.provider2.provider_no, self.provider3.provider_no
+        rows = [
+            {"article_name": f"Bulk{i}", "price": i, "provider_no": pid2}
+            for i in range(5)
+        ]
+        self.client.post(BULK_URL, rows, format="json")
+        self.assertInSync()
+
+        rows.append({"article_name": "Extra", "price": 3, "provider_no": pid3})
+        self.client.post(f"{BULK_URL}?upsert=1", rows, format="json")
+        self.assertInSync()
+
+        bulk = Article.objects.filter(article_name__startswith="Bulk")
+        updates = [
+            {
+                "article_no": article.article_no,
+                "article_name": article.article_name,
+                "price": article.price + 1000,
+                "provider_no": pid3,
+            }
+            for article in bulk[:2]
+        ]
+        self.client.put(BULK_URL, updates, format="json")
+        self.assertInSync()
+
+        self.client.delete(
+            BULK_URL, list(bulk.values_list("article_no", flat=True)), format="json"
+        )
+        self.assertInSync()
+
+    def test_bulk_upsert_adds(self):
+        """Test bulk upserts add the rows they inserted without aggregating"""
+        pid1 = self.provider1.provider_no
+        rows = [
+            {"article_name": "Article0", "price": 100, "provider_no": pid1},
+            {"article_name": "Fresh", "price": 1, "provider_no": pid1},
+        ]
+
+        with patch("core.stats.refresh_provider_stats") as refresh:
+            self.client.post(f"{BULK_URL}?upsert=1", rows, format="json")
+
+        refresh.assert_not_called()
+        self.assertInSync()
+        self.assertEqual(summarized()[pid1]["article_count"], 5)
+
+    def test_refresh_upserts(self):
+        """Test refreshing recreates lost rows and overwrites stale ones"""
+        pid1, pid2 = self.provider1.provider_no, self.provider2.provider_no
+        ProviderStats.objects.filter(provider_no=pid1).delete()
+        ProviderStats.objects.filter(provider_no=pid2).update(article_count=7)
+
+        stats.refresh_provider_stats({pid1, pid2, self.provider3.provider_no})
+
+        self.assertInSync()
+
+    def test_provider_delete(self):
+        """Test deleting a provider drops its stats"""
+        self.provider1.delete()
+
+        self.assertInSync()
+
+    def test_import(self):
+        """Test imported articles are counted"""
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as stream:
+            stream.write(
+                "provider_name,article_name,price\n"
+                "Provider3,Imported,10\n"
+                "Provider4,Imported,20\n"
+            )
+            stream.flush()
+            call_command("import_articles", stream.name, stdout=io.StringIO())
+
+        self.assertInSync()
+        self.assertEqual(ProviderStats.objects.count(), 4)
+
+    def test_refresh_command(self):
+        """Test the refresh command rebuilds lost and stale rows"""
+        ProviderStats.objects.filter(provider_no=self.provider1).delete()
+        ProviderStats.objects.filter(provider_no=self.provider2).update(
+            article_count=99
+        )
+        ProviderStats.objects.create(provider_no=self.provider3, article_count=3)
+
+        call_command("refresh_provider_stats", stdout=io.StringIO())
+
+        self.assertInSync()
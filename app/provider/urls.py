@@ -4,7 +4,7 @@ URL mappings for the provider app.
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from provider import views
+from provider import async_views, views
 
 router = DefaultRouter()
 router.register("", views.ProviderViewSet)
@@ -12,5 +12,11 @@ router.register("", views.ProviderViewSet)
 app_name = "provider"
 
 urlpatterns = [
+    path("async/", async_views.ProviderReadView.as_view(), name="provider-async-list"),
+    path(
+        "async/<int:pk>/",
+        async_views.ProviderReadView.as_view(),
+        name="provider-async-detail",
+    ),
     path("", include(router.urls)),
 ]
@@ -1,17 +1,167 @@
 """
 views for the provider API.
 """
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 
-from rest_framework import viewsets
+from django.shortcuts import get_object_or_404
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
 
-from core.models import Provider
+from core.cache import CachedResponseMixin
+from core.deletion import start_provider_deletion
+from core.mixins import FastListMixin
+from core.models import Article, Provider, ProviderDeletion
+from core.renderers import FastJSONRenderer
+from core.search import search
 from provider import serializers
 
 
 @extend_schema(tags=["provider"])
-class ProviderViewSet(viewsets.ModelViewSet):
+class ProviderViewSet(CachedResponseMixin, FastListMixin, viewsets.ModelViewSet):
     """View for managing provider API."""
 
     serializer_class = serializers.ProviderSerializer
-    queryset = Provider.objects.all().order_by("-provider_no")
+    queryset = Provider.objects.active().order_by("-provider_no")
+    cache_models = (Provider,)
+    fast_list_fields = serializers.ProviderSerializer.Meta.fields
+
+    def get_cache_models(self):
+        if self.action == "stats":
+            return (Provider, Article)
+        return self.cache_models
+
+    def is_async_delete(self):
+        """Return whether the client asked for a background deletion."""
+        value = self.request.query_params.get("async", "")
+        return value.lower() in ("1", "true", "yes")
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "async",
+                OpenApiTypes.BOOL,
+                description=(
+                    "Hide the provider and delete its articles in batches in the "
+                    "background (202), instead of in one transaction (204)."
+                ),
+            ),
+        ],
+        responses={
+            202: serializers.ProviderDeletionSerializer,
+            204: None,
+        },
+    )
+    def destroy(self, request, *args, **kwargs):
+        """Delete a provider and its articles, optionally in the background."""
+        if not self.is_async_delete():
+            return super().destroy(request, *args, **kwargs)
+
+        deletion = start_provider_deletion(self.get_object())
+        if deletion is None:
+            raise NotFound()
+        location = reverse(
+            "provider:provider-deletion",
+            kwargs={"deletion_id": deletion.pk},
+            request=request,
+        )
+        return Response(
+            serializers.ProviderDeletionSerializer(deletion).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": location},
+        )
+
+    @extend_schema(responses=serializers.ProviderDeletionSerializer)
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"deletions/(?P<deletion_id>[0-9]+)",
+        url_name="deletion",
+    )
+    def deletion(self, request, deletion_id):
+        """Return the progress of a background provider deletion."""
+        deletion = get_object_or_404(ProviderDeletion, pk=deletion_id)
+        return Response(serializers.ProviderDeletionSerializer(deletion).data)
+
+    @extend_schema(responses=serializers.ProviderStatsSerializer(many=True))
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="stats",
+        url_name="stats",
+        renderer_classes=[FastJSONRenderer, BrowsableAPIRenderer],
+    )
+    def stats(self, request):
+        """Return the article count and prices of every provider."""
+        return self.cached_response(self.get_stats, request)
+
+    def get_stats(self, request):
+        """Read the stats of every provider from the summary table."""
+        rows = Provider.objects.active().order_by("provider_no").values_list(
+            "provider_no",
+            "provider_name",
+            "stats__article_count",
+            "stats__price_sum",
+            "stats__price_min",
+            "stats__price_max",
+        )
+        data = []
+        for provider_no, provider_name, count, total, low, high in rows.iterator(
+            chunk_size=2000
+        ):
+            data.append(
+                {
+                    "provider_no": provider_no,
+                    "provider_name": provider_name,
+                    "article_count": count or 0,
+                    "price_min": low,
+                    "price_max": high,
+                    "price_avg": round(total / count, 2) if count else None,
+                }
+            )
+        return Response(data)
+
+    @extend_schema(
+        responses=serializers.ProviderSearchResultSerializer(many=True),
+        parameters=[
+            OpenApiParameter(
+                "q",
+                OpenApiTypes.STR,
+                required=True,
+                description="Words to look for in provider names.",
+            ),
+            OpenApiParameter(
+                "limit",
+                OpenApiTypes.INT,
+                description=(
+                    f"Maximum number of providers returned, "
+                    f"{serializers.SEARCH_LIMIT} by default."
+                ),
+            ),
+        ],
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="search",
+        url_name="search",
+        renderer_classes=[FastJSONRenderer, BrowsableAPIRenderer],
+    )
+    def search(self, request):
+        """Return the providers whose name matches q, best matches first."""
+        return self.cached_response(self.get_search_response, request)
+
+    def get_search_response(self, request):
+        """Run the search asked for by `request`."""
+        serializer = serializers.ProviderSearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        rows = (
+            search(Provider.objects.active(), params["q"], "provider_name")
+            .order_by("-rank", "provider_no")
+            .values("provider_no", "provider_name", "rank")
+        )
+        return Response(list(rows[: params["limit"]]))